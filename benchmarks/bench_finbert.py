@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import resource
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+from benchmarks.fake_market import MarketFixtures
+from pipelines.common.finbert_worker import MODEL_NAME, BACKENDS, build_classifier, classify_texts
+
+# ⏱️ Benchmark + contrôle de parité des backends FinBERT (CPU)
+# Chaque backend tourne dans un process neuf (mémoire de pointe comparable) sur le même
+# jeu de titres (fixtures de fake_market) ; ses labels sont comparés à ceux du FP32.
+#   python benchmarks/bench_finbert.py --headlines 2000 --backends torch int8 onnx-int8
+# Code de sortie 1 si un backend descend sous --min-agreement.
+
+
+def fixture_headlines(n):
+    fixtures = MarketFixtures(max(1, n))
+    titles = []
+    for ticker in fixtures.sp500_tickers():
+        titles.extend(e["title"] for e in fixtures.rss_entries(ticker))
+        if len(titles) >= n:
+            break
+    return titles[:n]
+
+
+def score_backend(model_name, backend, texts, batch_size, threads):
+    import torch
+    torch.set_num_threads(threads)
+    started = time.perf_counter()
+    classifier = build_classifier(model_name, backend)
+    load_time = time.perf_counter() - started
+
+    classify_texts(classifier, texts[:batch_size], batch_size=batch_size)  # échauffement
+    started = time.perf_counter()
+    results = classify_texts(classifier, texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    # ru_maxrss : Ko sous Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return [r["label"].upper() for r in results], load_time, elapsed, peak_mb
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--headlines", type=int, default=2000)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-agreement", type=float, default=0.98, help="Part minimale de labels identiques au FP32")
+    args = parser.parse_args()
+
+    texts = fixture_headlines(args.headlines)
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    context = multiprocessing.get_context("spawn")
+
+    runs = {}
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            runs[backend] = executor.submit(score_backend, args.model, backend, texts, args.batch_size, args.threads).result()
+
+    reference = runs["torch"][0]
+    failed = []
+    print(f"\n{args.model} — {len(texts)} titres, lots de {args.batch_size}, {args.threads} threads")
+    print(f"{'backend':<10} {'chargement':>11} {'ms/titre':>9} {'titres/s':>9} {'RSS max':>9} {'parité':>8}")
+    for backend, (labels, load_time, elapsed, peak_mb) in runs.items():
+        agreement = sum(a == b for a, b in zip(labels, reference)) / len(reference)
+        if agreement < args.min_agreement:
+            failed.append(backend)
+        print(
+            f"{backend:<10} {load_time:10.1f}s {elapsed * 1000 / len(texts):9.2f} {len(texts) / elapsed:9.0f}"
+            f" {peak_mb:8.0f}M {agreement:8.2%}"
+        )
+
+    if failed:
+        print(f"❌ Parité insuffisante (< {args.min_agreement:.0%}) : {', '.join(failed)}")
+        sys.exit(1)
+    print(f"✅ Parité des labels OK (≥ {args.min_agreement:.0%} vs FP32)")
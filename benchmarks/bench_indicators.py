@@ -0,0 +1,75 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import ta
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.indicators import latest_indicators, INDICATOR_COLUMNS
+
+# ⏱️ Benchmark + contrôle de parité : indicateurs `ta` ticker par ticker vs moteur vectorisé
+
+
+def synthetic_closes(n_tickers, n_days=125, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-06-30", periods=n_days)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n_days, n_tickers)), axis=0))
+    frame = pd.DataFrame(closes, index=dates, columns=[f"T{i}" for i in range(n_tickers)])
+    # Calendriers différents (jours fériés, cotations récentes)
+    for i in range(0, n_tickers, 5):
+        frame.iloc[:rng.integers(0, 60), i] = np.nan
+    # Cas limites : série plate, historiques plus courts que les fenêtres (préchauffage NaN)
+    frame["FLAT"] = 50.0
+    for n in (5, 12, 15, 25, 40):
+        frame[f"SHORT{n}"] = np.nan
+        frame.iloc[-n:, frame.columns.get_loc(f"SHORT{n}")] = 100 + 0.5 * np.arange(n)
+    return frame
+
+
+def ta_latest(close):
+    rows = []
+    for ticker in close.columns:
+        series = close[ticker].dropna()
+        bb = ta.volatility.BollingerBands(series)
+        rows.append({
+            "Ticker": ticker,
+            "RSI_14": ta.momentum.RSIIndicator(series, window=14).rsi().iloc[-1],
+            "SMA20_above_SMA50": int(ta.trend.SMAIndicator(series, window=20).sma_indicator().iloc[-1] > ta.trend.SMAIndicator(series, window=50).sma_indicator().iloc[-1]),
+            "MACD": ta.trend.MACD(series).macd().iloc[-1],
+            "Momentum_10": ta.momentum.ROCIndicator(series, window=10).roc().iloc[-1],
+            "BB_Percent": (series.iloc[-1] - bb.bollinger_lband().iloc[-1]) / (bb.bollinger_hband().iloc[-1] - bb.bollinger_lband().iloc[-1])
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=1250)
+    args = parser.parse_args()
+
+    close = synthetic_closes(args.tickers)
+
+    start = time.perf_counter()
+    expected = ta_latest(close).set_index("Ticker")
+    elapsed_ta = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = latest_indicators(close).set_index("Ticker")
+    elapsed_engine = time.perf_counter() - start
+
+    mismatches = []
+    for col in INDICATOR_COLUMNS:
+        got, want = result[col].to_numpy(float), expected[col].to_numpy(float)
+        bad = ~np.isclose(got, want, rtol=1e-8, atol=1e-8, equal_nan=True)
+        mismatches.extend(f"{col} {ticker} : {g} ≠ {w}" for ticker, g, w in zip(result.index[bad], got[bad], want[bad]))
+    if mismatches:
+        print(f"❌ Parité `ta` en échec ({len(mismatches)} valeurs) :")
+        print("\n".join(mismatches[:20]))
+        sys.exit(1)
+
+    print(f"✅ Parité `ta` OK sur {close.shape[1]} tickers (dont série plate et historiques courts)")
+    print(f"ta (par ticker)    {elapsed_ta * 1000:10.1f} ms")
+    print(f"moteur vectorisé   {elapsed_engine * 1000:10.1f} ms")
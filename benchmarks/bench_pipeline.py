@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common import telemetry
+from pipelines.common.table_store import read_table, table_path
+from benchmarks.fake_market import MarketFixtures, write_sentiment_outputs
+
+# ⏱️ Benchmark bout-en-bout des étapes du pipeline sur un univers synthétique
+# Chaque taille (100 / 1 000 / 10 000 tickers) tourne dans une copie de travail isolée,
+# réseau remplacé par benchmarks/fake_market.py. Rapport : durée, pic RSS et détail par
+# sous-étape (télémétrie JSONL). --baseline compare à un run précédent (--output).
+
+FAST_FETCH = ["--fetch-workers", "16", "--fetch-rate", "100000", "--fetch-burst", "100000"]
+
+STAGES = [
+    {"name": "etl_pipeline", "script": "pipelines/1_companies/etl_pipeline.py", "args": FAST_FETCH},
+    {"name": "enrich_etl", "script": "pipelines/1_companies/enrich_etl.py", "args": FAST_FETCH},
+    {"name": "merge_uniform", "script": "pipelines/1_companies/merge_uniform.py", "args": FAST_FETCH},
+    {"name": "enrich_companies", "script": "pipelines/3_enrich_companies/enrich_companies.py", "args": FAST_FETCH},
+    {"name": "refine_companies", "script": "pipelines/3_enrich_companies/refine_companies.py", "args": FAST_FETCH},
+    {"name": "merge_news_gpt", "script": "pipelines/4_sentiment/merge_news_gpt.py", "args": [], "seed_sentiment": True},
+    {"name": "clean_json_files", "script": "pipelines/6_final/clean_json_files.py", "args": []},
+    {"name": "generate_df_sentiment_full", "script": "pipelines/4_sentiment/generate_df_sentiment_full.py", "args": []}
+]
+
+
+def create_workspace():
+    workspace = tempfile.mkdtemp(prefix="bench_pipeline_")
+    shutil.copytree(
+        os.path.join(BASE_DIR, "pipelines"), os.path.join(workspace, "pipelines"),
+        ignore=shutil.ignore_patterns("__pycache__", "*.json")
+    )
+    os.makedirs(os.path.join(workspace, "data"), exist_ok=True)
+    os.makedirs(os.path.join(workspace, "output", "insights_enriched_all"), exist_ok=True)
+    return workspace
+
+
+def run_stage(stage, workspace, n_tickers, latency_ms, verbose):
+    events_path = os.path.join(workspace, "telemetry", f"{stage['name']}.jsonl")
+    env = dict(os.environ, **{telemetry.ENV_VAR: events_path})
+    command = [
+        sys.executable, os.path.join(BASE_DIR, "benchmarks", "run_stage.py"),
+        "--workspace", workspace, "--tickers", str(n_tickers), "--latency-ms", str(latency_ms),
+        stage["script"]
+    ] + stage["args"]
+
+    started = time.perf_counter()
+    process = subprocess.run(
+        command, cwd=workspace, env=env,
+        stdout=None if verbose else subprocess.DEVNULL, stderr=None if verbose else subprocess.PIPE,
+        universal_newlines=True
+    )
+    wall = time.perf_counter() - started
+
+    events, _ = telemetry.read_events(events_path)
+    peak_rss_kb = max((e["peak_rss_kb"] for e in events if e["event"] == "process"), default=None)
+    return {
+        "stage": stage["name"],
+        "ok": process.returncode == 0,
+        "error": None if process.returncode == 0 or verbose else (process.stderr or "").strip().splitlines()[-1:],
+        "wall": round(wall, 3),
+        "peak_rss_mb": round(peak_rss_kb / 1024, 1) if peak_rss_kb else None,
+        "phases": telemetry.summarize([e for e in events if e["event"] != "process"])
+    }
+
+
+def run_size(n_tickers, latency_ms, keep, verbose):
+    workspace = create_workspace()
+    results = []
+    try:
+        for stage in STAGES:
+            if stage.get("seed_sentiment"):
+                write_sentiment_outputs(MarketFixtures(n_tickers), merged_tickers(workspace), os.path.join(workspace, "data"))
+            result = run_stage(stage, workspace, n_tickers, latency_ms, verbose)
+            results.append(result)
+            status = "✅" if result["ok"] else f"❌ {result['error']}"
+            print(f"  [{n_tickers:>6}] {stage['name']:<28} {result['wall']:8.2f}s  {result['peak_rss_mb'] or 0:8.1f} Mo  {status}")
+            if not result["ok"]:
+                break
+    finally:
+        if keep:
+            print(f"  📁 Espace de travail conservé : {workspace}")
+        else:
+            shutil.rmtree(workspace, ignore_errors=True)
+    return results
+
+
+# 📰 L'étape sentiment (GPT + FinBERT) n'est pas rejouée : ses sorties sont reconstituées depuis les fixtures
+def merged_tickers(workspace):
+    data_dir = os.path.join(workspace, "data")
+    if not os.path.exists(table_path("df_final_merged", data_dir)):
+        return []
+    return read_table("df_final_merged", columns=["Ticker"], data_dir=data_dir)["Ticker"].dropna().tolist()
+
+
+def print_report(report):
+    print("\n📊 Détail par sous-étape :")
+    for size, results in report.items():
+        print(f"\n  === {size} tickers ===")
+        for result in results:
+            print(f"  {result['stage']:<28} {result['wall']:8.2f}s  pic RSS {result['peak_rss_mb'] or 0:.1f} Mo")
+            for phase in result["phases"]:
+                latency = f"p50 {phase['p50'] * 1000:.1f}ms / p95 {phase['p95'] * 1000:.1f}ms" if phase["p50"] is not None else ""
+                print(f"      {phase['step']:<40} {phase['duration']:8.2f}s  {phase['items']:6d} items  {latency}")
+
+
+# 🚨 Régressions : durée > (1 + tolérance) × baseline, au-delà d'un plancher absolu
+def compare_with_baseline(report, baseline, tolerance, min_seconds=0.5):
+    regressions = []
+    for size, results in report.items():
+        previous = {r["stage"]: r for r in baseline.get(size, [])}
+        for result in results:
+            before = previous.get(result["stage"])
+            if not before or not before["ok"] or not result["ok"]:
+                continue
+            if result["wall"] > before["wall"] * (1 + tolerance) and result["wall"] - before["wall"] > min_seconds:
+                regressions.append((size, result["stage"], before["wall"], result["wall"]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Tailles d'univers synthétique")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latence simulée par requête réseau")
+    parser.add_argument("--output", help="Fichier JSON où écrire les résultats")
+    parser.add_argument("--baseline", help="Résultats JSON d'un run précédent à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Ralentissement toléré vs baseline (0.25 = +25%%)")
+    parser.add_argument("--keep", action="store_true", help="Conserve les espaces de travail")
+    parser.add_argument("--verbose", action="store_true", help="Affiche la sortie des scripts")
+    args = parser.parse_args()
+
+    report = {}
+    for size in args.sizes:
+        print(f"\n🚀 Univers de {size} tickers")
+        report[str(size)] = run_size(size, args.latency_ms, args.keep, args.verbose)
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Résultats enregistrés dans {args.output}")
+
+    failed = any(not r["ok"] for results in report.values() for r in results)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+        for size, stage, before, after in regressions:
+            print(f"🚨 Régression [{size}] {stage} : {before:.2f}s → {after:.2f}s")
+        failed = failed or bool(regressions)
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.price_history import PriceHistoryStore
+
+# ⏱️ Benchmark : fetch historique par ticker (ancien ETL) vs store partagé + yf.download groupé
+# Le "réseau" est simulé : chaque requête coûte une latence fixe + un coût par ticker.
+
+UNIVERSE = {"SP500": 503, "CAC40": 40, "Nikkei225": 225}
+# Nombre de Ticker.history() par ticker dans l'ancien etl_pipeline.py
+LEGACY_CALLS_PER_TICKER = {"SP500": 2, "CAC40": 3, "Nikkei225": 2}
+
+
+def synthetic_history(ticker, n_days=125):
+    rng = np.random.default_rng(abs(hash(ticker)) % (2 ** 32))
+    dates = pd.bdate_range(end="2025-06-30", periods=n_days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+    return pd.DataFrame({
+        "Open": close, "High": close * 1.01, "Low": close * 0.99,
+        "Close": close, "Volume": rng.integers(1e5, 1e7, n_days)
+    }, index=dates)
+
+
+class FakeYahoo:
+    def __init__(self, request_latency, per_ticker_latency):
+        self.request_latency = request_latency
+        self.per_ticker_latency = per_ticker_latency
+        self.requests = 0
+
+    def history(self, ticker):
+        self.requests += 1
+        time.sleep(self.request_latency + self.per_ticker_latency)
+        return synthetic_history(ticker)
+
+    def download(self, tickers, **kwargs):
+        self.requests += 1
+        time.sleep(self.request_latency + self.per_ticker_latency * len(tickers))
+        return pd.concat({t: synthetic_history(t) for t in tickers}, axis=1)
+
+
+def run_legacy(fake, universe):
+    for index, tickers in universe.items():
+        for _ in range(LEGACY_CALLS_PER_TICKER[index]):
+            for ticker in tickers:
+                fake.history(ticker)
+
+
+def run_store(fake, universe):
+    store = PriceHistoryStore(download_fn=fake.download)
+    for tickers in universe.values():
+        store.prefetch(tickers)
+        for ticker in tickers:
+            store.returns_and_volatility(ticker)
+            store.has_min_history(ticker, 50)
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latence simulée par requête HTTP")
+    parser.add_argument("--per-ticker-ms", type=float, default=0.5, help="Coût simulé par ticker dans une requête")
+    args = parser.parse_args()
+
+    universe = {k: [f"{k}_{i}" for i in range(n)] for k, n in UNIVERSE.items()}
+
+    results = {}
+    for name, runner in [("legacy (Ticker.history)", run_legacy), ("store (yf.download)", run_store)]:
+        fake = FakeYahoo(args.latency_ms / 1000, args.per_ticker_ms / 1000)
+        start = time.perf_counter()
+        runner(fake, universe)
+        results[name] = (time.perf_counter() - start, fake.requests)
+
+    for name, (elapsed, n_requests) in results.items():
+        print(f"{name:<26} {elapsed:8.2f}s  {n_requests:5d} requêtes")
@@ -0,0 +1,327 @@
+import os
+import json
+import time
+import zlib
+import numpy as np
+import pandas as pd
+
+# 🎭 Faux services de marché pour les benchmarks (aucun appel réseau)
+# Les réponses viennent de fixtures enregistrées (benchmarks/fixtures/*.json, voir
+# `python benchmarks/fake_market.py record`) ou, à défaut, des modèles intégrés ci-dessous.
+# Chaque ticker synthétique reçoit un modèle (.info, flux RSS, réponses LLM) perturbé
+# de façon déterministe, et un historique de prix généré à partir de son nom.
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+DEFAULT_INFOS = [
+    {
+        "longName": "Synthetic Technology Corp", "shortName": "SYN TECH", "sector": "Technology",
+        "marketCap": 85_000_000_000, "trailingPE": 28.4, "priceToBook": 9.1, "enterpriseToRevenue": 7.2,
+        "enterpriseToEbitda": 21.5, "grossMargins": 0.61, "profitMargins": 0.22, "returnOnEquity": 0.34,
+        "returnOnAssets": 0.12, "beta": 1.18, "dividendYield": 0.006, "debtToEquity": 45.2,
+        "currentRatio": 1.7, "quickRatio": 1.4, "freeCashflow": 4_100_000_000, "operatingCashflow": 5_600_000_000,
+        "totalRevenue": 18_000_000_000, "enterpriseValue": 87_000_000_000, "ebitda": 4_050_000_000,
+        "ebit": 3_600_000_000, "interestExpense": 210_000_000, "totalDebt": 6_200_000_000,
+        "totalCash": 4_900_000_000, "totalStockholderEquity": 13_700_000_000, "pegRatio": 1.9,
+        "recommendationKey": "buy", "numberOfAnalystOpinions": 31, "targetMeanPrice": 212.5,
+        "regularMarketPrice": 188.2, "previousClose": 186.9
+    },
+    {
+        "longName": "Synthetic Utilities SA", "shortName": "SYN UTIL", "sector": "Utilities",
+        "marketCap": 12_500_000_000, "trailingPE": 14.1, "priceToBook": 1.3, "enterpriseToRevenue": 2.1,
+        "enterpriseToEbitda": 8.7, "grossMargins": 0.38, "profitMargins": 0.09, "returnOnEquity": 0.1,
+        "returnOnAssets": 0.03, "beta": 0.62, "dividendYield": 0.041, "debtToEquity": 132.0,
+        "currentRatio": 0.9, "quickRatio": 0.7, "freeCashflow": 610_000_000, "operatingCashflow": 1_900_000_000,
+        "totalRevenue": 7_800_000_000, "enterpriseValue": 16_400_000_000, "ebitda": 1_890_000_000,
+        "ebit": 1_120_000_000, "interestExpense": 340_000_000, "totalDebt": 8_100_000_000,
+        "totalCash": 1_300_000_000, "totalStockholderEquity": 6_100_000_000, "pegRatio": 2.6,
+        "recommendationKey": "hold", "numberOfAnalystOpinions": 14, "targetMeanPrice": 41.0,
+        "regularMarketPrice": 38.7, "previousClose": 38.9
+    }
+]
+
+DEFAULT_HEADLINES = [
+    "{name} beats quarterly earnings expectations as revenue climbs",
+    "Analysts raise {name} price target after strong guidance",
+    "{name} shares slip as margins come under pressure",
+    "{name} announces share buyback and dividend increase",
+    "Regulators open inquiry into {name} supply contracts",
+    "{name} signs multi-year partnership with major customer",
+    "Is {name} stock a buy after the recent pullback?",
+    "{name} CEO comments on demand outlook at industry conference",
+    "{name} completes acquisition to expand product line",
+    "Short interest in {name} rises ahead of earnings",
+    "{name} upgraded to outperform on valuation",
+    "{name} faces currency headwinds in Europe",
+    "{name} launches new platform aimed at enterprise clients",
+    "Institutional investors add to {name} positions",
+    "{name} trims full-year forecast citing weaker orders"
+]
+
+DEFAULT_LLM = {
+    "news_summary_global": (
+        "{name} affiche des résultats supérieurs aux attentes et relève ses perspectives, ce qui soutient le sentiment. "
+        "Les analystes relèvent leurs objectifs malgré une pression sur les marges. "
+        "Le rachat d'actions et l'acquisition récente renforcent le profil de croissance, "
+        "mais une enquête réglementaire reste un point de vigilance."
+    ),
+    "news_bullet_points": (
+        "- Résultats trimestriels supérieurs au consensus\n- Relèvement des objectifs de cours\n"
+        "- Programme de rachat d'actions et hausse du dividende\n- Enquête réglementaire en cours\n"
+        "- Révision à la baisse des prévisions annuelles"
+    )
+}
+
+LABELS = ["POSITIVE", "NEGATIVE", "NEUTRAL"]
+
+
+def _seed(key):
+    return zlib.crc32(key.encode("utf-8"))
+
+
+def _load_fixture(name, default):
+    path = os.path.join(FIXTURE_DIR, name)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return default
+
+
+class MarketFixtures:
+    def __init__(self, n_tickers, n_days=125, latency=0.0):
+        self.n_tickers = n_tickers
+        self.n_days = n_days
+        self.latency = latency
+        self.infos = _load_fixture("infos.json", DEFAULT_INFOS)
+        self.headlines = _load_fixture("headlines.json", DEFAULT_HEADLINES)
+        self.llm = _load_fixture("llm_responses.json", DEFAULT_LLM)
+        self.requests = 0
+
+    # 🏷️ Univers synthétique : S&P500 = n_tickers, Nikkei = n_tickers / 4 (max 225), screeners = n_tickers / 2
+    def sp500_tickers(self):
+        return [f"SYN{i:05d}" for i in range(self.n_tickers)]
+
+    def nikkei_codes(self):
+        return [str(1000 + i) for i in range(min(225, max(1, self.n_tickers // 4)))]
+
+    def screener_tickers(self, source):
+        return [f"{source}{i:05d}" for i in range(max(1, self.n_tickers // 2))]
+
+    def wait(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def info(self, ticker):
+        rng = np.random.default_rng(_seed(ticker))
+        template = self.infos[_seed(ticker) % len(self.infos)]
+        info = {}
+        for key, value in template.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = type(value)(value * rng.uniform(0.7, 1.3))
+            info[key] = value
+        info["symbol"] = ticker
+        info["longName"] = f"{template.get('longName', 'Company')} {ticker}"
+        return info
+
+    def history(self, ticker):
+        rng = np.random.default_rng(_seed(ticker))
+        dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=self.n_days)
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, self.n_days)))
+        return pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.003, self.n_days)),
+            "High": close * 1.01, "Low": close * 0.99, "Close": close,
+            "Volume": rng.integers(100_000, 10_000_000, self.n_days)
+        }, index=dates)
+
+    def rss_entries(self, ticker):
+        offset = _seed(ticker) % len(self.headlines)
+        titles = (self.headlines[offset:] + self.headlines[:offset])[:20]
+        return [
+            {"title": title.format(name=ticker), "url": f"https://news.example.com/{ticker.lower()}/{i}"}
+            for i, title in enumerate(titles)
+        ]
+
+    def llm_response(self, task, ticker):
+        return self.llm[task].format(name=ticker)
+
+    def sentiment_labels(self, ticker, n):
+        rng = np.random.default_rng(_seed(ticker))
+        return [LABELS[k] for k in rng.choice(3, size=n, p=[0.45, 0.2, 0.35])]
+
+
+# 🔌 Remplace les clients réseau par les fixtures (à appeler avant d'exécuter un script)
+def install(fixtures):
+    import requests
+    import yfinance as yf
+
+    class FakeTicker:
+        def __init__(self, ticker):
+            self.ticker = ticker
+
+        @property
+        def info(self):
+            fixtures.wait()
+            return fixtures.info(self.ticker)
+
+        def history(self, period="6mo", interval="1d", **kwargs):
+            fixtures.wait()
+            return fixtures.history(self.ticker)
+
+    def fake_download(tickers, **kwargs):
+        fixtures.wait()
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        return pd.concat({t: fixtures.history(t) for t in tickers}, axis=1)
+
+    def fake_read_html(url, *args, **kwargs):
+        fixtures.wait()
+        sectors = ["Information Technology", "Health Care", "Financials", "Industrials", "Energy", "Utilities"]
+        tickers = fixtures.sp500_tickers()
+        return [pd.DataFrame({
+            "Symbol": tickers,
+            "Security": [f"Synthetic Company {t}" for t in tickers],
+            "GICS Sector": [sectors[_seed(t) % len(sectors)] for t in tickers]
+        })]
+
+    class FakeResponse:
+        def __init__(self, content, payload=None):
+            self.content = content.encode("utf-8")
+            self.text = content
+            self.status_code = 200
+            self._payload = payload
+
+        def json(self):
+            return self._payload
+
+        def raise_for_status(self):
+            pass
+
+    def fake_requests_get(url, *args, **kwargs):
+        fixtures.wait()
+        if "Nikkei_225" in url:
+            items = "".join(
+                f'<li><a href="#">Synthetic Nikkei {code}</a> (<a href="#">{code}</a>)</li>'
+                for code in fixtures.nikkei_codes()
+            )
+            return FakeResponse(f"<html><body><h2>Components</h2><h3>Synthetic</h3><ul>{items}</ul><h2>End</h2></body></html>")
+        raise RuntimeError(f"URL non servie par le faux marché : {url}")
+
+    yf.Ticker = FakeTicker
+    yf.download = fake_download
+    pd.read_html = fake_read_html
+    requests.get = fake_requests_get
+
+    # Screeners (Finviz, yahooquery), RSS, LLM, traduction : remplacés s'ils sont installés
+    try:
+        import finvizfinance.screener.overview as finviz_overview
+
+        class FakeOverview:
+            def set_filter(self, filters_dict=None, **kwargs):
+                self.source = "FVG" if "Sales growthqtr over qtr" in (filters_dict or {}) else "FVV"
+
+            def screener_view(self, *args, **kwargs):
+                fixtures.wait()
+                return pd.DataFrame({"Ticker": fixtures.screener_tickers(self.source)})
+
+        finviz_overview.Overview = FakeOverview
+    except ImportError:
+        pass
+
+    try:
+        import yahooquery
+
+        class FakeScreener:
+            def get_screeners(self, name, count=25, **kwargs):
+                fixtures.wait()
+                return {name: {"quotes": [{"symbol": t} for t in fixtures.screener_tickers("YHT")[:count]]}}
+
+        yahooquery.Screener = FakeScreener
+    except ImportError:
+        pass
+
+    try:
+        import feedparser
+
+        class FakeEntry:
+            def __init__(self, title, link):
+                self.title = title
+                self.link = link
+
+        class FakeFeed:
+            def __init__(self, entries):
+                self.entries = entries
+
+        def fake_parse(url, *args, **kwargs):
+            fixtures.wait()
+            ticker = url.split("q=")[1].split("%20")[0].split("+")[0] if "q=" in url else "UNKNOWN"
+            return FakeFeed([FakeEntry(e["title"], e["url"]) for e in fixtures.rss_entries(ticker)])
+
+        feedparser.parse = fake_parse
+    except ImportError:
+        pass
+
+
+# 📰 Sorties de l'étape sentiment (RSS + GPT + FinBERT) reconstituées depuis les fixtures
+def write_sentiment_outputs(fixtures, tickers, data_dir):
+    from pipelines.common.table_store import write_table
+
+    rows, summaries = [], {}
+    for ticker in tickers:
+        entries = fixtures.rss_entries(ticker)
+        labels = fixtures.sentiment_labels(ticker, len(entries))
+        counts = {label: labels.count(label) for label in LABELS}
+        total = len(labels)
+        summary = fixtures.llm_response("news_summary_global", ticker)
+        bullets = fixtures.llm_response("news_bullet_points", ticker).split("\n")
+        bullet_labels = fixtures.sentiment_labels(ticker + "|bullets", len(bullets))
+        rows.append({
+            "Ticker": ticker,
+            "news_count": total,
+            "sentiment_score": round((counts["POSITIVE"] - counts["NEGATIVE"]) / total, 3),
+            "positive_ratio": round(counts["POSITIVE"] / total, 2),
+            "negative_ratio": round(counts["NEGATIVE"] / total, 2),
+            "neutral_ratio": round(counts["NEUTRAL"] / total, 2),
+            "gpt_label": labels[0],
+            "bullet_positive_count": bullet_labels.count("POSITIVE"),
+            "bullet_negative_count": bullet_labels.count("NEGATIVE"),
+            "source": " / ".join(f"{e['title']} ({e['url']}) → {label.title()}" for e, label in zip(entries, labels))
+        })
+        summaries[ticker] = summary
+
+    write_table("sentiment_news_summary_full", pd.DataFrame(rows), data_dir=data_dir)
+    with open(os.path.join(data_dir, "news_summaries_full.json"), "w", encoding="utf-8") as f:
+        json.dump(summaries, f, indent=2, ensure_ascii=False)
+
+
+# 🎙️ Enregistrement de fixtures réelles (quelques tickers) pour remplacer les modèles intégrés
+def record(tickers):
+    import urllib.parse
+    import feedparser
+    import yfinance as yf
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    infos, headlines = [], []
+    for ticker in tickers:
+        info = yf.Ticker(ticker).info
+        infos.append({k: v for k, v in info.items() if isinstance(v, (int, float, str)) and not isinstance(v, bool)})
+        query = urllib.parse.quote(f"{ticker} stock")
+        feed = feedparser.parse(f"https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en")
+        name = info.get("shortName") or ticker
+        headlines.extend(e.title.replace("{", "{{").replace("}", "}}").replace(name, "{name}") for e in feed.entries[:20])
+
+    with open(os.path.join(FIXTURE_DIR, "infos.json"), "w", encoding="utf-8") as f:
+        json.dump(infos, f, indent=2, ensure_ascii=False)
+    with open(os.path.join(FIXTURE_DIR, "headlines.json"), "w", encoding="utf-8") as f:
+        json.dump(headlines, f, indent=2, ensure_ascii=False)
+    print(f"✅ {len(infos)} .info et {len(headlines)} titres enregistrés dans {FIXTURE_DIR}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Enregistre .info et flux RSS réels comme fixtures")
+    record_parser.add_argument("tickers", nargs="+")
+    args = parser.parse_args()
+    record(args.tickers)
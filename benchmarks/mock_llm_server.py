@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from aiohttp import web
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+from benchmarks.fake_market import MarketFixtures
+
+# 🎭 Serveur LLM local (compatible API OpenAI chat.completions + API Mistral /analyze)
+# Réponses tirées des fixtures de fake_market, latence et taux de réponses invalides
+# configurables : sert à tester le mode lot (JSON par ticker, découpage/relance) sans
+# appel payant. --rate-limit-rpm renvoie des 429 (Retry-After) au-delà du quota, pour
+# exercer les budgets et la concurrence adaptative de pipelines/common/llm_client.py.
+#   python benchmarks/mock_llm_server.py --port 8089 --latency-ms 800 --malformed-rate 0.1
+#   OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=mock python pipelines/4_sentiment/enrich_sent_gpt.py
+#   MISTRAL_API_URL=http://127.0.0.1:8089/analyze python pipelines/4_sentiment/enrich_sent_mistral.py
+
+
+class MockLLM:
+    def __init__(self, latency, per_ticker_latency, malformed_rate, rate_limit_rpm=0, seed=0):
+        self.fixtures = MarketFixtures(0)
+        self.latency = latency
+        self.per_ticker_latency = per_ticker_latency
+        self.malformed_rate = malformed_rate
+        self.rate_limit_rpm = rate_limit_rpm
+        self.recent = []
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "batch_requests": 0, "batch_tickers": 0, "malformed": 0, "rate_limited": 0}
+
+    def _bullets(self, name):
+        return [b.strip("-• ").strip() for b in self.fixtures.llm_response("news_bullet_points", name).split("\n") if b.strip()]
+
+    # 📦 Mode lot : le prompt contient un objet JSON {ticker: [titres]}
+    def batch_answer(self, prompt):
+        headlines, _ = json.JSONDecoder().raw_decode(prompt, prompt.index("{"))
+        self.stats["batch_requests"] += 1
+        self.stats["batch_tickers"] += len(headlines)
+        answer = {
+            ticker: {"summary": self.fixtures.llm_response("news_summary_global", ticker), "bullets": self._bullets(ticker)}
+            for ticker in headlines
+        }
+        content = json.dumps(answer, ensure_ascii=False)
+        if self.random.random() < self.malformed_rate:
+            self.stats["malformed"] += 1
+            if len(answer) > 1 and self.random.random() < 0.5:
+                answer.pop(next(iter(answer)))
+                content = json.dumps(answer, ensure_ascii=False)
+            else:
+                content = content[:len(content) // 2]
+        return content, len(headlines)
+
+    def text_answer(self, prompt):
+        task = "news_bullet_points" if "Bullet points" in prompt else "news_summary_global"
+        return self.fixtures.llm_response(task, "l'entreprise")
+
+    # 🚦 Quota glissant sur 60 s : au-delà, 429 comme l'API réelle
+    def over_quota(self):
+        if not self.rate_limit_rpm:
+            return False
+        now = time.monotonic()
+        self.recent = [t for t in self.recent if now - t < 60]
+        if len(self.recent) >= self.rate_limit_rpm:
+            self.stats["rate_limited"] += 1
+            return True
+        self.recent.append(now)
+        return False
+
+    async def chat_completions(self, request):
+        body = await request.json()
+        if self.over_quota():
+            retry_after = max(1, int(60 - (time.monotonic() - self.recent[0])))
+            return web.json_response(
+                {"error": {"message": "Rate limit reached (mock)", "type": "requests", "code": "rate_limit_exceeded"}},
+                status=429, headers={"retry-after": str(retry_after)}
+            )
+        prompt = body["messages"][-1]["content"]
+        self.stats["requests"] += 1
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            content, n_tickers = self.batch_answer(prompt)
+        else:
+            content, n_tickers = self.text_answer(prompt), 1
+        await asyncio.sleep(self.latency + self.per_ticker_latency * n_tickers)
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        return web.json_response({
+            "id": f"mock-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        })
+
+    async def analyze(self, request):
+        body = await request.json()
+        self.stats["requests"] += 1
+        await asyncio.sleep(self.latency)
+        return web.json_response({"outputs": [self.fixtures.llm_response(body["task"], "l'entreprise")]})
+
+    async def get_stats(self, request):
+        return web.json_response(self.stats)
+
+
+def create_app(mock):
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app.router.add_post("/v1/chat/completions", mock.chat_completions)
+    app.router.add_post("/analyze", mock.analyze)
+    app.router.add_get("/stats", mock.get_stats)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Latence fixe par requête")
+    parser.add_argument("--per-ticker-ms", type=float, default=50.0, help="Latence ajoutée par ticker d'un lot")
+    parser.add_argument("--rate-limit-rpm", type=int, default=0, help="Requêtes/minute acceptées avant des 429 (0 = illimité)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Part des réponses en lot invalides (JSON tronqué ou ticker manquant)")
+    args = parser.parse_args()
+
+    mock = MockLLM(args.latency_ms / 1000, args.per_ticker_ms / 1000, args.malformed_rate, args.rate_limit_rpm)
+    web.run_app(create_app(mock), host=args.host, port=args.port)
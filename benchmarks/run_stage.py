@@ -0,0 +1,38 @@
+import os
+import sys
+import runpy
+import resource
+import argparse
+
+# 🧪 Exécute un script de pipeline dans un espace de travail de benchmark, réseau remplacé
+# par les fixtures. Lancé en sous-processus par bench_pipeline.py (un process par étape,
+# pour mesurer le pic RSS de chaque étape séparément).
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workspace", required=True, help="Copie de travail (pipelines/, data/, output/)")
+    parser.add_argument("--tickers", type=int, required=True, help="Taille de l'univers synthétique")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latence simulée par requête")
+    parser.add_argument("script", help="Chemin du script relatif à l'espace de travail")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    # Le code exécuté est celui de l'espace de travail (BASE_DIR des scripts = workspace)
+    sys.path.insert(0, args.workspace)
+    sys.path.append(REPO_DIR)
+    from pipelines.common import telemetry
+    from benchmarks.fake_market import MarketFixtures, install
+
+    install(MarketFixtures(args.tickers, latency=args.latency_ms / 1000))
+
+    script = os.path.join(args.workspace, args.script)
+    sys.argv = [script] + args.script_args
+    # Sous-étape implicite : tout ce qui précède la première sous-étape du script (imports, chargements)
+    telemetry.step(f"{os.path.basename(script).replace('.py', '')}.main")
+    try:
+        runpy.run_path(script, run_name="__main__")
+    finally:
+        telemetry.end_step()
+        telemetry.emit("process", peak_rss_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
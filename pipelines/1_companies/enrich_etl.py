@@ -2,16 +2,21 @@ from finvizfinance.screener.overview import Overview
 from yahooquery import Screener
 import pandas as pd
 from datetime import datetime
-import ta
-import yfinance as yf
 import numpy as np
-from tqdm import tqdm
 from sklearn.preprocessing import MinMaxScaler
 import os
+import sys
+import argparse
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 os.makedirs(DATA_DIR, exist_ok=True)
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.price_history import PriceHistoryStore
+from pipelines.common.indicators import latest_indicators
+from pipelines.common.fetcher import fetch_infos, add_fetch_arguments, fetch_config_from_args, report_info_cache
+from pipelines.common import telemetry
+from pipelines.common.table_store import read_table, write_table
 
 ### --- 1. Récupération des tickers --- ###
 def get_growth_candidates(limit=350):
@@ -56,29 +61,29 @@ def save_merged_candidates(df_list, final_limit=700):
     merged = pd.concat(df_list, ignore_index=True)
     merged.drop_duplicates(subset='Ticker', inplace=True)
     merged = merged.head(final_limit)
-    output_path = os.path.join(DATA_DIR, "tickers_to_enrich.csv")
-    merged.to_csv(output_path, index=False)
+    output_path = write_table("tickers_to_enrich", merged, data_dir=DATA_DIR)
     print(f"✅ {len(merged)} tickers fusionnés sauvegardés dans {output_path}")
 
 ### --- 2. Enrichissement via yfinance --- ###
-def enrich_tickers_with_yfinance():
-    input_path = os.path.join(DATA_DIR, "tickers_to_enrich.csv")
-    output_path = os.path.join(DATA_DIR, "df_final_enriched.csv")
-
-    df = pd.read_csv(input_path)
+def enrich_tickers_with_yfinance(prices=None, fetch_config=None):
+    df = read_table("tickers_to_enrich", columns=["Ticker"], data_dir=DATA_DIR)
     tickers = df["Ticker"].dropna().unique().tolist()
     enriched_rows = []
 
-    for ticker in tqdm(tickers, desc="🔍 Enriching tickers"):
+    # 📈 Historiques groupés + indicateurs techniques calculés pour tout l'univers d'un coup
+    prices = prices or PriceHistoryStore(period="6mo", interval="1d")
+    prices.prefetch(tickers)
+    df_tech = latest_indicators(prices.close_matrix(tickers, min_days=50)).set_index("Ticker")
+    infos, _ = fetch_infos(df_tech.index.tolist(), desc="🔍 Enriching tickers", **(fetch_config or {}))
+
+    for ticker in tickers:
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            hist = stock.history(period="6mo", interval="1d")
-            if hist is None or len(hist) < 50:
+            if ticker not in df_tech.index or ticker not in infos:
                 continue
 
-            hist = hist.dropna()
-            bb = ta.volatility.BollingerBands(hist['Close'])
+            info = infos[ticker]
+            hist = prices.get(ticker).dropna()
+            tech = df_tech.loc[ticker]
             enriched_rows.append({
                 "Ticker": ticker,
                 "Sector": info.get("sector", "Other"),
@@ -97,24 +102,21 @@ def enrich_tickers_with_yfinance():
                 "Interest_Coverage": info.get("ebit") / info.get("interestExpense") if info.get("ebit") and info.get("interestExpense") else np.nan,
                 "Price_Sales": info.get("marketCap") / info.get("totalRevenue") if info.get("marketCap") and info.get("totalRevenue") else np.nan,
                 "Net_Debt_Equity": (info.get("totalDebt") - info.get("totalCash")) / info.get("totalStockholderEquity") if info.get("totalDebt") and info.get("totalCash") and info.get("totalStockholderEquity") else np.nan,
-                "RSI_14": ta.momentum.RSIIndicator(hist['Close']).rsi().iloc[-1],
-                "SMA20_above_SMA50": int(ta.trend.SMAIndicator(hist['Close'], 20).sma_indicator().iloc[-1] > ta.trend.SMAIndicator(hist['Close'], 50).sma_indicator().iloc[-1]),
-                "MACD": ta.trend.MACD(hist['Close']).macd().iloc[-1],
-                "Momentum_10": ta.momentum.ROCIndicator(hist['Close'], window=10).roc().iloc[-1],
-                "BB_Percent": (hist['Close'].iloc[-1] - bb.bollinger_lband().iloc[-1]) / (bb.bollinger_hband().iloc[-1] - bb.bollinger_lband().iloc[-1])
+                "RSI_14": tech["RSI_14"],
+                "SMA20_above_SMA50": int(tech["SMA20_above_SMA50"]),
+                "MACD": tech["MACD"],
+                "Momentum_10": tech["Momentum_10"],
+                "BB_Percent": tech["BB_Percent"]
             })
         except:
             continue
 
-    pd.DataFrame(enriched_rows).to_csv(output_path, index=False)
+    output_path = write_table("df_final_enriched", pd.DataFrame(enriched_rows), data_dir=DATA_DIR)
     print(f"✅ Enrichissement terminé : {len(enriched_rows)} tickers sauvegardés dans {output_path}")
 
 ### --- 3. Nettoyage final --- ###
 def clean_enriched_data():
-    input_path = os.path.join(DATA_DIR, "df_final_enriched.csv")
-    output_path = os.path.join(DATA_DIR, "df_final_enriched.csv")
-
-    df = pd.read_csv(input_path)
+    df = read_table("df_final_enriched", data_dir=DATA_DIR)
     df['Ticker'] = df['Ticker'].astype(str).str.upper().str.strip()
     df.replace([np.inf, -np.inf], np.nan, inplace=True)
     df = df.loc[:, df.isna().mean() <= 0.5]
@@ -159,14 +161,23 @@ def clean_enriched_data():
 
     df['IndexSource'] = "AltScreen"
     df = df.drop_duplicates(subset='Ticker').reset_index(drop=True)
-    df.to_csv(output_path, index=False)
+    output_path = write_table("df_final_enriched", df, data_dir=DATA_DIR)
     print(f"✅ Nettoyage terminé : {len(df)} lignes sauvegardées dans {output_path}")
 
 ### --- 4. Lancement complet --- ###
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_fetch_arguments(parser)
+    args = parser.parse_args()
+
+    telemetry.step("enrich_etl.screeners")
     df_growth = get_growth_candidates()
     df_value = get_value_candidates()
     df_yahoo = get_yahoo_growth_candidates()
     save_merged_candidates([df_growth, df_value, df_yahoo])
-    enrich_tickers_with_yfinance()
+    telemetry.step("enrich_etl.yfinance")
+    enrich_tickers_with_yfinance(fetch_config=fetch_config_from_args(args))
+    telemetry.step("enrich_etl.clean")
     clean_enriched_data()
+    telemetry.end_step()
+    report_info_cache()
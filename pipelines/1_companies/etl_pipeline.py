@@ -1,7 +1,5 @@
 import pandas as pd
 import yfinance as yf
-from time import sleep
-import ta
 import os
 from bs4 import BeautifulSoup
 from sklearn.preprocessing import MinMaxScaler
@@ -9,8 +7,18 @@ import sqlite3
 import requests
 from datetime import datetime
 import sys
+import argparse
 sys.stdout.reconfigure(line_buffering=True)
 
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.price_history import PriceHistoryStore
+from pipelines.common.indicators import latest_indicators
+from pipelines.common.fetcher import fetch_infos, add_fetch_arguments, fetch_config_from_args, report_info_cache
+from pipelines.common import telemetry
+from pipelines.common.table_store import write_table
+
 def patched_get_info(ticker):
     try:
         stock = yf.Ticker(ticker)
@@ -29,12 +37,17 @@ def patched_get_info(ticker):
         return {}
     
 
-def run_pipeline_etl():
+def run_pipeline_etl(prices=None, fetch_config=None):
+    # 📈 Historiques 6 mois partagés par toutes les étapes (un seul fetch par ticker)
+    prices = prices or PriceHistoryStore(period="6mo", interval="1d")
+    # 🌐 Ticker.info en parallèle, limité en débit (voir pipelines/common/fetcher.py)
+    fetch_config = fetch_config or {}
 
     # -------------------------------
     # 1) IMPORT S&P500
     # -------------------------------
     print("[ETL] Étape 1/14 – Import de la liste S&P500 (Wikipedia)")
+    telemetry.step("etl.01_sp500_import")
     try:
         url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
         tables = pd.read_html(url)
@@ -51,19 +64,15 @@ def run_pipeline_etl():
     # 2) Extraction des données fondamentales.
     # ----------------------------------------
     print("[ETL] Étape 2/14 – Préparation initiale du DataFrame (renommage, préfixes) S&P500 ")
+    telemetry.step("etl.02_sp500_prepare")
 
-    def get_features(ticker):
+    def get_features(ticker, info):
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="6mo", interval="1d")
-            if hist.shape[0] < 50:
+            if not prices.has_min_history(ticker, 50):
                 return None, "Pas assez d'historique"
 
-            returns = hist['Close'].pct_change().dropna()
-            return_6m = hist['Close'].iloc[-1] / hist['Close'].iloc[0] - 1
-            volatility = returns.std()
+            return_6m, volatility = prices.returns_and_volatility(ticker)
 
-            info = stock.info
             if not info or 'trailingPE' not in info:
                 return None, "Fondamentaux clés manquants"
 
@@ -89,19 +98,24 @@ def run_pipeline_etl():
 
     # Extraction principale
     tickers = df_sp500['Ticker'].tolist()
+    prices.prefetch(tickers)
+    infos, info_errors = fetch_infos(
+        [t for t in tickers if prices.has_min_history(t, 50)], desc="Fondamentaux S&P500", **fetch_config
+    )
     data = []
     error_log = []
 
-    for i, ticker in enumerate(tickers):
-        print(f"[{i+1}/{len(tickers)}] - {ticker}")
-        result, error = get_features(ticker)
+    for ticker in tickers:
+        if ticker in info_errors:
+            error_log.append({'Ticker': ticker, 'MissingFields': info_errors[ticker]})
+            continue
+        result, error = get_features(ticker, infos.get(ticker))
         if result:
             data.append(result)
             if error:
                 error_log.append({'Ticker': ticker, 'MissingFields': error})
         else:
             error_log.append({'Ticker': ticker, 'MissingFields': error})
-        sleep(0.5)
 
     df_features = pd.DataFrame(data)
     df_missing = pd.DataFrame(error_log)
@@ -112,6 +126,7 @@ def run_pipeline_etl():
     # 3) Réintégration manuelle des tickers manquants
     # ----------------------------------------------------------
     print("[ETL] Étape 3/14 – Extraction des données fondamentales (boucle sur les tickers S&P500)")
+    telemetry.step("etl.03_sp500_fundamentals")
 
     tickers_missing = [
         "ABBV","ABT","ACGL","ALB","AOS","AZO","BA","BAX","BKNG","BLK","BSX","BXP","CAG",
@@ -126,16 +141,20 @@ def run_pipeline_etl():
     final_rows = []
     missing_fields_report = []
 
-    for i, t in enumerate(tickers_missing):
+    prices.prefetch(tickers_missing)
+    infos, info_errors = fetch_infos(
+        [t for t in tickers_missing if prices.has_min_history(t, 50)], desc="Réintégration S&P500", **fetch_config
+    )
+
+    for t in tickers_missing:
         try:
-            stock = yf.Ticker(t)
-            info = stock.info
-            hist = stock.history(period="6mo", interval="1d")
-            if hist.shape[0] < 50:
+            if not prices.has_min_history(t, 50):
                 continue
+            if t in info_errors:
+                raise RuntimeError(info_errors[t])
 
-            return_6m = hist['Close'].iloc[-1] / hist['Close'].iloc[0] - 1
-            volatility = hist['Close'].pct_change().std()
+            info = infos[t]
+            return_6m, volatility = prices.returns_and_volatility(t)
 
             row = {
                 'Ticker': t,
@@ -161,7 +180,6 @@ def run_pipeline_etl():
 
         except Exception as e:
             missing_fields_report.append({'Ticker': t, 'MissingFields': str(e)})
-        sleep(1)
 
     df_reintegrated = pd.DataFrame(final_rows)
     df_reintegrated = df_reintegrated.merge(df_sp500, on="Ticker", how="left")
@@ -172,6 +190,7 @@ def run_pipeline_etl():
     # 4) Nettoyage et traitement
     # -------------------------------
     print("[ETL] Étape 4/14 – Construction du DataFrame df_fundamentals S&P500")
+    telemetry.step("etl.04_sp500_dataframe")
 
     for col in ['ROE', 'PE', 'EV_Revenue']:
         if col in df_final.columns:
@@ -186,38 +205,8 @@ def run_pipeline_etl():
     # 5) Indicateurs techniques
     # -------------------------------
     print("[ETL] Étape 5/14 – Nettoyage des fondamentaux (suppression NaN et doublons) S&P500")
-    df_tech = []
-    for i, ticker in enumerate(df_final['Ticker']):
-        try:
-            print(f"[{i+1}/{len(df_final)}] - {ticker}")
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="6mo", interval="1d")
-            if len(hist) < 50:
-                continue
-
-            hist = hist.dropna()
-            hist['RSI'] = ta.momentum.RSIIndicator(hist['Close'], window=14).rsi()
-            hist['SMA_20'] = ta.trend.SMAIndicator(hist['Close'], window=20).sma_indicator()
-            hist['SMA_50'] = ta.trend.SMAIndicator(hist['Close'], window=50).sma_indicator()
-            hist['MACD'] = ta.trend.MACD(hist['Close']).macd()
-            hist['MOM_10'] = ta.momentum.ROCIndicator(hist['Close'], window=10).roc()
-            bb = ta.volatility.BollingerBands(hist['Close'])
-            hist['BB_PCT'] = (hist['Close'] - bb.bollinger_lband()) / (bb.bollinger_hband() - bb.bollinger_lband())
-
-            row = {
-                'Ticker': ticker,
-                'RSI_14': hist['RSI'].iloc[-1],
-                'SMA20_above_SMA50': int(hist['SMA_20'].iloc[-1] > hist['SMA_50'].iloc[-1]),
-                'MACD': hist['MACD'].iloc[-1],
-                'Momentum_10': hist['MOM_10'].iloc[-1],
-                'BB_Percent': hist['BB_PCT'].iloc[-1]
-            }
-            df_tech.append(row)
-        except Exception as e:
-            print(f"Erreur indicateurs {ticker}: {e}")
-        sleep(0.5)
-
-    df_tech_indicators = pd.DataFrame(df_tech)
+    telemetry.step("etl.05_sp500_technicals")
+    df_tech_indicators = latest_indicators(prices.close_matrix(df_final['Ticker'], min_days=50))
     df_final = df_final.merge(df_tech_indicators, on="Ticker", how="left")
 
     print(f" Fusion réussie. df_final = {df_final.shape}")
@@ -228,6 +217,7 @@ def run_pipeline_etl():
     # 6) Secteurs
     # -------------------------------
     print("[ETL] Étape 6/14 – Ajout des métadonnées sociétés CAC40 (secteur, nom, etc.)")
+    telemetry.step("etl.06_cac40_metadata")
 
     if "Sector" not in df_final.columns:
      raise ValueError(" La colonne 'Sector' est absente de df_final.")
@@ -250,14 +240,17 @@ def run_pipeline_etl():
     ]
 
     print("[ETL] Étape 7/14 – Ajout des données fondamentales cac40")
+    telemetry.step("etl.07_cac40_fundamentals")
     # 7. Données fondamentales
     fundamental_data = []
 
-    for i, ticker in enumerate(tickers_cac40):
-        print(f"[{i+1}/{len(tickers_cac40)}] - {ticker}")
+    infos, info_errors = fetch_infos(tickers_cac40, desc="Fondamentaux CAC40", **fetch_config)
+
+    for ticker in tickers_cac40:
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            if ticker in info_errors:
+                raise RuntimeError(info_errors[ticker])
+            info = infos[ticker]
             row = {
                 'Ticker': ticker,
                 'PE': info.get('trailingPE'),
@@ -272,46 +265,18 @@ def run_pipeline_etl():
             fundamental_data.append(row)
         except Exception as e:
             print(f"Erreur pour {ticker} : {e}")
-        sleep(1)
 
     df_fundamentaux = pd.DataFrame(fundamental_data)
     print("[ETL] Étape8/14 – Ajout des données techniques Cac40")
+    telemetry.step("etl.08_cac40_technicals")
     # 8. Données techniques
-    technical_data = []
-
-    for i, ticker in enumerate(tickers_cac40):
-        print(f"Calcul technique [{i+1}/{len(tickers_cac40)}] - {ticker}")
-        try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="6mo", interval="1d")
-            if len(hist) < 50:
-                continue
-            hist = hist.dropna()
-            hist['RSI'] = ta.momentum.RSIIndicator(hist['Close'], window=14).rsi()
-            hist['SMA_20'] = ta.trend.SMAIndicator(hist['Close'], window=20).sma_indicator()
-            hist['SMA_50'] = ta.trend.SMAIndicator(hist['Close'], window=50).sma_indicator()
-            hist['MACD'] = ta.trend.MACD(hist['Close']).macd()
-            hist['Momentum_10'] = ta.momentum.ROCIndicator(hist['Close'], window=10).roc()
-            bb = ta.volatility.BollingerBands(hist['Close'])
-            hist['BB_PCT'] = (hist['Close'] - bb.bollinger_lband()) / (bb.bollinger_hband() - bb.bollinger_lband())
-
-            technical_data.append({
-                'Ticker': ticker,
-                'RSI_14': hist['RSI'].iloc[-1],
-                'SMA20_above_SMA50': int(hist['SMA_20'].iloc[-1] > hist['SMA_50'].iloc[-1]),
-                'MACD': hist['MACD'].iloc[-1],
-                'Momentum_10': hist['Momentum_10'].iloc[-1],
-                'BB_Percent': hist['BB_PCT'].iloc[-1]
-            })
-
-        except Exception as e:
-            print(f"Erreur technique pour {ticker}: {e}")
-        sleep(0.5)
-
-    df_techniques = pd.DataFrame(technical_data)
+    prices.prefetch(tickers_cac40)
+    df_techniques = latest_indicators(prices.close_matrix(tickers_cac40, min_days=50))
+    print(f"Indicateurs techniques calculés pour {len(df_techniques)}/{len(tickers_cac40)} tickers")
 
     # 9. Merge fondamentaux + techniques
     print("[ETL] Étape 9/14 – Merge fondamentaux + techniques cac40)")
+    telemetry.step("etl.09_cac40_merge")
     df_cac40_full = pd.merge(df_fundamentaux, df_techniques, on="Ticker", how="outer")
     df_cac40_full['IndexSource'] = 'CAC40'
 
@@ -322,12 +287,9 @@ def run_pipeline_etl():
     for i, row in df_cac40_full.iterrows():
         ticker = row['Ticker']
         try:
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period="6mo", interval="1d")
-            if len(hist) < 50:
+            if not prices.has_min_history(ticker, 50):
                 continue
-            return_6m = hist['Close'].iloc[-1] / hist['Close'].iloc[0] - 1
-            volatility = hist['Close'].pct_change().std()
+            return_6m, volatility = prices.returns_and_volatility(ticker)
             returns_data_cac.append({
                 'Ticker': ticker,
                 'Return_6M': return_6m,
@@ -348,6 +310,7 @@ def run_pipeline_etl():
 
     # 6. Mapping secteurs
     print("[ETL] Étape 10/14 – Secteurs cac40)")
+    telemetry.step("etl.10_cac40_sectors")
     secteurs_cac40 = {
         "ACA.PA": "Financials", "AI.PA": "Industrials", "AIR.PA": "Industrials",
         "ALO.PA": "Information Technology", "ORA.PA": "Communication Services", "CS.PA": "Industrials",
@@ -370,9 +333,7 @@ def run_pipeline_etl():
         tickers_invalides = []
         for ticker in df[ticker_column]:
             try:
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="6mo", interval="1d")
-                if len(hist) < min_days:
+                if not prices.has_min_history(ticker, min_days):
                     tickers_invalides.append(ticker)
             except Exception:
                 tickers_invalides.append(ticker)
@@ -383,6 +344,7 @@ def run_pipeline_etl():
         return df_clean, tickers_invalides
 
     print("[ETL] Étape 11/14 – Nettoyage cac40)")
+    telemetry.step("etl.11_cac40_clean")
     # 11. Suppression tickers invalides si nécessaire
     df_cac40_full, tickers_invalides = remove_invalid_tickers(df_cac40_full, ticker_column='Ticker', min_days=50)
 
@@ -395,6 +357,7 @@ def run_pipeline_etl():
     # 12) Nikkei 225 - Import
     # ------------------------------
     print("[ETL] Étape 12/14 – Import Nikkei225)")
+    telemetry.step("etl.12_nikkei225")
     def import_nikkei225_data(df_final, min_hist_days=50):
 
         # Étape 1 - Scraper les tickers du Nikkei 225
@@ -440,14 +403,16 @@ def run_pipeline_etl():
         df_nikkei = pd.DataFrame(df_rows).drop_duplicates().reset_index(drop=True)
         print(f"{len(df_nikkei)} entreprises extraites avec tickers depuis le Nikkei 225")
 
+        prices.prefetch(df_nikkei['Ticker'].tolist())
+
         # Étape 2 - Données fondamentales
         fundamentals = []
-        for i, row in df_nikkei.iterrows():
-            ticker = row['Ticker']
+        infos, info_errors = fetch_infos(df_nikkei['Ticker'].tolist(), desc="Fondamentaux Nikkei225", **fetch_config)
+        for ticker in df_nikkei['Ticker']:
             try:
-                print(f"[{i+1}/{len(df_nikkei)}] - Fondamentaux : {ticker}")
-                stock = yf.Ticker(ticker)
-                info = stock.info
+                if ticker in info_errors:
+                    raise RuntimeError(info_errors[ticker])
+                info = infos[ticker]
 
                 fundamentals.append({
                     'Ticker': ticker,
@@ -462,45 +427,12 @@ def run_pipeline_etl():
                 })
             except Exception as e:
                 print(f"Erreur fondamentaux pour {ticker} : {e}")
-            sleep(0.3)
 
         df_funda_japan = pd.DataFrame(fundamentals)
 
         # Étape 3 - Indicateurs techniques
-        tech_indicators = []
-        for i, ticker in enumerate(df_nikkei['Ticker']):
-            try:
-                print(f"[{i+1}/{len(df_nikkei)}] - Techniques : {ticker}")
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="6mo", interval="1d")
-
-                if len(hist) < min_hist_days:
-                    continue
-
-                hist = hist.dropna()
-                rsi = ta.momentum.RSIIndicator(hist['Close'], window=14).rsi().iloc[-1]
-                sma20 = ta.trend.SMAIndicator(hist['Close'], window=20).sma_indicator().iloc[-1]
-                sma50 = ta.trend.SMAIndicator(hist['Close'], window=50).sma_indicator().iloc[-1]
-                macd = ta.trend.MACD(hist['Close']).macd().iloc[-1]
-                momentum = ta.momentum.ROCIndicator(hist['Close'], window=10).roc().iloc[-1]
-                bb = ta.volatility.BollingerBands(hist['Close'])
-                bb_pct = (hist['Close'].iloc[-1] - bb.bollinger_lband().iloc[-1]) / (
-                    bb.bollinger_hband().iloc[-1] - bb.bollinger_lband().iloc[-1])
-
-                tech_indicators.append({
-                    'Ticker': ticker,
-                    'RSI_14': rsi,
-                    'SMA20_above_SMA50': int(sma20 > sma50),
-                    'MACD': macd,
-                    'Momentum_10': momentum,
-                    'BB_Percent': bb_pct
-                })
-
-            except Exception as e:
-                print(f"Erreur technique pour {ticker} : {e}")
-            sleep(0.3)
-
-        df_tech_japan = pd.DataFrame(tech_indicators)
+        df_tech_japan = latest_indicators(prices.close_matrix(df_nikkei['Ticker'], min_days=min_hist_days))
+        print(f"Indicateurs techniques calculés pour {len(df_tech_japan)}/{len(df_nikkei)} tickers")
 
         # Étape 4 - Return & volatility data
 
@@ -509,14 +441,10 @@ def run_pipeline_etl():
         for i, ticker in enumerate(df_nikkei['Ticker']):
             try:
                 print(f"[{i+1}/{len(df_nikkei)}] - Return & Volatility : {ticker}")
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period="6mo", interval="1d")
-
-                if len(hist) < min_hist_days:
+                if not prices.has_min_history(ticker, min_hist_days):
                     continue
 
-                return_6m = hist['Close'].iloc[-1] / hist['Close'].iloc[0] - 1
-                volatility = hist['Close'].pct_change().std()
+                return_6m, volatility = prices.returns_and_volatility(ticker)
 
                 returns_data.append({
                     'Ticker': ticker,
@@ -525,7 +453,6 @@ def run_pipeline_etl():
                 })
             except Exception as e:
                 print(f"Erreur Return/Volatility pour {ticker} : {e}")
-            sleep(0.3)
 
         df_returns_japan = pd.DataFrame(returns_data)
 
@@ -551,6 +478,7 @@ def run_pipeline_etl():
 
 
     print("[ETL] Étape 13/14 – Nettoyge final)")
+    telemetry.step("etl.13_final_cleanup")
     # --------------------
     # 14) NETTOYAGE FINAL
     # --------------------
@@ -571,13 +499,13 @@ def run_pipeline_etl():
 
     # 3 Boucle pour aller chercher 'shortName' depuis yfinance
     company_names = []
+    infos, info_errors = fetch_infos(df_missing_company['Ticker'].tolist(), desc="Noms CAC40", **fetch_config)
 
-    for i, row in df_missing_company.iterrows():
-        ticker = row['Ticker']
+    for ticker in df_missing_company['Ticker']:
         try:
-            print(f" [{i+1}] Récupération du nom pour {ticker}")
-            stock = yf.Ticker(ticker)
-            name = stock.info.get("shortName", None)
+            if ticker in info_errors:
+                raise RuntimeError(info_errors[ticker])
+            name = infos[ticker].get("shortName", None)
             company_names.append({'Ticker': ticker, 'Company': name})
         except Exception as e:
             print(f" Erreur pour {ticker}: {e}")
@@ -720,14 +648,15 @@ def run_pipeline_etl():
     # Vérification finale
     print(f"✅ Colonne 'Prefix4' supprimée (si existait) et 'ExtractionDate' ajoutée : {today_str}")
 
-    BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    DATA_DIR = os.path.join(BASE_DIR, "data")
-
-    os.makedirs(DATA_DIR, exist_ok=True)
-    df_final.to_csv(os.path.join(DATA_DIR, "df_final.csv"), index=False)
+    write_table("df_final", df_final, data_dir=DATA_DIR)
 
-    print("✅ Données stockées dans le fichier df_final.csv dans /data/")
+    print("✅ Données stockées dans la table df_final.parquet dans /data/")
+    report_info_cache()
     print("[ETL] Étape 14/14 – Extraction terminée.")
+    telemetry.end_step()
 
 if __name__ == "__main__":
-    run_pipeline_etl()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    add_fetch_arguments(parser)
+    args = parser.parse_args()
+    run_pipeline_etl(fetch_config=fetch_config_from_args(args))
\ No newline at end of file
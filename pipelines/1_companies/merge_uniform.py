@@ -1,20 +1,25 @@
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from tqdm import tqdm
 from datetime import datetime
 import os
+import sys
+import argparse
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 os.makedirs(DATA_DIR, exist_ok=True)
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.fetcher import fetch_infos, add_fetch_arguments, fetch_config_from_args, report_info_cache
+from pipelines.common import telemetry
+from pipelines.common.table_store import read_table, write_table
 
 ### --- 1. Enrichir df_final avec ratios manquants --- ###
-def fetch_missing_ratios(tickers):
+def fetch_missing_ratios(tickers, fetch_config=None):
     data = []
-    for ticker in tqdm(tickers, desc="🔢 Fetching ratios"):
+    infos, _ = fetch_infos(tickers, desc="🔢 Fetching ratios", **(fetch_config or {}))
+    for ticker in tickers:
         try:
-            info = yf.Ticker(ticker).info
+            info = infos[ticker]
             ev = info.get("enterpriseValue")
             ebitda = info.get("ebitda")
             fcf = info.get("freeCashflow")
@@ -32,12 +37,13 @@ def fetch_missing_ratios(tickers):
     return pd.DataFrame(data)
 
 ### --- 2. Ajouter Company et ExtractionDate aux tickers alternatifs --- ###
-def enrich_company_and_date(df, ticker_col="Ticker"):
+def enrich_company_and_date(df, ticker_col="Ticker", fetch_config=None):
     tickers = df[ticker_col].dropna().unique().tolist()
     names = []
-    for ticker in tqdm(tickers, desc="🏷️ Fetching company names"):
+    infos, _ = fetch_infos(tickers, desc="🏷️ Fetching company names", **(fetch_config or {}))
+    for ticker in tickers:
         try:
-            info = yf.Ticker(ticker).info
+            info = infos[ticker]
             name = info.get("shortName", np.nan)
             names.append((ticker, name))
         except:
@@ -48,26 +54,25 @@ def enrich_company_and_date(df, ticker_col="Ticker"):
     return df
 
 ### --- 3. Merge final des deux jeux --- ###
-def merge_final_and_enriched():
-    path_final = os.path.join(DATA_DIR, "df_final.csv")
-    path_enriched = os.path.join(DATA_DIR, "df_final_enriched.csv")
-    output_path = os.path.join(DATA_DIR, "df_final_merged.csv")
-
-    df_final = pd.read_csv(path_final)
-    df_enriched = pd.read_csv(path_enriched)
+def merge_final_and_enriched(fetch_config=None):
+    df_final = read_table("df_final", data_dir=DATA_DIR)
+    df_enriched = read_table("df_final_enriched", data_dir=DATA_DIR)
 
     df_final['Ticker'] = df_final['Ticker'].astype(str).str.upper().str.strip()
     df_enriched['Ticker'] = df_enriched['Ticker'].astype(str).str.upper().str.strip()
 
     # Étape 1 : enrichir df_final avec les ratios manquants
-    enrichment_df = fetch_missing_ratios(df_final['Ticker'].unique().tolist())
+    telemetry.step("merge_uniform.missing_ratios")
+    enrichment_df = fetch_missing_ratios(df_final['Ticker'].unique().tolist(), fetch_config)
     df_final = df_final.merge(enrichment_df, on="Ticker", how="left")
 
     # Étape 2 : enrichir df_enriched avec Company et ExtractionDate
+    telemetry.step("merge_uniform.company_and_date")
     if "Company" not in df_enriched.columns or "ExtractionDate" not in df_enriched.columns:
-        df_enriched = enrich_company_and_date(df_enriched)
+        df_enriched = enrich_company_and_date(df_enriched, fetch_config=fetch_config)
 
     # Étape 3 : harmoniser les colonnes
+    telemetry.step("merge_uniform.merge")
     if "IndexSource" not in df_final.columns:
         df_final["IndexSource"] = "SP500_CAC_NIKKEI"
     all_columns = list(set(df_enriched.columns).union(df_final.columns))
@@ -84,9 +89,14 @@ def merge_final_and_enriched():
     df_merged.drop_duplicates(subset="Ticker", inplace=True)
     df_merged.reset_index(drop=True, inplace=True)
 
-    df_merged.to_csv(output_path, index=False)
+    output_path = write_table("df_final_merged", df_merged, data_dir=DATA_DIR)
     print(f"✅ Fusion réussie : {len(df_merged)} tickers sauvegardés dans {output_path}")
+    telemetry.end_step()
 
 ### --- Lancement principal --- ###
 if __name__ == "__main__":
-    merge_final_and_enriched()
+    parser = argparse.ArgumentParser()
+    add_fetch_arguments(parser)
+    args = parser.parse_args()
+    merge_final_and_enriched(fetch_config=fetch_config_from_args(args))
+    report_info_cache()
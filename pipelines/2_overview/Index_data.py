@@ -1,5 +1,7 @@
 import os
+import sys
 import json
+import time
 import requests
 from datetime import datetime
 from pathlib import Path
@@ -16,6 +18,8 @@ TWELVE_DATA_API_KEY = os.getenv("TWELVE_DATA_API_KEY")
 BASE_DIR = Path(__file__).resolve().parents[2]
 OVERVIEW_FOLDER = BASE_DIR / "data" / "overview"
 OVERVIEW_FOLDER.mkdir(parents=True, exist_ok=True)
+sys.path.insert(0, str(BASE_DIR))
+from pipelines.common import telemetry
 
 # Symboles à traiter
 INDICES = {
@@ -35,6 +39,8 @@ def fetch_from_alpha_vantage(symbol):
         "apikey": ALPHA_VANTAGE_API_KEY,
     }
     response = requests.get(url, params=params)
+    telemetry.count("network_calls")
+    telemetry.count("bytes", len(response.content))
     data = response.json()
     if "Time Series (Daily)" in data:
         return {
@@ -55,6 +61,8 @@ def fetch_from_twelve_data(symbol):
         "apikey": TWELVE_DATA_API_KEY,
     }
     response = requests.get(url, params=params)
+    telemetry.count("network_calls")
+    telemetry.count("bytes", len(response.content))
     data = response.json()
     if "values" in data:
         return {
@@ -97,7 +105,9 @@ def save_to_json(name, result):
 
 # 🔁 Pipeline principal
 def update_all_index_data():
+    telemetry.step("index_data.fetch", total=len(INDICES))
     for name, symbol in INDICES.items():
+        started = time.monotonic()
         try:
             print(f"\n🔎 Traitement : {symbol}")
             try:
@@ -106,8 +116,11 @@ def update_all_index_data():
                 print(f"⚠️ Alpha Vantage failed: {e_alpha}")
                 result = fetch_from_twelve_data(symbol)
             save_to_json(name, result)
+            telemetry.item(symbol, time.monotonic() - started)
         except Exception as e:
             print(f"❌ Erreur {symbol} : {e}")
+            telemetry.item(symbol, time.monotonic() - started, ok=False)
+    telemetry.end_step()
 
 # ▶️ Exécution
 if __name__ == "__main__":
@@ -1,20 +1,23 @@
 import os
+import sys
 import json
+import time
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # 📁 Chemins
 BASE_DIR = Path(__file__).resolve().parents[2]  
 DATA_FOLDER = BASE_DIR / "data" / "overview"
 SUMMARY_FILE = DATA_FOLDER / "headline_summary.json"
 os.makedirs(DATA_FOLDER, exist_ok=True)
+sys.path.insert(0, str(BASE_DIR))
+from pipelines.common import telemetry
+from pipelines.common.llm_client import LLMClient
 
 # 🔐 Clé API
 load_dotenv(dotenv_path=BASE_DIR / ".env")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+llm = LLMClient(model="gpt-3.5-turbo")
 
 def load_json(filename):
     path = DATA_FOLDER / filename
@@ -83,16 +86,17 @@ def build_prompt():
 def generate_summary():
     prompt = build_prompt()
     print("⏳ Appel à GPT-3.5 pour génération du résumé...")
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
+    started = time.monotonic()
+    summary = llm.complete_sync(
+        [
             {"role": "system", "content": "Tu es un analyste financier expert. Réponds uniquement en français."},
             {"role": "user", "content": prompt}
         ],
         temperature=0.7,
         max_tokens=350
     )
-    return response.choices[0].message.content.strip()
+    telemetry.item("headline_summary", time.monotonic() - started)
+    return summary.strip()
 
 def save_summary(text):
     with open(SUMMARY_FILE, "w", encoding="utf-8") as f:
@@ -103,11 +107,13 @@ def save_summary(text):
     print(f"✅ Résumé sauvegardé dans {SUMMARY_FILE.name}")
 
 def main():
+    telemetry.step("overview_full.summary")
     try:
         summary = generate_summary()
         save_summary(summary)
     except Exception as e:
         print(f"❌ Erreur génération résumé : {e}")
+    llm.report()
 
 if __name__ == "__main__":
     main()
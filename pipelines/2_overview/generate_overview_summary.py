@@ -1,19 +1,20 @@
 import os
+import sys
 import json
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # 🔧 Chemins
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 OVERVIEW_FOLDER = Path(BASE_DIR) / "data" / "overview"
 OVERVIEW_FOLDER.mkdir(parents=True, exist_ok=True)
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.llm_client import LLMClient
 
 # 🔐 Clé API
 load_dotenv(dotenv_path=os.path.join(BASE_DIR, ".env"))
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
+llm = LLMClient(model="gpt-3.5-turbo")
 
 SUMMARY_FILE = OVERVIEW_FOLDER / "summary.json"
 
@@ -80,16 +81,15 @@ def build_prompt():
 def generate_summary():
     prompt = build_prompt()
     print("⏳ Appel à GPT-3.5 pour génération du résumé...")
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
+    summary = llm.complete_sync(
+        [
             {"role": "system", "content": "Tu es un analyste financier expert. Réponds uniquement en français."},
             {"role": "user", "content": prompt}
         ],
         temperature=0.7,
         max_tokens=350
     )
-    return response.choices[0].message.content.strip()
+    return summary.strip()
 
 # 🔹 Sauvegarde
 def save_summary(text):
@@ -107,6 +107,7 @@ def main():
         save_summary(summary)
     except Exception as e:
         print(f"❌ Erreur génération résumé : {e}")
+    llm.report()
 
 if __name__ == "__main__":
     main()
@@ -1,26 +1,39 @@
 import os
+import sys
 import json
-import time
-import random
+import argparse
 import pandas as pd
-import yfinance as yf
 from tqdm import tqdm
 
 # 📁 Répertoires
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(BASE_DIR, "data")
-OUTPUT_DIR = os.path.join(BASE_DIR, "output", "insights_enriched_all")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.fetcher import fetch_infos, add_fetch_arguments, fetch_config_from_args, report_info_cache
+from pipelines.common import telemetry
+from pipelines.common.table_store import read_table
+from pipelines.common.insights_store import InsightsStore
 
-# 📄 Chargement complet
-df = pd.read_csv(os.path.join(DATA_DIR, "df_final_merged.csv"))
+# ⚙️ Options de fetch (workers, débit, retries, timeout)
+parser = argparse.ArgumentParser()
+add_fetch_arguments(parser)
+args = parser.parse_args()
+
+# 📄 Chargement complet (valeurs manquantes → None pour la sérialisation JSON)
+df = read_table("df_final_merged", data_dir=DATA_DIR)
+df = df.astype(object).where(df.notna(), None)
 tickers = df["Ticker"].dropna().unique()
 
+# 📥 Premier run avec le store : reprise des fiches JSON existantes (une seule fois)
+with InsightsStore() as store:
+    migrated = store.migrate_json()
+if migrated:
+    print(f"📥 {migrated} fiches JSON existantes importées dans le store")
+
 # 🔧 Fonction d'enrichissement
 
-def get_company_enriched_data(ticker, row):
+def get_company_enriched_data(ticker, row, info):
     try:
-        info = yf.Ticker(ticker).info
 
         def get_with_fallback(field, yfinance_key=None):
             value = row.get(field)
@@ -86,30 +99,43 @@ def get_company_enriched_data(ticker, row):
         print(f"[ERROR enrich] {ticker} → {e}")
         return None
 
-# 🚀 Génération des JSON
+# 🌐 Ticker.info en parallèle (limité en débit, retries sur 429/5xx)
+telemetry.step("enrich_companies.info", total=len(tickers))
+infos, info_errors = fetch_infos(tickers, desc="Ticker.info", **fetch_config_from_args(args))
+
+# 🚀 Génération des fiches (écrites d'un coup dans le store, une transaction)
+telemetry.step("enrich_companies.store", total=len(df))
 errors = []
+documents = {}
 for _, row in tqdm(df.iterrows(), total=len(df), desc="Enrichissement global"):
     ticker = row["Ticker"]
-    data = get_company_enriched_data(ticker, row)
+    if ticker in info_errors:
+        print(f"[ERROR enrich] {ticker} → {info_errors[ticker]}")
+        errors.append(ticker)
+        continue
+
+    data = get_company_enriched_data(ticker, row, infos.get(ticker, {}))
 
     if data:
-        output_path = os.path.join(OUTPUT_DIR, f"{ticker}.json")
-        try:
-            with open(output_path, "w") as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"❌ Erreur écriture {ticker} → {e}")
-            errors.append(ticker)
+        documents[ticker] = data
     else:
         errors.append(ticker)
 
-    # 💤 Anti-blocage API
-    time.sleep(random.uniform(0.6, 1.1))
+try:
+    with InsightsStore() as store:
+        store.put_documents(documents)
+except Exception as e:
+    print(f"❌ Erreur écriture du store → {e}")
+    errors.extend(documents)
+    documents = {}
 
 # 📊 Résumé
-print(f"\n✅ {len(df) - len(errors)} fichiers générés.")
+print(f"\n✅ {len(documents)} fiches générées.")
 if errors:
     print(f"❌ {len(errors)} erreurs (exemples : {errors[:5]})")
 
 with open("errors_to_retry.json", "w") as f:
     json.dump(errors, f)
+
+telemetry.end_step()
+report_info_cache()
@@ -1,14 +1,19 @@
 import os
-import json
+import sys
+import time
+import argparse
 import yfinance as yf
 import pandas as pd
 from tqdm import tqdm
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-DIR_JSON = os.path.join(BASE_DIR, "output", "insights_enriched_all")
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.fetcher import fetch_infos, add_fetch_arguments, fetch_config_from_args, report_info_cache
+from pipelines.common import telemetry
+from pipelines.common.insights_store import InsightsStore
 
 
-def enrich_visual_data(ticker):
+def enrich_visual_data(ticker, info):
     try:
         stock = yf.Ticker(ticker)
         hist = stock.history(period="6mo", interval="1d", auto_adjust=False)
@@ -25,7 +30,6 @@ def enrich_visual_data(ticker):
             for idx, close in hist["Close"].items()
         ]
 
-        info = stock.info
         price = info.get("regularMarketPrice")
         previous_close = info.get("previousClose")
 
@@ -49,29 +53,41 @@ def enrich_visual_data(ticker):
         return None
 
 
-def main():
-    for filename in tqdm(os.listdir(DIR_JSON), desc="Enrichissement visual_data (180j)"):
-        if not filename.endswith(".json"):
-            continue
-
-        ticker = filename.replace(".json", "")
-        filepath = os.path.join(DIR_JSON, filename)
+def main(fetch_config=None):
+    store = InsightsStore()
+    tickers = store.tickers()
+    telemetry.step("refine_companies.info", total=len(tickers))
+    infos, info_errors = fetch_infos(tickers, desc="Ticker.info", **(fetch_config or {}))
 
+    telemetry.step("refine_companies.visual_data", total=len(tickers))
+    sections = []
+    for ticker in tqdm(tickers, desc="Enrichissement visual_data (180j)"):
         try:
-            with open(filepath, "r") as f:
-                data = json.load(f)
+            if ticker in info_errors:
+                print(f"⚠️ Erreur enrichissement {ticker} : {info_errors[ticker]}")
+                continue
 
-            visual_data = enrich_visual_data(ticker)
+            started = time.monotonic()
+            telemetry.count("network_calls")
+            visual_data = enrich_visual_data(ticker, infos[ticker])
+            telemetry.item(ticker, time.monotonic() - started, ok=visual_data is not None)
             if not visual_data:
                 continue
 
-            data["visual_data"] = visual_data
-
-            with open(filepath, "w") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            sections.append((ticker, "visual_data", visual_data))
 
         except Exception as e:
             print(f"❌ Erreur sur {ticker} → {e}")
 
+    # 💾 Seule la section visual_data est réécrite, en une transaction
+    store.upsert_sections(sections)
+    store.close()
+    print(f"✅ visual_data mis à jour pour {len(sections)} tickers")
+    telemetry.end_step()
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    add_fetch_arguments(parser)
+    args = parser.parse_args()
+    main(fetch_config=fetch_config_from_args(args))
+    report_info_cache()
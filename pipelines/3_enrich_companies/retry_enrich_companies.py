@@ -1,18 +1,24 @@
 import os
+import sys
 import json
-import time
-import random
+import argparse
 import pandas as pd
-import yfinance as yf
 from tqdm import tqdm
 
 #  Répertoires (toujours depuis la racine du projet)
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(BASE_DIR, "data")
-OUTPUT_DIR = os.path.join(BASE_DIR, "output", "insights_enriched_all")
 ERROR_FILE = os.path.join(BASE_DIR, "errors_to_retry.json")
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.fetcher import fetch_infos, add_fetch_arguments, fetch_config_from_args, report_info_cache
+from pipelines.common.table_store import read_table
+from pipelines.common.insights_store import InsightsStore
+
+# ⚙️ Options de fetch (workers, débit, retries, timeout, cache)
+parser = argparse.ArgumentParser()
+add_fetch_arguments(parser)
+args = parser.parse_args()
 
 #  Charger les tickers en erreur
 try:
@@ -24,19 +30,13 @@ except Exception as e:
     tickers_failed = []
 
 #  Chargement des données sources
-df = pd.read_csv(os.path.join(DATA_DIR, "df_final_merged.csv"))
+df = read_table("df_final_merged", data_dir=DATA_DIR)
 df = df[df["Ticker"].isin(tickers_failed)]
+df = df.astype(object).where(df.notna(), None)
 
 #  Fonction d'enrichissement
-def get_company_enriched_data(ticker, row):
+def get_company_enriched_data(ticker, row, info):
     try:
-        ticker_obj = yf.Ticker(ticker)
-        try:
-            info = ticker_obj.info
-        except Exception as e:
-            print(f"[WARNING] {ticker}: info inaccessible → {e}")
-            info = {}
-
         return {
             "ticker": ticker,
             "name": row.get("Company") or info.get("longName", ticker),
@@ -96,28 +96,36 @@ def get_company_enriched_data(ticker, row):
         return None
 
 # Retry enrichissement
+store = InsightsStore()
+already_enriched = set(store.tickers())
+to_retry = [t for t in df["Ticker"] if t not in already_enriched]
+infos, info_errors = fetch_infos(to_retry, desc="🔁 Ticker.info", **fetch_config_from_args(args))
+
 errors_still_failing = []
+documents = {}
 for _, row in tqdm(df.iterrows(), total=len(df), desc="🔁 Retry enrich"):
     ticker = row["Ticker"]
-    output_path = os.path.join(OUTPUT_DIR, f"{ticker}.json")
 
-    if os.path.exists(output_path):
+    if ticker in already_enriched:
         print(f" {ticker} déjà enrichi → skip")
         continue
 
-    data = get_company_enriched_data(ticker, row)
+    if ticker in info_errors:
+        print(f"[WARNING] {ticker}: info inaccessible → {info_errors[ticker]}")
+    data = get_company_enriched_data(ticker, row, infos.get(ticker, {}))
 
     if data:
-        try:
-            with open(output_path, "w") as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Erreur écriture {ticker} → {e}")
-            errors_still_failing.append(ticker)
+        documents[ticker] = data
     else:
         errors_still_failing.append(ticker)
 
-    time.sleep(random.uniform(0.6, 1.1))
+# 💾 Écriture des fiches récupérées en une transaction
+try:
+    store.put_documents(documents)
+except Exception as e:
+    print(f"Erreur écriture du store → {e}")
+    errors_still_failing.extend(documents)
+store.close()
 
 #  Résumé
 print(f"\n {len(df) - len(errors_still_failing)} tickers enrichis avec succès.")
@@ -129,3 +137,5 @@ else:
     print(" Tous les tickers ont été enrichis avec succès.")
     if os.path.exists(ERROR_FILE):
         os.remove(ERROR_FILE)
+
+report_info_cache()
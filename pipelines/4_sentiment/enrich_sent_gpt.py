@@ -1,44 +1,62 @@
 import os
 import re
+import sys
 import json
 import time
 import asyncio
-import feedparser
+import functools
+import argparse
 import urllib.parse
 import pandas as pd
 from tqdm.asyncio import tqdm
-from transformers import pipeline
-from deep_translator import GoogleTranslator
-from aiohttp import ClientTimeout
 from typing import Union, List
-from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
 # 🧪 Chargement du fichier .env à la racine du projet
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 load_dotenv(os.path.join(BASE_DIR, ".env"))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common import telemetry
+from pipelines.common.table_store import read_table, write_table, table_path
+from pipelines.common.finbert_worker import add_finbert_arguments, finbert_config_from_args
+from pipelines.common.finbert_client import open_finbert
+from pipelines.common.memo import get_memo, memo_key, report_memos, add_memo_arguments, memo_config_from_args
+from pipelines.common.rss_fetcher import RssFetcher, add_rss_arguments, rss_config_from_args
+from pipelines.common.stream import Stage, MicroBatcher, run_pipeline
+from pipelines.common.llm_batch import BATCH_TEMPLATE, summarize_batch
+from pipelines.common.checkpoint import CheckpointLog, add_resume_argument
+from pipelines.common.translator import Translator, add_translation_arguments, translation_config_from_args
+from pipelines.common.llm_client import LLMClient, LLMError, add_llm_arguments, llm_config_from_args
 
 # 🔐 Authentification OpenAI
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise RuntimeError("❌ OPENAI_API_KEY introuvable. Vérifie ton fichier .env ou ta variable d’environnement.")
-client = AsyncOpenAI(api_key=api_key)
 
 # 📁 Répertoires
 DATA_DIR = os.path.join(BASE_DIR, "data")
-CSV_PATH = os.path.join(DATA_DIR, "sentiment_news_summary_full.csv")
+SENTIMENT_TABLE = "sentiment_news_summary_full"
 JSON_PATH = os.path.join(DATA_DIR, "news_summaries_full.json")
 
 # 📄 Chargement des tickers
-df = pd.read_csv(os.path.join(DATA_DIR, "df_final_merged.csv"))
+df = read_table("df_final_merged", columns=["Ticker"], data_dir=DATA_DIR)
 tickers = df["Ticker"].dropna().unique().tolist()
 
-# ⚙️ Configuration asynchrone
-SEMAPHORE = asyncio.Semaphore(6)
-TIMEOUT = ClientTimeout(total=60)
+# ⚙️ Configuration asynchrone : concurrence par étape du pipeline (voir main)
+STREAM_DEFAULTS = {
+    "rss_workers": 16,
+    "scoring_workers": 32,
+    "llm_workers": 32,
+    "llm_batch": 1,
+    "llm_batch_wait_ms": 500.0,
+    "translation_workers": 32,
+    "queue_size": 64
+}
+OPENAI_MODEL = "gpt-3.5-turbo"
+SYSTEM_PROMPT = "Tu es un analyste financier professionnel."
 
-# 🤖 Chargement du modèle FinBERT
-finbert = pipeline("sentiment-analysis", model="ProsusAI/finbert", device=-1)
+# 🤖 Client LLM partagé : budgets RPM/TPM, concurrence adaptative, retries (recréé par main)
+llm = LLMClient(model=OPENAI_MODEL)
 
 # 📚 PROMPT LIBRARY
 PROMPT_LIBRARY = {
@@ -77,41 +95,63 @@ Bullet points :
 """
 }
 
-# 🧠 GPT async (nouvelle API)
+# 🧠 GPT async (nouvelle API), mémoïsé par (modèle, gabarit de prompt, texte)
 async def call_openai(task: str, input_text: str) -> str:
-    prompt = PROMPT_LIBRARY[task](input_text)
-    async with SEMAPHORE:
-        try:
-            response = await client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Tu es un analyste financier professionnel."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=400
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"[GPT ERROR] ({task}) → {e}")
-            return ""
+    llm_memo = get_memo("llm")
+    key = memo_key(llm.model, SYSTEM_PROMPT + PROMPT_LIBRARY[task]("{text}"), input_text)
+    cached = llm_memo.get(key)
+    if cached is not None:
+        return cached
 
-# 🌍 Traduction
-def translate(text):
+    prompt = PROMPT_LIBRARY[task](input_text)
     try:
-        return GoogleTranslator(source='auto', target='en').translate(text)
-    except:
-        return text
+        content = (await llm.complete(
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=400
+        )).strip()
+    except LLMError as e:
+        # Retries épuisés ou erreur définitive (clé, requête invalide)
+        print(f"[GPT ERROR] ({task}) → {e}")
+        return ""
+    # Les réponses vides (erreurs) ne sont pas mémorisées
+    if content:
+        llm_memo.set(key, content)
+    return content
+
+# 📦 GPT en mode lot : plusieurs tickers par requête, réponse JSON indexée par ticker
+async def call_openai_batch(prompt: str, n_tickers: int) -> str:
+    try:
+        return await llm.complete(
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=min(4096, 350 * n_tickers),
+            response_format={"type": "json_object"}
+        )
+    except LLMError as e:
+        # Erreur de transport (retries du client épuisés) : pas de découpage du lot
+        print(f"[GPT ERROR] (batch x{n_tickers}) → {e}")
+        raise
+
+async def summarize_headline_batch(items):
+    results = await summarize_batch(call_openai_batch, dict(items))
+    return [results.get(ticker) for ticker, _ in items]
 
 # 🔍 Bullet parsing
 def extract_bullets(text):
     lines = text.strip().split("\n")
     return [re.sub(r"^[-•*]\s*", "", l.strip()) for l in lines if l.strip()]
 
-# 📈 FinBERT
-def analyze_bullets(bullets):
+# 📈 FinBERT (service d'inférence par lots, hors boucle asyncio)
+async def analyze_bullets(finbert, bullets):
     try:
-        results = finbert(bullets)
+        results = await finbert.classify(bullets)
         counts = {"POSITIVE": 0, "NEGATIVE": 0, "NEUTRAL": 0}
         for r in results:
             label = r["label"].upper()
@@ -121,61 +161,97 @@ def analyze_bullets(bullets):
     except:
         return {"POSITIVE": 0, "NEGATIVE": 0, "NEUTRAL": 0}
 
-def classify_summary(summary):
+async def classify_summary(finbert, summary):
     try:
         sentences = re.split(r'(?<=[.!?]) +', summary)
         sentences = [s.strip() for s in sentences if len(s.strip()) > 20][:8]
         if not sentences:
             return "NEUTRAL"
-        results = finbert(sentences)
+        results = await finbert.classify(sentences)
         pos = sum(1 for r in results if r["label"].upper() == "POSITIVE")
         neg = sum(1 for r in results if r["label"].upper() == "NEGATIVE")
         return "POSITIVE" if pos > neg else "NEGATIVE" if neg > pos else "NEUTRAL"
     except:
         return "NEUTRAL"
 
-# 🔎 RSS fetch
-def get_rss_entries(ticker):
+# 🔎 RSS fetch (asynchrone, GET conditionnel, parsing hors boucle)
+async def get_rss_entries(rss, ticker):
     query = urllib.parse.quote(f"{ticker} stock")
     url = f"https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
-    feed = feedparser.parse(url)
+    feed = await rss.parse(url)
     return [{"title": e.title.strip(), "url": e.link.strip()} for e in feed.entries[:20]]
 
-# 🔁 Ticker handler
-async def process_ticker(ticker):
-    entries = get_rss_entries(ticker)
+# 🧩 Étapes du pipeline : un état par ticker circule de file en file
+# RSS → FinBERT titres → résumé GPT → bullets GPT (ou les deux en lot) → traduction → classification
+async def fetch_news(rss, state):
+    entries = await get_rss_entries(rss, state["ticker"])
     if not entries:
+        state["empty"] = True
         return None
+    state["titles"] = [e["title"] for e in entries]
+    state["urls"] = [e["url"] for e in entries]
+    return state
 
-    titles = [e["title"] for e in entries]
-    urls = [e["url"] for e in entries]
-
+async def score_headlines(finbert, state):
     try:
-        sentiments = finbert(titles, batch_size=8)
+        state["sentiments"] = await finbert.classify(state["titles"])
     except:
-        sentiments = [{"label": "NEUTRAL"}] * len(titles)
+        state["sentiments"] = [{"label": "NEUTRAL"}] * len(state["titles"])
+    return state
+
+async def summarize_news(state):
+    state["summary"] = await call_openai("news_summary_global", "\n".join(state["titles"]))
+    return state
+
+async def extract_bullet_points(state):
+    state["bullets"] = extract_bullets(await call_openai("news_bullet_points", state["summary"]))
+    return state
+
+# Mode lot : résumé + bullets en une requête partagée avec d'autres tickers
+# (mémo par bloc de titres ; repli sur les deux appels par ticker si le lot échoue)
+async def summarize_with_bullets(batcher, state):
+    llm_memo = get_memo("llm")
+    key = memo_key(llm.model, SYSTEM_PROMPT + BATCH_TEMPLATE, "\n".join(state["titles"]))
+    result = llm_memo.get(key)
+    if result is None:
+        try:
+            result = (await batcher.submit([(state["ticker"], state["titles"])]))[0]
+        except LLMError:
+            # Panne LLM : même résultat vide que le mode ticker par ticker, sans le relancer
+            state["summary"] = ""
+            state["bullets"] = []
+            return state
+        if result is not None:
+            llm_memo.set(key, result)
+    if result is None:
+        state = await summarize_news(state)
+        return await extract_bullet_points(state)
+    state["summary"] = result["summary"]
+    state["bullets"] = result["bullets"]
+    return state
+
+async def translate_summary(translator, state):
+    state["translated"] = (await translator.translate([state["summary"]]))[0]
+    return state
+
+async def classify_ticker(finbert, state):
+    label, bullet_counts = await asyncio.gather(
+        classify_summary(finbert, state["translated"]), analyze_bullets(finbert, state["bullets"])
+    )
 
     counts = {"POSITIVE": 0, "NEGATIVE": 0, "NEUTRAL": 0}
-    for s in sentiments:
-        label = s["label"].upper()
-        if label in counts:
-            counts[label] += 1
-
-    sources = [f"{t} ({u}) → {s['label'].title()}" for t, u, s in zip(titles, urls, sentiments)]
+    for s in state["sentiments"]:
+        headline_label = s["label"].upper()
+        if headline_label in counts:
+            counts[headline_label] += 1
 
-    summary = await call_openai("news_summary_global", "\n".join(titles))
-    bullets_raw = await call_openai("news_bullet_points", summary)
-    bullets = extract_bullets(bullets_raw)
-
-    translated = translate(summary)
-    label = classify_summary(translated)
-    bullet_counts = analyze_bullets(bullets)
+    sources = [f"{t} ({u}) → {s['label'].title()}" for t, u, s in zip(state["titles"], state["urls"], state["sentiments"])]
 
     total = sum(counts.values())
     score = (counts["POSITIVE"] - counts["NEGATIVE"]) / total if total else None
 
-    return {
-        "Ticker": ticker,
+    state["result"] = {
+        "Ticker": state["ticker"],
         "news_count": total,
         "sentiment_score": round(score, 3) if score else None,
         "positive_ratio": round(counts["POSITIVE"] / total, 2) if total else None,
@@ -185,30 +261,117 @@ async def process_ticker(ticker):
         "bullet_positive_count": bullet_counts["POSITIVE"],
         "bullet_negative_count": bullet_counts["NEGATIVE"],
         "source": " / ".join(sources),
-        "summary": summary
+        "summary": state["summary"]
     }
+    return state
 
 # 🚀 Main loop
-async def main():
-    results = []
-    summaries_json = {}
-
-    for batch in tqdm([tickers[i:i+20] for i in range(0, len(tickers), 20)], desc="Batches"):
-        tasks = [process_ticker(t) for t in batch]
-        completed = await asyncio.gather(*tasks)
-        for r in completed:
-            if r:
-                results.append(r)
-                summaries_json[r["Ticker"]] = r["summary"]
-        await asyncio.sleep(0.5)
-
+async def main(finbert_config=None, memo_config=None, rss_config=None, stream_config=None, resume=False, translation_config=None, llm_config=None):
+    global llm
+    stream_config = {**STREAM_DEFAULTS, **(stream_config or {})}
+    llm = LLMClient(**{"model": OPENAI_MODEL, **(llm_config or {})})
+    get_memo("llm", **(memo_config or {}))
+
+    # 💾 Journal de reprise : chaque ticker terminé y est flushé aussitôt
+    checkpoint = CheckpointLog("sentiment_gpt", resume=resume)
+    remaining = [t for t in tickers if t not in checkpoint.done]
+    if checkpoint.done:
+        print(f"♻️ Reprise : {len(checkpoint.done)} tickers déjà terminés aujourd'hui, {len(remaining)} restants")
+
+    telemetry.step("sent_gpt.tickers", total=len(remaining))
+    progress = tqdm(total=len(remaining), desc="Tickers")
+
+    def write_result(state):
+        checkpoint.append(state["ticker"], state["result"])
+        telemetry.item(state["ticker"], time.monotonic() - state["started"], ok=True)
+        progress.update(1)
+
+    def drop_ticker(state, error):
+        # Flux vide : journalisé pour que la reprise ne le refetche pas
+        if error is None and state.get("empty"):
+            checkpoint.mark_empty(state["ticker"])
+        telemetry.item(state["ticker"], time.monotonic() - state["started"], ok=False)
+        progress.update(1)
+
+    # Démon FinBERT (modèle déjà chargé) si tasks.py l'a lancé, sinon workers locaux
+    async with open_finbert(memo=get_memo("finbert", **(memo_config or {})), **(finbert_config or {})) as finbert, \
+            RssFetcher(**(rss_config or {})) as rss, \
+            Translator(memo=get_memo("translation", **(memo_config or {})), **(translation_config or {})) as translator:
+        if stream_config["llm_batch"] > 1:
+            # Lots de llm_batch tickers, llm_workers requêtes en vol au plus (le client LLM
+            # en laisse partir moins tant que sa concurrence adaptative est plus basse)
+            batcher = MicroBatcher(
+                summarize_headline_batch, stream_config["llm_batch"], stream_config["llm_batch_wait_ms"] / 1000,
+                max_inflight=stream_config["llm_workers"]
+            )
+            llm_stages = [
+                Stage("summary_bullets", functools.partial(summarize_with_bullets, batcher),
+                      stream_config["llm_workers"] * stream_config["llm_batch"])
+            ]
+        else:
+            batcher = None
+            llm_stages = [
+                Stage("summary", summarize_news, stream_config["llm_workers"]),
+                Stage("bullets", extract_bullet_points, stream_config["llm_workers"])
+            ]
+        stages = [
+            Stage("rss", functools.partial(fetch_news, rss), stream_config["rss_workers"]),
+            Stage("finbert_titles", functools.partial(score_headlines, finbert), stream_config["scoring_workers"]),
+            *llm_stages,
+            Stage("translation", functools.partial(translate_summary, translator), stream_config["translation_workers"]),
+            Stage("classification", functools.partial(classify_ticker, finbert), stream_config["scoring_workers"])
+        ]
+        states = ({"ticker": t, "started": time.monotonic()} for t in remaining)
+        if batcher:
+            batcher.start()
+        try:
+            await run_pipeline(states, stages, write_result, drop_ticker, queue_size=stream_config["queue_size"])
+        finally:
+            if batcher:
+                await batcher.close()
+            checkpoint.close()
+            progress.close()
+            await llm.aclose()
+        rss.report()
+        llm.report()
+
+    # 📤 Exports reconstruits depuis le journal (tickers de ce run + ceux repris)
+    telemetry.step("sent_gpt.export")
+    results = checkpoint.results(tickers)
+    summaries_json = {r["Ticker"]: r["summary"] for r in results}
     df_out = pd.DataFrame(results)
-    df_out.drop(columns=["summary"]).to_csv(CSV_PATH, index=False)
+    write_table(SENTIMENT_TABLE, df_out.drop(columns=["summary"], errors="ignore"), data_dir=DATA_DIR)
     with open(JSON_PATH, "w", encoding="utf-8") as f:
         json.dump(summaries_json, f, indent=2, ensure_ascii=False)
 
-    print(f"\n✅ Export CSV : {CSV_PATH}")
+    print(f"\n✅ Export table : {table_path(SENTIMENT_TABLE, DATA_DIR)}")
     print(f"✅ Export JSON : {JSON_PATH}")
+    report_memos()
+    telemetry.end_step()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rss-workers", type=int, default=STREAM_DEFAULTS["rss_workers"], help="Tickers en cours de fetch RSS")
+    parser.add_argument("--scoring-workers", type=int, default=STREAM_DEFAULTS["scoring_workers"], help="Tickers en cours de scoring FinBERT (titres puis classification)")
+    parser.add_argument("--llm-workers", type=int, default=STREAM_DEFAULTS["llm_workers"], help="Requêtes GPT en vol max par étape (la concurrence réelle est adaptée par le client LLM)")
+    parser.add_argument("--llm-batch", type=int, default=STREAM_DEFAULTS["llm_batch"], help="Tickers par requête GPT (1 = résumé puis bullets, ticker par ticker ; >1 = mode lot, prompt JSON commun)")
+    parser.add_argument("--llm-batch-wait-ms", type=float, default=STREAM_DEFAULTS["llm_batch_wait_ms"], help="Attente max avant d'envoyer un lot GPT incomplet (ms)")
+    parser.add_argument("--translation-workers", type=int, default=STREAM_DEFAULTS["translation_workers"], help="Tickers en attente de traduction (regroupés en lots)")
+    parser.add_argument("--queue-size", type=int, default=STREAM_DEFAULTS["queue_size"], help="Taille max de chaque file entre étapes")
+    add_finbert_arguments(parser)
+    add_memo_arguments(parser)
+    add_rss_arguments(parser)
+    add_resume_argument(parser)
+    add_translation_arguments(parser)
+    add_llm_arguments(parser)
+    args = parser.parse_args()
+    stream_config = {
+        "rss_workers": args.rss_workers,
+        "scoring_workers": args.scoring_workers,
+        "llm_workers": args.llm_workers,
+        "llm_batch": args.llm_batch,
+        "llm_batch_wait_ms": args.llm_batch_wait_ms,
+        "translation_workers": args.translation_workers,
+        "queue_size": args.queue_size
+    }
+    asyncio.run(main(finbert_config_from_args(args), memo_config_from_args(args), rss_config_from_args(args), stream_config, args.resume, translation_config_from_args(args), llm_config_from_args(args)))
@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import urllib.parse
 import pandas as pd
@@ -6,34 +7,47 @@ import feedparser
 import requests
 import json
 import re
-from transformers import pipeline
+import argparse
 from tqdm import tqdm
-from deep_translator import GoogleTranslator
 
 #  Dossiers
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(BASE_DIR, "data")
-CSV_PATH = os.path.join(DATA_DIR, "sentiment_news_summary_full.csv")
+SENTIMENT_TABLE = "sentiment_news_summary_full"
 JSON_PATH = os.path.join(DATA_DIR, "news_summaries_full.json")
 
 #  Tickers
-df = pd.read_csv(os.path.join(DATA_DIR, "df_final_merged.csv"))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.table_store import read_table, write_table, table_path
+from pipelines.common.memo import get_memo, memo_key, report_memos
+from pipelines.common.finbert_client import FinbertSync
+from pipelines.common.checkpoint import CheckpointLog, add_resume_argument
+from pipelines.common.translator import Translator, add_translation_arguments, translation_config_from_args
+
+parser = argparse.ArgumentParser()
+add_resume_argument(parser)
+add_translation_arguments(parser)
+args = parser.parse_args()
+
+df = read_table("df_final_merged", columns=["Ticker"], data_dir=DATA_DIR)
 tickers = df["Ticker"].dropna().unique()  # ✅ toute la table
 
-#  FinBERT
-print("🔁 Chargement FinBERT...")
-finbert = pipeline("sentiment-analysis", model="ProsusAI/finbert", device=-1)
+#  FinBERT : démon partagé s'il tourne (tasks.py), sinon modèle chargé à la première utilisation
+#  Mémo persistant (FinBERT par texte, Mistral par bloc de texte)
+FINBERT_MODEL = "ProsusAI/finbert"
+finbert = FinbertSync(FINBERT_MODEL, memo=get_memo("finbert"))
+LLM_MEMO = get_memo("llm")
+TRANSLATOR = Translator(**translation_config_from_args(args))
+
+def score_texts(texts, **kwargs):
+    return finbert(texts, **kwargs)
 
 #  Mistral API externe
-MISTRAL_API = "https://fzhvs2csuz2ezl-8000.proxy.runpod.net/analyze"
+MISTRAL_API = os.getenv("MISTRAL_API_URL", "https://fzhvs2csuz2ezl-8000.proxy.runpod.net/analyze")
 
 #  Traduction
 def translate_to_english(text):
-    try:
-        return GoogleTranslator(source='auto', target='en').translate(text)
-    except Exception as e:
-        print(f"[TRANSLATION ERROR] {e}")
-        return text
+    return TRANSLATOR.translate_sync([text])[0]
 
 #  RSS fetch
 def get_rss_entries(ticker):
@@ -42,16 +56,29 @@ def get_rss_entries(ticker):
     feed = feedparser.parse(rss_url)
     return [{"title": e.title.strip(), "url": e.link.strip(), "date": e.get("published", "")[:10]} for e in feed.entries[:20]]
 
-#  Appel Mistral
+#  Appel Mistral (réponses non vides mémorisées par (API, tâche, texte))
+def call_mistral(task, text):
+    key = memo_key(MISTRAL_API, task, text)
+    cached = LLM_MEMO.get(key)
+    if cached is not None:
+        return cached
+    response = requests.post(MISTRAL_API, json={"task": task, "input": text}, timeout=90)
+    if response.status_code == 200:
+        data = response.json()
+        if task == "news_summary_global":
+            print("[MISTRAL DEBUG FULL RESPONSE]", data)
+        if isinstance(data, dict) and "outputs" in data:
+            output = data["outputs"][0].strip()
+            if output:
+                LLM_MEMO.set(key, output)
+            return output
+    return None
+
 def call_mistral_summary_global(titles):
     try:
-        full_text = "\n".join(titles)
-        response = requests.post(MISTRAL_API, json={"task": "news_summary_global", "input": full_text}, timeout=90)
-        if response.status_code == 200:
-            data = response.json()
-            print("[MISTRAL DEBUG FULL RESPONSE]", data)
-            if isinstance(data, dict) and "outputs" in data:
-                return data["outputs"][0].strip()
+        output = call_mistral("news_summary_global", "\n".join(titles))
+        if output is not None:
+            return output
     except Exception as e:
         print(f"[Mistral Summary ERROR] {e}")
     return ""
@@ -59,12 +86,10 @@ def call_mistral_summary_global(titles):
 #  Bullets
 def extract_bullet_points(summary):
     try:
-        response = requests.post(MISTRAL_API, json={"task": "news_bullet_points", "input": summary}, timeout=90)
-        if response.status_code == 200:
-            data = response.json()
-            if isinstance(data, dict) and "outputs" in data:
-                bullets = data["outputs"][0].strip().split("\n")
-                return [b.strip("-• ").strip() for b in bullets if b.strip()]
+        output = call_mistral("news_bullet_points", summary)
+        if output is not None:
+            bullets = output.split("\n")
+            return [b.strip("-• ").strip() for b in bullets if b.strip()]
     except Exception as e:
         print(f"[Bullet Extraction ERROR] {e}")
     return []
@@ -72,7 +97,7 @@ def extract_bullet_points(summary):
 #  FinBERT sur bullets
 def analyze_bullet_points(bullets):
     try:
-        results = finbert(bullets)
+        results = score_texts(bullets)
         labels = [r["label"].upper() for r in results]
         counts = {"POSITIVE": 0, "NEGATIVE": 0, "NEUTRAL": 0}
         for label in labels:
@@ -91,7 +116,7 @@ def classify_summary_with_finbert(summary):
         if not sentences:
             return "NEUTRAL"
 
-        results = finbert(sentences)
+        results = score_texts(sentences)
         labels = [r["label"].upper() for r in results]
 
         counts = {"POSITIVE": 0, "NEGATIVE": 0, "NEUTRAL": 0}
@@ -116,21 +141,24 @@ def classify_summary_with_finbert(summary):
         print(f"[FinBERT Summary Classification ERROR] {e}")
         return "NEUTRAL"
 
-#  Pipeline principal
-results = []
-mistral_json = {}
+#  Pipeline principal (journal de reprise : chaque ticker terminé est flushé aussitôt)
+checkpoint = CheckpointLog("sentiment_mistral", resume=args.resume)
+remaining = [t for t in tickers if t not in checkpoint.done]
+if checkpoint.done:
+    print(f"♻️ Reprise : {len(checkpoint.done)} tickers déjà terminés aujourd'hui")
 
-print(f"\n Analyse des {len(tickers)} tickers...\n")
-for ticker in tqdm(tickers, desc="Tickers"):
+print(f"\n Analyse des {len(remaining)} tickers...\n")
+for ticker in tqdm(remaining, desc="Tickers"):
     entries = get_rss_entries(ticker)
     if not entries:
+        checkpoint.mark_empty(ticker)
         continue
 
     titles = [e["title"] for e in entries]
     urls = [e["url"] for e in entries]
 
     try:
-        sentiments = finbert(titles, batch_size=8)
+        sentiments = score_texts(titles, batch_size=8)
     except:
         sentiments = [{"label": "NEUTRAL"}] * len(titles)
 
@@ -143,7 +171,6 @@ for ticker in tqdm(tickers, desc="Tickers"):
         sources.append(f"{title} ({url}) → {label.title()}")
 
     mistral_summary = call_mistral_summary_global(titles).strip()
-    mistral_json[ticker] = mistral_summary
 
     bullets = extract_bullet_points(mistral_summary)
     bullet_counts = analyze_bullet_points(bullets)
@@ -156,7 +183,7 @@ for ticker in tqdm(tickers, desc="Tickers"):
     total = sum(counts.values())
     score = (counts["POSITIVE"] - counts["NEGATIVE"]) / total if total else None
 
-    results.append({
+    checkpoint.append(ticker, {
         "Ticker": ticker,
         "news_count": total,
         "sentiment_score": round(score, 3) if total else None,
@@ -166,16 +193,23 @@ for ticker in tqdm(tickers, desc="Tickers"):
         "mistral_label": mistral_label,
         "bullet_positive_count": bullet_counts["POSITIVE"],
         "bullet_negative_count": bullet_counts["NEGATIVE"],
-        "source": " / ".join(sources)
+        "source": " / ".join(sources),
+        "summary": mistral_summary
     })
 
     time.sleep(1)
 
-#  Exports
+checkpoint.close()
+
+#  Exports reconstruits depuis le journal
+results = checkpoint.results(tickers)
+mistral_json = {r["Ticker"]: r["summary"] for r in results}
 df_out = pd.DataFrame(results)
-df_out.to_csv(CSV_PATH, index=False, encoding="utf-8")
-print(f"\n✅ Export CSV : {CSV_PATH}")
+write_table(SENTIMENT_TABLE, df_out.drop(columns=["summary"], errors="ignore"), data_dir=DATA_DIR)
+print(f"\n✅ Export table : {table_path(SENTIMENT_TABLE, DATA_DIR)}")
 
 with open(JSON_PATH, "w", encoding="utf-8") as f:
     json.dump(mistral_json, f, indent=2, ensure_ascii=False)
-print(f"✅ Export JSON : {JSON_PATH}")
\ No newline at end of file
+print(f"✅ Export JSON : {JSON_PATH}")
+
+report_memos()
@@ -1,30 +1,25 @@
 import os
-import json
+import sys
 import pandas as pd
 from tqdm import tqdm
 
 # === 📁 Répertoires ===
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-DIR_JSON = os.path.join(BASE_DIR, "output", "insights_enriched_all")
-OUTPUT_PATH = os.path.join(BASE_DIR, "data", "df_sentiment_full.csv")
+DATA_DIR = os.path.join(BASE_DIR, "data")
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.table_store import write_table
+from pipelines.common.insights_store import InsightsStore
 
 # === 🧠 Fonction pour cap type ===
 def cap_type(source_list):
     return "BigCap" if source_list in ["SP500", "CAC40", "Nikkei225"] else "SmallCap"
 
-# === 📄 Lecture JSON et extraction des données ===
+# === 📄 Lecture des fiches et extraction des données ===
 records = []
+store = InsightsStore()
 
-for filename in tqdm(os.listdir(DIR_JSON), desc="📄 Lecture des JSON enrichis"):
-    if not filename.endswith(".json"):
-        continue
-
-    filepath = os.path.join(DIR_JSON, filename)
-
+for ticker, data in tqdm(store.iter_documents(), total=len(store.tickers()), desc="📄 Lecture des fiches enrichies"):
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
         fundamentals = data.get("fundamentals", {})
         tech = data.get("technical_indicators", {})
         analyst = data.get("analyst_rating", {})
@@ -75,10 +70,11 @@ for filename in tqdm(os.listdir(DIR_JSON), desc="📄 Lecture des JSON enrichis"
         })
 
     except Exception as e:
-        print(f"❌ Erreur avec {filename} : {e}")
+        print(f"❌ Erreur avec {ticker} : {e}")
+
+store.close()
 
 # === 📊 Création et sauvegarde du DataFrame
 df = pd.DataFrame(records)
-os.makedirs(os.path.join(BASE_DIR, "data"), exist_ok=True)
-df.to_csv(OUTPUT_PATH, index=False)
-print(f"\n✅ DataFrame enregistré : {OUTPUT_PATH} (shape: {df.shape})")
+output_path = write_table("df_sentiment_full", df, data_dir=DATA_DIR)
+print(f"\n✅ DataFrame enregistré : {output_path} (shape: {df.shape})")
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import re
 import pandas as pd
@@ -6,23 +7,17 @@ from tqdm import tqdm
 
 # === 📁 Chemins depuis la racine du projet ===
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-DIR_JSON = os.path.join(BASE_DIR, "output", "insights_enriched_all")
 SUMMARY_JSON_PATH = os.path.join(BASE_DIR, "data", "news_summaries_full.json")
-SENTIMENT_CSV_PATH = os.path.join(BASE_DIR, "data", "sentiment_news_summary_full.csv")
-FINAL_MERGED_CSV_PATH = os.path.join(BASE_DIR, "data", "df_final_merged.csv")
+DATA_DIR = os.path.join(BASE_DIR, "data")
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.table_store import read_table
+from pipelines.common.insights_store import InsightsStore
 
 # === Chargement des fichiers source ===
 with open(SUMMARY_JSON_PATH, "r") as f:
     summaries = json.load(f)
 
-sentiment_df = pd.read_csv(
-    SENTIMENT_CSV_PATH,
-    sep=",",
-    quotechar='"',
-    escapechar="\\",
-    encoding="utf-8",
-    on_bad_lines="skip"
-)
+sentiment_df = read_table("sentiment_news_summary_full", data_dir=DATA_DIR)
 
 # === Fonction fallback parsing brut
 def parse_headlines_from_string(source_str):
@@ -51,7 +46,7 @@ def parse_headlines_from_string(source_str):
 
 # === Date d’extraction
 try:
-    df_merged = pd.read_csv(FINAL_MERGED_CSV_PATH)
+    df_merged = read_table("df_final_merged", columns=["ExtractionDate"], data_dir=DATA_DIR)
     extraction_date = df_merged["ExtractionDate"].dropna().iloc[-1]
     print(f"✅ Date d'extraction détectée : {extraction_date}")
 except Exception as e:
@@ -62,22 +57,15 @@ possible_ticker_cols = [col for col in sentiment_df.columns if 'ticker' in col.l
 if possible_ticker_cols:
     sentiment_df.set_index(possible_ticker_cols[0], inplace=True)
 else:
-    raise ValueError("⚠️ Colonne 'ticker' introuvable dans le CSV. Colonnes disponibles : " + str(sentiment_df.columns.tolist()))
+    raise ValueError("⚠️ Colonne 'ticker' introuvable dans la table. Colonnes disponibles : " + str(sentiment_df.columns.tolist()))
 
 # === Boucle principale
 errors = []
+store = InsightsStore()
+sections = []
 
-for filename in tqdm(os.listdir(DIR_JSON), desc="Fusion sentiment + date"):
-    if not filename.endswith(".json"):
-        continue
-
-    ticker = filename.replace(".json", "")
-    filepath = os.path.join(DIR_JSON, filename)
-
+for ticker in tqdm(store.tickers(), desc="Fusion sentiment + date"):
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
         summary = summaries.get(ticker)
         if ticker not in sentiment_df.index or summary is None:
             continue
@@ -120,20 +108,21 @@ for filename in tqdm(os.listdir(DIR_JSON), desc="Fusion sentiment + date"):
         }
 
         # === Injection
-        data["news_sentiment"] = news_sentiment
-        data["extraction_date"] = extraction_date
-
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        sections.append((ticker, "news_sentiment", news_sentiment))
+        sections.append((ticker, "extraction_date", extraction_date))
 
     except Exception as e:
         errors.append({"ticker": ticker, "error": str(e)})
         print(f"❌ Erreur sur {ticker} : {e}")
 
+# === Sauvegarde en une transaction
+store.upsert_sections(sections)
+store.close()
+
 # === Rapport final
 if errors:
     print(f"\n⚠️ {len(errors)} erreurs rencontrées.")
     for err in errors[:10]:  # preview
         print(f"- {err['ticker']} → {err['error']}")
 else:
-    print("\n✅ Tous les fichiers ont été traités avec succès.")
+    print("\n✅ Toutes les fiches ont été traitées avec succès.")
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import re
 import pandas as pd
@@ -6,24 +7,18 @@ from tqdm import tqdm
 
 # ===  Répertoires de base ===
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-DIR_JSON = os.path.join(BASE_DIR, "output", "insights_enriched_all")
 SUMMARY_JSON_PATH = os.path.join(BASE_DIR, "data", "news_summaries_full.json")
-SENTIMENT_CSV_PATH = os.path.join(BASE_DIR, "data", "sentiment_news_summary_full.csv")
-FINAL_MERGED_CSV_PATH = os.path.join(BASE_DIR, "data", "df_final_merged.csv")
+DATA_DIR = os.path.join(BASE_DIR, "data")
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.table_store import read_table
+from pipelines.common.insights_store import InsightsStore
 
 
 # === Chargement des fichiers source ===
 with open(SUMMARY_JSON_PATH, "r") as f:
     summaries = json.load(f)
 
-sentiment_df = pd.read_csv(
-    SENTIMENT_CSV_PATH,
-    sep=",",
-    quotechar='"',
-    escapechar="\\",
-    encoding="utf-8",
-    on_bad_lines="skip"
-)
+sentiment_df = read_table("sentiment_news_summary_full", data_dir=DATA_DIR)
 
 # === Fonction de parsing alternatif (format brut "titre (URL) → label")
 def parse_headlines_from_string(source_str):
@@ -52,7 +47,7 @@ def parse_headlines_from_string(source_str):
 
 # === Charger la date d’extraction
 try:
-    df_merged = pd.read_csv(FINAL_MERGED_CSV_PATH)
+    df_merged = read_table("df_final_merged", columns=["ExtractionDate"], data_dir=DATA_DIR)
     extraction_date = df_merged["ExtractionDate"].dropna().iloc[-1]
     print(f"✅ Date d'extraction détectée : {extraction_date}")
 except Exception as e:
@@ -63,20 +58,12 @@ possible_ticker_cols = [col for col in sentiment_df.columns if 'ticker' in col.l
 if possible_ticker_cols:
     sentiment_df.set_index(possible_ticker_cols[0], inplace=True)
 else:
-    raise ValueError("⚠️ Colonne 'ticker' introuvable dans le CSV. Colonnes disponibles : " + str(sentiment_df.columns.tolist()))
-
-# === Boucle sur les fichiers JSON ===
-for filename in tqdm(os.listdir(DIR_JSON), desc="Fusion sentiment + date"):
-    if not filename.endswith(".json"):
-        continue
-
-    ticker = filename.replace(".json", "")
-    filepath = os.path.join(DIR_JSON, filename)
-
-    # Charger le JSON existant
-    with open(filepath, "r") as f:
-        data = json.load(f)
+    raise ValueError("⚠️ Colonne 'ticker' introuvable dans la table. Colonnes disponibles : " + str(sentiment_df.columns.tolist()))
 
+# === Boucle sur les fiches du store ===
+store = InsightsStore()
+sections = []
+for ticker in tqdm(store.tickers(), desc="Fusion sentiment + date"):
     summary = summaries.get(ticker)
     if ticker not in sentiment_df.index or summary is None:
         continue
@@ -104,8 +91,8 @@ for filename in tqdm(os.listdir(DIR_JSON), desc="Fusion sentiment + date"):
         except Exception:
             headlines = parse_headlines_from_string(row["source"])
 
-    # === Injection dans le JSON final
-    data["news_sentiment"] = {
+    # === Injection dans la fiche (sections news_sentiment + extraction_date)
+    news_sentiment = {
         "summary": summary,
         "sentiment_score": round(float(row["sentiment_score"]), 3),
         "label": row["gpt_label"],  # 🔁 On lit "gpt_label" mais...
@@ -117,10 +104,11 @@ for filename in tqdm(os.listdir(DIR_JSON), desc="Fusion sentiment + date"):
         "headlines": headlines
     }
 
-    data["extraction_date"] = extraction_date
+    sections.append((ticker, "news_sentiment", news_sentiment))
+    sections.append((ticker, "extraction_date", extraction_date))
 
-    # Sauvegarde du JSON enrichi
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=2)
+# Sauvegarde en une transaction
+store.upsert_sections(sections)
+store.close()
 
 print("✅ Fusion terminée avec enrichissement GPT.")
@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import requests
 import pandas as pd
@@ -9,12 +10,14 @@ from playwright.sync_api import sync_playwright
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 REPORTS_DIR = os.path.join(DATA_DIR, "reports", "esg")
-CSV_PATH = os.path.join(DATA_DIR, "df_final_merged.csv")
 FOUND_CSV = os.path.join(DATA_DIR, "found.csv")
 MISSING_CSV = os.path.join(DATA_DIR, "missing.csv")
 
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.table_store import read_table
+
 os.makedirs(REPORTS_DIR, exist_ok=True)
-df = pd.read_csv(CSV_PATH)
+df = read_table("df_final_merged", columns=["Ticker", "IndexSource", "Company"])
 found_reports = []
 missing_reports = []
 
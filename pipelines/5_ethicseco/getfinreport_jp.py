@@ -1,11 +1,14 @@
 from playwright.sync_api import sync_playwright
 import os
+import sys
 import time
-import pandas as pd
 
-# Charger les tickers japonais depuis le fichier fusionné
-DF_PATH = "../../data/df_final_merged.csv"
-df = pd.read_csv(DF_PATH)
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.table_store import read_table
+
+# Charger les tickers japonais depuis la table fusionnée
+df = read_table("df_final_merged", columns=["Ticker", "IndexSource"])
 tickers = df[df["IndexSource"] == "Nikkei225"]["Ticker"].astype(str).str.replace(".T", "", regex=False).unique().tolist()
 
 # Répertoire de sortie final
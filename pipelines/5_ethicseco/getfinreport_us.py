@@ -1,19 +1,20 @@
 import os
-import pandas as pd
+import sys
 import requests
 from tqdm import tqdm
 from secedgar.cik_lookup import CIKLookup
 
 #  Configuration des chemins
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-CSV = os.path.join(ROOT, 'data', 'df_final_merged.csv')
+sys.path.insert(0, ROOT)
+from pipelines.common.table_store import read_table
 OUT_HTML = os.path.join(ROOT, 'data', 'reports', 'us')
 os.makedirs(OUT_HTML, exist_ok=True)
 
 print(f" Les fichiers HTML seront sauvegardés dans : {OUT_HTML}")
 
 #  Chargement des tickers (SP500 + AltScreen) pour les compagnies US uniquement
-df = pd.read_csv(CSV)
+df = read_table('df_final_merged', columns=['Ticker', 'IndexSource'])
 tickers_us = df[
     (df['IndexSource'].isin(['SP500', 'AltScreen']))
 ]['Ticker'].dropna().unique().tolist()
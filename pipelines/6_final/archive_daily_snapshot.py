@@ -1,14 +1,49 @@
 import os
+import sys
+import sqlite3
 import tarfile
+import argparse
 from datetime import datetime
 
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.history_store import HISTORY_TABLES, append, maintain
+from pipelines.common.table_store import read_table
+from pipelines.common.snapshot_store import SnapshotStore
+from pipelines.common.insights_store import INSIGHTS_DB
+
+# Fichiers et dossiers archivés chaque jour (relatifs à la racine du projet)
+SNAPSHOT_TARGETS = [
+    "data/overview/fear_greed.json",
+    "data/overview/vix.json",
+    "data/overview/news.json",
+    "data/overview/sector_heatmap.json",
+    "data/overview/sector_performance.json",
+    "data/overview/sector_volatility.json",
+    "data/overview/headline_summary.json",
+    "data/news_summaries_full.json",
+    "data/insights.sqlite",
+    "output/insights_enriched_all",
+]
+
+# 🗃️ Base SQLite en WAL : les dernières transactions peuvent n'être que dans insights.sqlite-wal,
+# fichier non archivé → report dans la base principale (et WAL vidé) avant lecture
+def checkpoint_sqlite(path=INSIGHTS_DB):
+    if not os.path.exists(path):
+        return
+    conn = sqlite3.connect(path, timeout=60)
+    try:
+        busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        conn.close()
+    if busy:
+        raise RuntimeError(f"Checkpoint WAL impossible ({path} en cours d'écriture) : snapshot annulé")
+
+# 📦 Ancien format : tout le périmètre recompressé dans un tar.gz par jour
 def archive_nastrad_daily_snapshot():
     # Format de date du jour
     today_str = datetime.today().strftime("%d-%m-%Y")
 
-    # Base du projet = 2 niveaux au-dessus du script
-    BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-
     # Dossier de sortie pour archives
     output_base = os.path.join(BASE_DIR, "output", "history")
     archive_dir = os.path.join(output_base, today_str)
@@ -16,28 +51,12 @@ def archive_nastrad_daily_snapshot():
 
     archive_path = os.path.join(archive_dir, "na_strad_snapshot.tar.gz")
 
-    # Fichiers et dossiers à inclure dans l’archive
-    targets = [
-        os.path.join(BASE_DIR, "data", "df_final_merged.csv"),
-        os.path.join(BASE_DIR, "data", "overview", "fear_greed.json"),
-        os.path.join(BASE_DIR, "data", "overview", "vix.json"),
-        os.path.join(BASE_DIR, "data", "overview", "news.json"),
-        os.path.join(BASE_DIR, "data", "overview", "sector_heatmap.json"),
-        os.path.join(BASE_DIR, "data", "overview", "sector_performance.json"),
-        os.path.join(BASE_DIR, "data", "overview", "sector_volatility.json"),
-        os.path.join(BASE_DIR, "data", "overview", "headline_summary.json"),
-        os.path.join(BASE_DIR, "data", "news_summaries_full.json"),
-        os.path.join(BASE_DIR, "output", "insights_enriched_all"),
-        os.path.join(BASE_DIR, "data", "df_sentiment_full.csv"),
-    ]
-
     print(f"Création de l'archive : {archive_path}")
 
     with tarfile.open(archive_path, "w:gz") as tar:
-        for target in targets:
+        for arcname in SNAPSHOT_TARGETS:
+            target = os.path.join(BASE_DIR, arcname)
             if os.path.exists(target):
-                # Relatif à la racine pour archive propre
-                arcname = os.path.relpath(target, start=BASE_DIR)
                 tar.add(target, arcname=arcname)
                 print(f"  ✅ Ajouté : {arcname}")
             else:
@@ -45,5 +64,42 @@ def archive_nastrad_daily_snapshot():
 
     print(f" Archive complétée : {archive_path}")
 
+# 🧊 Snapshot dédupliqué (pipelines/common/snapshot_store.py) : seuls les blocs nouveaux
+# depuis la veille sont compressés et stockés ; restauration via snapshot_store.py restore
+def snapshot_nastrad_daily():
+    store = SnapshotStore()
+    stats = store.snapshot(SNAPSHOT_TARGETS)
+    print(
+        f" Snapshot complété : {stats['files']} fichiers ({stats['reused_files']} inchangés), "
+        f"{stats['new_chunks']}/{stats['chunks']} blocs nouveaux, "
+        f"+{stats['stored_bytes'] / 1e6:.2f} Mo stockés pour {stats['bytes'] / 1e6:.1f} Mo, {stats['elapsed']:.1f}s"
+    )
+    removed, orphans = store.prune()
+    if removed:
+        print(f"  ✂️ {removed} snapshots hors rétention supprimés ({orphans} blocs libérés)")
+
+# 🕰️ Tables quotidiennes versées dans l'historique partitionné (pipelines/common/history_store.py)
+# plutôt que dans l'archive : une série par ticker se lit sans décompresser de snapshot
+def append_daily_history():
+    for table in HISTORY_TABLES:
+        try:
+            df = read_table(table)
+        except FileNotFoundError as e:
+            print(f"  ⚠️ {e}")
+            continue
+        for day, rows in append(table, df).items():
+            print(f"  🕰️ Historique {table} : {rows} lignes pour le {day}")
+    maintain()
+
 if __name__ == "__main__":
-    archive_nastrad_daily_snapshot()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--format", choices=["chunks", "tar"], default="chunks", help="chunks = snapshot dédupliqué, tar = ancienne archive tar.gz complète")
+    args = parser.parse_args()
+
+    append_daily_history()
+    checkpoint_sqlite()
+    if args.format == "tar":
+        archive_nastrad_daily_snapshot()
+    else:
+        snapshot_nastrad_daily()
+
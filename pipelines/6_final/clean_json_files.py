@@ -1,34 +1,27 @@
-import json
-import math
 import os
+import sys
+import argparse
 
-# 📁 Dossier contenant les JSON (structure correcte)
+# 📁 Dossier des fiches JSON par ticker (lu par le frontend)
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DIR_JSON = os.path.join(BASE_DIR, "output", "insights_enriched_all")
+sys.path.insert(0, BASE_DIR)
+from pipelines.common import telemetry
+from pipelines.common.insights_store import InsightsStore
 
-def clean_json(obj):
-    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
-        return None
-    elif isinstance(obj, dict):
-        return {k: clean_json(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [clean_json(i) for i in obj]
-    else:
-        return obj
-
-def clean_and_save_json_file(path):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        cleaned = clean_json(data)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(cleaned, f, indent=2, ensure_ascii=False)
-        print(f"[✓] Nettoyé : {os.path.basename(path)}")
-    except Exception as e:
-        print(f"[✗] Erreur pour {os.path.basename(path)} → {e}")
+# 🧽 Les NaN / inf sont déjà remplacés par None à l'écriture dans le store :
+# cette étape se limite à exporter les fiches, sans réécrire celles inchangées.
 
 if __name__ == "__main__":
-    for file in os.listdir(DIR_JSON):
-        if file.endswith(".json"):
-            full_path = os.path.join(DIR_JSON, file)
-            clean_and_save_json_file(full_path)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", default=DIR_JSON, help="Dossier d'export des fiches JSON")
+    args = parser.parse_args()
+
+    # Les fiches JSON existantes sont reprises une fois par enrich_companies (InsightsStore.migrate_json)
+    with InsightsStore() as store:
+        telemetry.step("clean_json_files.export", total=len(store.tickers()))
+        written, unchanged = store.export_json(args.dir)
+        telemetry.count("files_written", written)
+        telemetry.end_step()
+
+    print(f"[✓] {written} fiches exportées, {unchanged} inchangées → {args.dir}")
@@ -0,0 +1 @@
+# 🧰 Briques partagées entre les pipelines (historique de prix, indicateurs, fetch...)
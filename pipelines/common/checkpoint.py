@@ -0,0 +1,74 @@
+import os
+import json
+from datetime import datetime
+
+# 📒 Journal de reprise append-only (une ligne JSON par ticker terminé)
+# Chaque résultat est écrit et flushé dès que le ticker est fini : un crash ne perd
+# que les tickers en cours. En reprise (--resume), les tickers déjà terminés le même
+# jour sont sautés ; les exports finaux sont reconstruits depuis le journal.
+# Un ticker sans actualité est journalisé comme « vide » : sauté en reprise, absent des exports.
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CHECKPOINT_DIR = os.path.join(BASE_DIR, "data", "checkpoints")
+EMPTY_RESULT = {"status": "empty"}
+
+
+class CheckpointLog:
+    def __init__(self, name, resume=False, run_date=None, directory=CHECKPOINT_DIR):
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.run_date = run_date or datetime.now().strftime("%Y-%m-%d")
+        os.makedirs(directory, exist_ok=True)
+
+        # Reprise : on ne garde que les résultats du jour (journal compacté)
+        self.done = self._read() if resume else {}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for ticker, result in self.done.items():
+                f.write(self._line(ticker, result))
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def _line(self, ticker, result):
+        return json.dumps({"date": self.run_date, "ticker": ticker, "result": result}, ensure_ascii=False, default=str) + "\n"
+
+    def _read(self):
+        done = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Dernière ligne tronquée par un crash
+                        continue
+                    if record.get("date") == self.run_date:
+                        done[record["ticker"]] = record["result"]
+        except FileNotFoundError:
+            pass
+        return done
+
+    def append(self, ticker, result):
+        self.file.write(self._line(ticker, result))
+        self.file.flush()
+        self.done[ticker] = result
+
+    def mark_empty(self, ticker):
+        self.append(ticker, EMPTY_RESULT)
+
+    # Résultats journalisés des tickers demandés, dans leur ordre (tickers vides exclus)
+    def results(self, tickers):
+        return [self.done[t] for t in tickers if t in self.done and self.done[t] != EMPTY_RESULT]
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def add_resume_argument(parser):
+    parser.add_argument("--resume", action="store_true", help="Reprend le run du jour : saute les tickers déjà terminés")
+    return parser
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from pipelines.common import telemetry
+
+# 🗃️ Cache disque générique (clé → valeur JSON)
+# - fichiers adressés par le hash de la clé (data/cache/<namespace>/ab/abcd....json)
+# - TTL optionnel, éviction LRU quand la taille totale dépasse `max_bytes`
+# - écritures atomiques (fichier temporaire + os.replace) : pas de JSON tronqué
+#   si un script est tué, et plusieurs scripts peuvent partager le même dossier
+
+
+class DiskCache:
+    def __init__(self, directory, ttl=None, max_bytes=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def _count(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        telemetry.count("cache_hits" if hit else "cache_misses")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(False)
+            return default
+
+        if entry.get("key") != key or (self.ttl is not None and time.time() - entry.get("created_at", 0) > self.ttl):
+            self._count(False)
+            return default
+
+        # LRU : la date d'accès est portée par le mtime du fichier
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count(True)
+        return entry["value"]
+
+    def set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "created_at": time.time(), "value": value}, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # Date de création de l'entrée (celle que compare get) ; None si illisible
+    def _created_at(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("created_at", 0)
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    # 🧹 Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_bytes
+    # (plusieurs étapes peuvent élaguer le même dossier en parallèle : fichier déjà supprimé ignoré)
+    def prune(self):
+        entries = []
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp") and now - stat.st_mtime > 3600:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        removed = 0
+        if self.ttl is not None:
+            kept = []
+            for mtime, size, path in entries:
+                # TTL sur created_at comme get : le mtime, repoussé à chaque lecture (LRU),
+                # garderait indéfiniment une entrée expirée mais souvent demandée.
+                # created_at <= mtime : seules les entrées au mtime récent sont relues
+                if now - mtime <= self.ttl:
+                    created_at = self._created_at(path)
+                    if created_at is not None and now - created_at <= self.ttl:
+                        kept.append((mtime, size, path))
+                        continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+            entries = kept
+
+        total = sum(size for _, size, _ in entries)
+        if self.max_bytes is not None and total > self.max_bytes:
+            for mtime, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                total -= size
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        return removed
+
+    def stats_line(self, name):
+        total = self.hits + self.misses
+        rate = f"{self.hits / total:.0%}" if total else "n/a"
+        return f"🗃️ Cache {name} : {self.hits} hits / {self.misses} misses ({rate})"
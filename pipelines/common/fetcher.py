@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import random
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import yfinance as yf
+from tqdm import tqdm
+from pipelines.common.disk_cache import DiskCache
+from pipelines.common import telemetry
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# 🌐 Fetch concurrent et limité en débit (remplace les boucles série + sleep fixes)
+# - pool de threads borné
+# - token bucket par hôte, partagé par tous les fetchs du process et entre process :
+#   l'état du seau vit dans data/cache/ratelimit/<hôte>.json sous verrou fcntl, donc les
+#   étapes lancées en parallèle par tasks.py (etl_pipeline, enrich_etl) se partagent le
+#   même débit (sans fcntl, ex. Windows : un seau par process, débit multiplié)
+# - backoff exponentiel avec jitter sur 429 / 5xx
+# - timeout par tentative (compté après obtention du jeton, hors backoff)
+
+YAHOO_HOST = "query2.finance.yahoo.com"
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+INFO_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "info")
+RATE_LIMIT_DIR = os.path.join(BASE_DIR, "data", "cache", "ratelimit")
+
+FETCH_DEFAULTS = {
+    "workers": 8,
+    "rate": 5.0,
+    "burst": 10,
+    "retries": 4,
+    "timeout": 30.0,
+    "info_cache_ttl_hours": 20.0,
+    "info_cache_max_mb": 512
+}
+
+
+# 🪣 Token bucket : `rate` requêtes/seconde en régime établi, rafales jusqu'à `burst`
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+
+# 🪣 Même seau, état partagé entre process via un fichier verrouillé (horloge murale)
+class SharedTokenBucket:
+    def __init__(self, path, rate, burst):
+        self.path = path
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _take(self):
+        with open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read())
+                except ValueError:
+                    state = {}
+                now = time.time()
+                tokens = min(self.capacity, state.get("tokens", self.capacity) + (now - state.get("updated", now)) * self.rate)
+                wait_for = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait_for = (1 - tokens) / self.rate
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({"tokens": tokens, "updated": now}))
+                f.flush()
+                return wait_for
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self):
+        while True:
+            wait_for = self._take()
+            if wait_for == 0.0:
+                return
+            time.sleep(wait_for)
+
+
+_BUCKETS = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def get_bucket(host, rate, burst):
+    with _BUCKETS_LOCK:
+        bucket = _BUCKETS.get(host)
+        if bucket is None:
+            if fcntl is not None:
+                bucket = SharedTokenBucket(os.path.join(RATE_LIMIT_DIR, f"{host}.json"), rate, burst)
+            else:
+                bucket = TokenBucket(rate, burst)
+            _BUCKETS[host] = bucket
+        else:
+            bucket.rate, bucket.capacity = rate, max(burst, 1)
+        return bucket
+
+
+# 🔁 Erreurs transitoires : rate limit (429) et erreurs serveur (5xx)
+def is_retryable(exc):
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or 500 <= int(status) < 600
+    message = f"{type(exc).__name__} {exc}".lower()
+    return any(kw in message for kw in ["ratelimit", "rate limit", "too many requests", "429", "timed out", "timeout"])
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class FetchAbandoned(Exception):
+    pass
+
+
+# `attempts[key]` = début de la tentative en cours (après obtention du jeton), None pendant
+# l'attente du seau et le backoff ; clé présente dans `abandoned` → plus de nouvelle tentative
+def call_with_retry(fn, key, bucket, retries, attempts=None, abandoned=()):
+    attempts = {} if attempts is None else attempts
+    for attempt in range(retries + 1):
+        attempts[key] = None
+        bucket.acquire()
+        if key in abandoned:
+            raise FetchAbandoned(key)
+        attempts[key] = time.monotonic()
+        telemetry.count("network_calls")
+        try:
+            return fn(key)
+        except Exception as e:
+            attempts[key] = None
+            if attempt >= retries or not is_retryable(e) or key in abandoned:
+                raise
+            time.sleep(backoff_delay(attempt))
+
+
+# ⚙️ Options CLI communes à tous les scripts qui fetchent
+def add_fetch_arguments(parser):
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_DEFAULTS["workers"], help="Nombre de requêtes simultanées")
+    parser.add_argument("--fetch-rate", type=float, default=FETCH_DEFAULTS["rate"], help="Requêtes/seconde max par hôte")
+    parser.add_argument("--fetch-burst", type=int, default=FETCH_DEFAULTS["burst"], help="Rafale max autorisée par le token bucket")
+    parser.add_argument("--fetch-retries", type=int, default=FETCH_DEFAULTS["retries"], help="Tentatives supplémentaires sur 429/5xx")
+    parser.add_argument("--fetch-timeout", type=float, default=FETCH_DEFAULTS["timeout"], help="Timeout par tentative (secondes, hors attente du seau et backoff)")
+    parser.add_argument("--info-cache-ttl", type=float, default=FETCH_DEFAULTS["info_cache_ttl_hours"], help="Durée de validité du cache Ticker.info (heures, 0 = désactivé)")
+    parser.add_argument("--info-cache-max-mb", type=float, default=FETCH_DEFAULTS["info_cache_max_mb"], help="Taille max du cache Ticker.info (Mo)")
+    return parser
+
+
+def fetch_config_from_args(args):
+    return {
+        "workers": args.fetch_workers,
+        "rate": args.fetch_rate,
+        "burst": args.fetch_burst,
+        "retries": args.fetch_retries,
+        "timeout": args.fetch_timeout,
+        "info_cache_ttl_hours": args.info_cache_ttl,
+        "info_cache_max_mb": args.info_cache_max_mb
+    }
+
+
+# 🚀 Applique `fn` à chaque clé en parallèle → (résultats, erreurs)
+def fetch_all(keys, fn, host=YAHOO_HOST, desc=None, workers=None, rate=None, burst=None, retries=None, timeout=None):
+    workers = workers or FETCH_DEFAULTS["workers"]
+    retries = FETCH_DEFAULTS["retries"] if retries is None else retries
+    timeout = timeout or FETCH_DEFAULTS["timeout"]
+    bucket = get_bucket(host, rate or FETCH_DEFAULTS["rate"], burst or FETCH_DEFAULTS["burst"])
+
+    keys = list(dict.fromkeys(keys))
+    results, errors = {}, {}
+    started, attempts, abandoned = {}, {}, set()
+
+    def task(key):
+        started[key] = time.monotonic()
+        try:
+            result = call_with_retry(fn, key, bucket, retries, attempts, abandoned)
+        except Exception:
+            telemetry.item(key, time.monotonic() - started[key], ok=False)
+            raise
+        telemetry.item(key, time.monotonic() - started[key])
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {executor.submit(task, key): key for key in keys}
+    pending = set(futures)
+    progress = tqdm(total=len(keys), desc=desc or f"🌐 Fetch {host}")
+
+    while pending:
+        done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+        for future in done:
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                errors[key] = str(e)
+            progress.update(1)
+
+        # ⏱️ Tentative bloquée au-delà du timeout (hors attente du seau et backoff) : ticker
+        # abandonné, son thread ne relance plus de requête et ne consomme plus de jeton
+        now = time.monotonic()
+        for future in list(pending):
+            key = futures[future]
+            attempt_started = attempts.get(key)
+            if attempt_started is not None and now - attempt_started > timeout:
+                abandoned.add(key)
+                pending.discard(future)
+                errors[key] = f"Timeout après {timeout:.0f}s"
+                progress.update(1)
+
+    progress.close()
+    executor.shutdown(wait=False, cancel_futures=True)
+    return results, errors
+
+
+# 🗃️ Cache Ticker.info partagé entre tous les scripts d'un même run (clé : ticker + date)
+_INFO_CACHE = None
+
+
+def get_info_cache(ttl_hours=None, max_mb=None):
+    global _INFO_CACHE
+    ttl_hours = FETCH_DEFAULTS["info_cache_ttl_hours"] if ttl_hours is None else ttl_hours
+    max_mb = max_mb or FETCH_DEFAULTS["info_cache_max_mb"]
+    if _INFO_CACHE is None:
+        _INFO_CACHE = DiskCache(INFO_CACHE_DIR)
+    _INFO_CACHE.ttl = ttl_hours * 3600
+    _INFO_CACHE.max_bytes = int(max_mb * 1024 * 1024)
+    return _INFO_CACHE
+
+
+def info_cache_key(ticker):
+    return f"info|{ticker}|{datetime.now().strftime('%Y-%m-%d')}"
+
+
+# 📄 Ticker.info pour une liste de tickers (cache disque d'abord, réseau pour le reste)
+def fetch_infos(tickers, desc="📄 Ticker.info", info_cache_ttl_hours=None, info_cache_max_mb=None, **config):
+    use_cache = info_cache_ttl_hours is None or info_cache_ttl_hours > 0
+    cache = get_info_cache(info_cache_ttl_hours, info_cache_max_mb) if use_cache else None
+
+    results, to_fetch = {}, []
+    for ticker in dict.fromkeys(tickers):
+        info = cache.get(info_cache_key(ticker)) if cache else None
+        if info:
+            results[ticker] = info
+        else:
+            to_fetch.append(ticker)
+
+    fetched, errors = fetch_all(to_fetch, lambda t: yf.Ticker(t).info, host=YAHOO_HOST, desc=desc, **config)
+    for ticker, info in fetched.items():
+        if cache and info:
+            cache.set(info_cache_key(ticker), info)
+        if telemetry.enabled():
+            telemetry.count("bytes", len(json.dumps(info, default=str)))
+    results.update(fetched)
+    return results, errors
+
+
+# 📊 À appeler en fin de script : compteurs hits/misses + éviction LRU
+def report_info_cache():
+    if _INFO_CACHE is None:
+        return
+    print(_INFO_CACHE.stats_line("Ticker.info"))
+    removed = _INFO_CACHE.prune()
+    if removed:
+        print(f"🧹 {removed} entrées expirées/anciennes retirées du cache Ticker.info")
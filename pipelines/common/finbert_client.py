@@ -0,0 +1,120 @@
+import os
+import json
+import urllib.error
+import urllib.request
+from pipelines.common import telemetry
+from pipelines.common.memo import memoize_batch, amemoize_batch
+from pipelines.common.finbert_worker import FinbertWorker, FINBERT_DEFAULTS, MODEL_NAME, TASK, model_id, build_classifier, classify_texts
+
+# 📡 Clients du démon FinBERT (pipelines/common/finbert_daemon.py)
+# - FinbertClient : même interface asynchrone que FinbertWorker (classify, async with)
+# - FinbertSync : appelable synchrone, remplace pipeline("sentiment-analysis", ...)
+# Sans démon joignable (FINBERT_DAEMON_URL absente ou /health muet), repli sur un
+# modèle chargé dans le process : les scripts restent exécutables seuls.
+
+DAEMON_ENV = "FINBERT_DAEMON_URL"
+HEALTH_TIMEOUT = 1.0
+
+
+def daemon_available(url):
+    try:
+        with urllib.request.urlopen(f"{url}/health", timeout=HEALTH_TIMEOUT) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def daemon_url():
+    url = os.getenv(DAEMON_ENV)
+    return url if url and daemon_available(url) else None
+
+
+class FinbertClient:
+    def __init__(self, url, model_name=MODEL_NAME, memo=None, all_scores=False, backend=None):
+        self.url = url
+        self.model_name = model_name
+        self.memo = memo
+        self.all_scores = all_scores
+        self.backend = backend or FINBERT_DEFAULTS["backend"]
+        self._session = None
+
+    async def __aenter__(self):
+        import aiohttp
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=600))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    async def _remote(self, texts):
+        telemetry.count("finbert_daemon_calls")
+        payload = {"model": self.model_name, "texts": texts, "all_scores": self.all_scores, "backend": self.backend}
+        async with self._session.post(f"{self.url}/classify", json=payload) as response:
+            body = await response.json()
+        if "error" in body:
+            raise RuntimeError(f"[FinBERT daemon] {body['error']}")
+        return body["results"]
+
+    async def classify(self, texts):
+        if not texts:
+            return []
+        if self.memo is not None:
+            return await amemoize_batch(self.memo, model_id(self.model_name, self.backend), f"{TASK}|all" if self.all_scores else TASK, texts, self._remote)
+        return await self._remote(texts)
+
+
+# 🔌 Démon si disponible, sinon FinbertWorker local (mêmes paramètres)
+def open_finbert(model_name=MODEL_NAME, memo=None, all_scores=False, **finbert_config):
+    url = daemon_url()
+    if url:
+        print(f"🔥 FinBERT servi par le démon {url}")
+        return FinbertClient(url, model_name, memo=memo, all_scores=all_scores, backend=finbert_config.get("backend"))
+    return FinbertWorker(model_name, memo=memo, all_scores=all_scores, **finbert_config)
+
+
+class FinbertSync:
+    def __init__(self, model_name=MODEL_NAME, memo=None, all_scores=False, backend=None):
+        self.model_name = model_name
+        self.memo = memo
+        self.all_scores = all_scores
+        self.backend = backend or FINBERT_DEFAULTS["backend"]
+        self.url = daemon_url()
+        self._model = None
+        if self.url:
+            print(f"🔥 FinBERT servi par le démon {self.url}")
+
+    def _remote(self, texts):
+        telemetry.count("finbert_daemon_calls")
+        payload = json.dumps({"model": self.model_name, "texts": texts, "all_scores": self.all_scores, "backend": self.backend}).encode("utf-8")
+        request = urllib.request.Request(f"{self.url}/classify", data=payload, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                return json.loads(response.read())["results"]
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"[FinBERT daemon] {json.loads(e.read()).get('error', e)}") from e
+
+    def _local(self, texts, **kwargs):
+        if self._model is None:
+            print(f"🔁 Chargement {self.model_name} ({self.backend}, local)...")
+            self._model = build_classifier(self.model_name, self.backend)
+        return classify_texts(self._model, texts, self.all_scores, **kwargs)
+
+    def _compute(self, texts, **kwargs):
+        # Démon tombé en cours de run : repli local pour la suite
+        if self.url:
+            try:
+                return self._remote(texts)
+            except OSError as e:
+                print(f"⚠️ Démon FinBERT injoignable ({e}), repli sur le modèle local")
+                self.url = None
+        return self._local(texts, **kwargs)
+
+    # 📨 Textes → [{"label", "score"}] (ou [probabilités par classe] si all_scores)
+    def __call__(self, texts, **kwargs):
+        texts = list(texts)
+        if not texts:
+            return []
+        if self.memo is not None:
+            template = f"{TASK}|all" if self.all_scores else TASK
+            return memoize_batch(self.memo, model_id(self.model_name, self.backend), template, texts, lambda missing: self._compute(missing, **kwargs))
+        return self._compute(texts, **kwargs)
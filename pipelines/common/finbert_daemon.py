@@ -0,0 +1,142 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+from aiohttp import web
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.finbert_worker import FinbertWorker, FINBERT_DEFAULTS, MODEL_NAME, model_id, add_finbert_arguments, finbert_config_from_args
+from pipelines.common.finbert_client import DAEMON_ENV, daemon_available
+
+# 🔥 Démon d'inférence FinBERT local (HTTP sur 127.0.0.1)
+# Les modèles restent chargés d'une étape à l'autre : tasks.py le démarre avant le DAG,
+# chaque script s'y connecte via FINBERT_DAEMON_URL (pipelines/common/finbert_client.py)
+# et retombe sur un modèle local si le démon est absent.
+# - un FinbertWorker par (modèle, mode, backend) chargé à la première requête (ou --preload) :
+#   les textes de tous les clients partagent ses lots dynamiques
+# - POST /classify {"model", "texts", "all_scores", "backend"} → {"results": [...]}
+# - GET /health → modèles chargés, requêtes/textes servis
+#   python pipelines/common/finbert_daemon.py --port 8765 --preload ProsusAI/finbert
+
+DAEMON_DEFAULTS = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "startup_timeout": 30.0
+}
+
+
+class FinbertDaemon:
+    def __init__(self, finbert_config=None):
+        self.finbert_config = finbert_config or {}
+        self.workers = {}
+        self.loading = {}
+        self.stats = {"requests": 0, "texts": 0}
+        self.started = time.time()
+
+    async def worker(self, model_name, all_scores, backend=None):
+        backend = backend or self.finbert_config.get("backend") or FINBERT_DEFAULTS["backend"]
+        key = (model_name, all_scores, backend)
+        if key not in self.loading:
+            print(f"🔁 Chargement {model_name} ({backend}){' toutes classes' if all_scores else ''}...", flush=True)
+            worker = FinbertWorker(model_name, all_scores=all_scores, **{**self.finbert_config, "backend": backend})
+            self.loading[key] = asyncio.ensure_future(worker.start())
+        try:
+            self.workers[key] = await self.loading[key]
+        except Exception:
+            # Chargement en échec (modèle introuvable...) : retenté à la requête suivante
+            self.loading.pop(key, None)
+            raise
+        return self.workers[key]
+
+    async def classify(self, request):
+        body = await request.json()
+        texts = body.get("texts") or []
+        try:
+            worker = await self.worker(body.get("model") or MODEL_NAME, bool(body.get("all_scores")), body.get("backend"))
+            results = await worker.classify(texts)
+        except Exception as e:
+            return web.json_response({"error": f"{type(e).__name__}: {e}"}, status=500)
+        self.stats["requests"] += 1
+        self.stats["texts"] += len(texts)
+        return web.json_response({"results": results})
+
+    async def health(self, request):
+        return web.json_response({
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 1),
+            "models": [f"{model_id(name, backend)}{'|all' if all_scores else ''}" for name, all_scores, backend in self.workers],
+            **self.stats
+        })
+
+    async def close(self, app):
+        for worker in self.workers.values():
+            await worker.close()
+        print(f"🛑 Démon FinBERT arrêté ({self.stats['requests']} requêtes, {self.stats['texts']} textes)", flush=True)
+
+
+def create_app(daemon, preload=()):
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/classify", daemon.classify)
+    app.router.add_get("/health", daemon.health)
+
+    async def warm_up(app):
+        for model_name in preload:
+            asyncio.ensure_future(daemon.worker(model_name, False))
+
+    app.on_startup.append(warm_up)
+    app.on_cleanup.append(daemon.close)
+    return app
+
+
+# 🚀 Lancement depuis tasks.py : process détaché, prêt quand /health répond
+# → (process, url) ; (None, None) si le démon ne démarre pas (les étapes chargent alors leur modèle)
+def start_daemon(port=None, preload=(MODEL_NAME,), log_path=None, timeout=None):
+    port = port or DAEMON_DEFAULTS["port"]
+    url = f"http://{DAEMON_DEFAULTS['host']}:{port}"
+    if daemon_available(url):
+        print(f"♻️ Démon FinBERT déjà actif sur {url}")
+        return None, url
+
+    log = open(log_path, "a", encoding="utf-8") if log_path else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--port", str(port), *(a for m in preload for a in ("--preload", m))],
+        stdout=log, stderr=subprocess.STDOUT, cwd=BASE_DIR
+    )
+    deadline = time.monotonic() + (timeout or DAEMON_DEFAULTS["startup_timeout"])
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        if daemon_available(url):
+            print(f"🔥 Démon FinBERT prêt sur {url} (pid {process.pid})")
+            return process, url
+        time.sleep(0.2)
+    print("⚠️ Démon FinBERT indisponible : chaque étape chargera son propre modèle")
+    stop_daemon(process)
+    return None, None
+
+
+def stop_daemon(process):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=DAEMON_DEFAULTS["host"])
+    parser.add_argument("--port", type=int, default=DAEMON_DEFAULTS["port"])
+    parser.add_argument("--preload", action="append", default=[], help="Modèle chargé dès le démarrage (répétable)")
+    add_finbert_arguments(parser)
+    args = parser.parse_args()
+
+    daemon = FinbertDaemon(finbert_config_from_args(args))
+    print(f"🔥 Démon FinBERT sur http://{args.host}:{args.port} (clients : {DAEMON_ENV}=http://{args.host}:{args.port})", flush=True)
+    web.run_app(create_app(daemon, args.preload), host=args.host, port=args.port, print=None)
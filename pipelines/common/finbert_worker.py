@@ -0,0 +1,179 @@
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pipelines.common import telemetry
+from pipelines.common.memo import amemoize_batch
+from pipelines.common.stream import MicroBatcher
+
+# 🤖 Service d'inférence FinBERT partagé par tous les tickers en cours
+# - les textes de toutes les coroutines sont regroupés en lots dynamiques
+#   (taille max ou attente max, au premier atteint)
+# - les passes du modèle tournent dans un pool de processus (un modèle par process,
+#   débit proportionnel aux cœurs) : la boucle asyncio n'est jamais bloquée
+# - chaque texte reçoit un future ; une erreur du lot est propagée à ses futures
+# - avec un mémo (pipelines/common/memo.py), les textes déjà classés ne sont pas recalculés
+# - all_scores=True : probabilités de toutes les classes, dans l'ordre id2label du modèle
+# - backend (FINBERT_BACKEND ou --finbert-backend) :
+#     torch      FP32 PyTorch (référence)
+#     int8       quantification dynamique INT8 des couches Linear (torch seul)
+#     onnx       export ONNX Runtime FP32 (optimum[onnxruntime])
+#     onnx-int8  export ONNX quantifié INT8 dynamique (le plus rapide sur CPU)
+#   les exports ONNX sont mis en cache dans data/cache/onnx/ ; parité des labels
+#   vs FP32 : python benchmarks/bench_finbert.py
+
+MODEL_NAME = "ProsusAI/finbert"
+TASK = "sentiment-analysis"
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+ONNX_DIR = os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")), "data", "cache", "onnx")
+
+FINBERT_DEFAULTS = {
+    "workers": max(1, min(os.cpu_count() or 1, 4)),
+    "max_batch": 32,
+    "max_wait_ms": 20.0,
+    "backend": os.getenv("FINBERT_BACKEND", "torch")
+}
+
+_model = None
+
+
+# 🏷️ Identifiant du modèle pour le mémo : les backends accélérés ont leurs propres entrées
+def model_id(model_name, backend="torch"):
+    return model_name if backend == "torch" else f"{model_name}|{backend}"
+
+
+def _onnx_model(model_name, quantize):
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError:
+        raise RuntimeError("❌ Backend ONNX indisponible : pip install optimum[onnxruntime]")
+    export_dir = os.path.join(ONNX_DIR, model_name.replace("/", "__"))
+    fp32_dir = os.path.join(export_dir, "fp32")
+    if not os.path.exists(os.path.join(fp32_dir, "model.onnx")):
+        print(f"📦 Export ONNX de {model_name} → {fp32_dir}")
+        ORTModelForSequenceClassification.from_pretrained(model_name, export=True).save_pretrained(fp32_dir)
+    if not quantize:
+        return ORTModelForSequenceClassification.from_pretrained(fp32_dir)
+
+    int8_dir = os.path.join(export_dir, "int8")
+    if not os.path.exists(os.path.join(int8_dir, "model_quantized.onnx")):
+        print(f"📦 Quantification INT8 de l'export ONNX → {int8_dir}")
+        quantizer = ORTQuantizer.from_pretrained(fp32_dir)
+        quantizer.quantize(save_dir=int8_dir, quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False))
+    return ORTModelForSequenceClassification.from_pretrained(int8_dir, file_name="model_quantized.onnx")
+
+
+# 🏗️ Pipeline transformers de classification pour un backend donné
+def build_classifier(model_name, backend="torch"):
+    from transformers import pipeline
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend FinBERT inconnu : {backend} (choix : {', '.join(BACKENDS)})")
+    if backend == "torch":
+        return pipeline(TASK, model=model_name, device=-1)
+
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == "int8":
+        import torch
+        from transformers import AutoModelForSequenceClassification
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    else:
+        model = _onnx_model(model_name, quantize=backend == "onnx-int8")
+    return pipeline(TASK, model=model, tokenizer=tokenizer, device=-1)
+
+
+# 📨 Passe du classifieur : top label, ou probabilités de toutes les classes (ordre id2label)
+def classify_texts(classifier, texts, all_scores=False, **kwargs):
+    kwargs.setdefault("truncation", True)
+    if not all_scores:
+        return classifier(texts, **kwargs)
+    id2label = classifier.model.config.id2label
+    labels = [id2label[i] for i in range(len(id2label))]
+    results = classifier(texts, top_k=None, **kwargs)
+    return [[next(r["score"] for r in scores if r["label"] == label) for label in labels] for scores in results]
+
+
+# 🔧 Chargement du modèle, une fois par process (ou par thread unique si workers=0)
+def _load_model(model_name, threads, backend="torch"):
+    global _model
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    _model = build_classifier(model_name, backend)
+
+
+def _predict(texts, batch_size, all_scores=False):
+    return classify_texts(_model, texts, all_scores, batch_size=batch_size)
+
+
+class FinbertWorker:
+    def __init__(self, model_name=MODEL_NAME, workers=None, max_batch=None, max_wait_ms=None, memo=None, all_scores=False, backend=None):
+        self.model_name = model_name
+        self.all_scores = all_scores
+        self.backend = backend or FINBERT_DEFAULTS["backend"]
+        self.memo = memo
+        self.workers = FINBERT_DEFAULTS["workers"] if workers is None else workers
+        self.max_batch = max_batch or FINBERT_DEFAULTS["max_batch"]
+        self.max_wait = (FINBERT_DEFAULTS["max_wait_ms"] if max_wait_ms is None else max_wait_ms) / 1000
+        self._executor = None
+        self._batcher = None
+
+    async def start(self):
+        cores = os.cpu_count() or 1
+        if self.workers > 0:
+            # Un thread torch par cœur disponible, répartis entre les process
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_load_model,
+                initargs=(self.model_name, max(1, cores // self.workers), self.backend)
+            )
+        else:
+            # Mode sans process : un thread dédié, modèle chargé dans ce process
+            self._executor = ThreadPoolExecutor(max_workers=1)
+            await asyncio.get_running_loop().run_in_executor(self._executor, _load_model, self.model_name, 0, self.backend)
+        # Autant de lots en vol que de workers : les suivants continuent de grossir
+        self._batcher = MicroBatcher(self._infer, self.max_batch, self.max_wait, max_inflight=max(self.workers, 1))
+        self._batcher.start()
+        return self
+
+    async def close(self):
+        if self._batcher:
+            await self._batcher.close()
+        if self._executor:
+            self._executor.shutdown()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # 📨 Classe une liste de textes → [{"label": ..., "score": ...}] dans le même ordre
+    async def classify(self, texts):
+        if not texts:
+            return []
+        if self.memo is not None:
+            return await amemoize_batch(self.memo, model_id(self.model_name, self.backend), f"{TASK}|all" if self.all_scores else TASK, texts, self._batcher.submit)
+        return await self._batcher.submit(texts)
+
+    async def _infer(self, texts):
+        telemetry.count("finbert_batches")
+        telemetry.count("finbert_texts", len(texts))
+        return await asyncio.get_running_loop().run_in_executor(self._executor, _predict, texts, self.max_batch, self.all_scores)
+
+
+def add_finbert_arguments(parser):
+    parser.add_argument("--finbert-workers", type=int, default=FINBERT_DEFAULTS["workers"], help="Process d'inférence FinBERT (0 = un thread dans ce process)")
+    parser.add_argument("--finbert-batch", type=int, default=FINBERT_DEFAULTS["max_batch"], help="Taille max d'un lot FinBERT")
+    parser.add_argument("--finbert-wait-ms", type=float, default=FINBERT_DEFAULTS["max_wait_ms"], help="Attente max avant d'envoyer un lot incomplet (ms)")
+    parser.add_argument("--finbert-backend", choices=BACKENDS, default=FINBERT_DEFAULTS["backend"], help="Exécution CPU : torch FP32, int8 (quantifié), onnx, onnx-int8")
+    return parser
+
+
+def finbert_config_from_args(args):
+    return {
+        "workers": args.finbert_workers,
+        "max_batch": args.finbert_batch,
+        "max_wait_ms": args.finbert_wait_ms,
+        "backend": args.finbert_backend
+    }
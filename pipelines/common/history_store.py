@@ -0,0 +1,215 @@
+import os
+import sys
+import glob
+import argparse
+from datetime import datetime, timedelta
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.table_store import TABLES, apply_schema
+
+# 🕰️ Historique des tables quotidiennes en Parquet partitionné par date
+# data/history/<table>/day=YYYY-MM-DD.parquet : lignes d'un jour, triées par ticker
+# data/history/<table>/month=YYYY-MM.parquet  : jours compactés, triés par (ticker, date)
+# - append : la partition du jour est réécrite (relance idempotente)
+# - history : série d'un ou plusieurs tickers en une lecture ; les fichiers hors période
+#   sont écartés par leur nom, les row groups hors ticker par leurs statistiques Parquet
+# - compact : les jours des mois écoulés depuis plus de compact_after_days → un fichier par mois
+# - prune : suppression des lignes au-delà de retention_days
+#   python pipelines/common/history_store.py query --ticker AAPL --days 90 --columns QualityScore
+#   python pipelines/common/history_store.py maintain
+
+HISTORY_DIR = os.path.join(BASE_DIR, "data", "history")
+
+# Table → colonnes ticker et date d'extraction
+HISTORY_TABLES = {
+    "df_final_merged": {"ticker": "Ticker", "date": "ExtractionDate"},
+    "df_sentiment_full": {"ticker": "ticker", "date": "extraction_date"}
+}
+
+# dtype table_store → type Arrow (schéma de lecture commun à toutes les partitions)
+ARROW_TYPES = {
+    "string": pa.string(),
+    "float64": pa.float64(),
+    "Int64": pa.int64()
+}
+
+HISTORY_DEFAULTS = {
+    "retention_days": 730,
+    "compact_after_days": 35,
+    "row_group_size": 1024
+}
+
+
+def _table_dir(table, history_dir=HISTORY_DIR):
+    return os.path.join(history_dir, table)
+
+
+# Fichiers de la table → [(première date, dernière date, chemin)] triés
+def partitions(table, history_dir=HISTORY_DIR):
+    found = []
+    for path in glob.glob(os.path.join(_table_dir(table, history_dir), "*.parquet")):
+        kind, _, value = os.path.basename(path)[:-len(".parquet")].partition("=")
+        if kind == "day":
+            found.append((value, value, path))
+        elif kind == "month":
+            found.append((f"{value}-01", f"{value}-31", path))
+    return sorted(found)
+
+
+def _write(df, path, sort_by, row_group_size=None):
+    df = df.sort_values(sort_by, kind="stable").reset_index(drop=True)
+    tmp_path = f"{path}.tmp"
+    pq.write_table(
+        pa.Table.from_pandas(df, preserve_index=False), tmp_path,
+        row_group_size=row_group_size or HISTORY_DEFAULTS["row_group_size"], write_statistics=True
+    )
+    os.replace(tmp_path, path)
+
+
+# ➕ Lignes du jour → {date: lignes écrites} (une partition par date d'extraction)
+def append(table, df, date=None, history_dir=HISTORY_DIR):
+    columns = HISTORY_TABLES[table]
+    df = apply_schema(table, df) if table in TABLES else df.copy()
+    fallback = date or datetime.now().strftime("%Y-%m-%d")
+    df[columns["date"]] = df[columns["date"]].fillna(fallback).astype("string")
+    df = df.dropna(subset=[columns["ticker"]])
+
+    os.makedirs(_table_dir(table, history_dir), exist_ok=True)
+    written = {}
+    for day, rows in df.groupby(columns["date"], sort=True):
+        path = os.path.join(_table_dir(table, history_dir), f"day={day}.parquet")
+        rows = rows.drop_duplicates(subset=[columns["ticker"]], keep="last")
+        _write(rows, path, [columns["ticker"]])
+        written[day] = len(rows)
+    return written
+
+
+def _filter(columns, tickers, start, end):
+    conditions = []
+    if tickers:
+        conditions.append(ds.field(columns["ticker"]).isin(list(tickers)))
+    if start:
+        conditions.append(ds.field(columns["date"]) >= start)
+    if end:
+        conditions.append(ds.field(columns["date"]) <= end)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+# 🧬 Schéma de lecture : types déclarés dans table_store, puis colonnes hors schéma dans leur
+# premier type non nul (sinon une colonne entièrement vide dans la première partition, typée
+# null, ferait échouer ou tronquer la lecture des suivantes)
+def _schema(table, files):
+    fields = {name: ARROW_TYPES[dtype] for name, dtype in TABLES.get(table, {}).items()}
+    for path in files:
+        for field in pq.read_schema(path):
+            if field.name.startswith("__index_level_"):
+                continue
+            if field.name not in fields or pa.types.is_null(fields[field.name]):
+                fields[field.name] = field.type
+    return pa.schema(list(fields.items()))
+
+
+# 🔎 Série temporelle : tickers (str ou liste), bornes ISO incluses, colonnes projetées
+def history(table, tickers=None, start=None, end=None, columns=None, history_dir=HISTORY_DIR):
+    keys = HISTORY_TABLES[table]
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    files = [path for first, last, path in partitions(table, history_dir)
+             if (not start or last >= start) and (not end or first <= end)]
+    if not files:
+        return pd.DataFrame(columns=[keys["ticker"], keys["date"], *(columns or [])])
+
+    dataset = ds.dataset(files, format="parquet", schema=_schema(table, files))
+    if columns is not None:
+        available = set(dataset.schema.names)
+        columns = [keys["ticker"], keys["date"]] + [c for c in columns if c in available and c not in keys.values()]
+    df = dataset.to_table(columns=columns, filter=_filter(keys, tickers, start, end)).to_pandas()
+    return df.sort_values([keys["ticker"], keys["date"]], kind="stable").reset_index(drop=True)
+
+
+# 🗜️ Jours des mois terminés avant la limite → un fichier par mois (fusionné avec l'existant)
+def compact(table, older_than_days=None, history_dir=HISTORY_DIR):
+    keys = HISTORY_TABLES[table]
+    older_than_days = HISTORY_DEFAULTS["compact_after_days"] if older_than_days is None else older_than_days
+    cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime("%Y-%m-%d")
+
+    months = {}
+    for first, _, path in partitions(table, history_dir):
+        if os.path.basename(path).startswith("day="):
+            months.setdefault(first[:7], []).append(path)
+
+    compacted = 0
+    for month, days in sorted(months.items()):
+        # Mois entièrement antérieur à la limite (dernier jour possible < cutoff)
+        if f"{month}-31" >= cutoff:
+            continue
+        month_path = os.path.join(_table_dir(table, history_dir), f"month={month}.parquet")
+        sources = ([month_path] if os.path.exists(month_path) else []) + days
+        merged = pd.concat([pd.read_parquet(p) for p in sources], ignore_index=True)
+        merged = merged.drop_duplicates(subset=[keys["ticker"], keys["date"]], keep="last")
+        _write(merged, month_path, [keys["ticker"], keys["date"]])
+        for path in days:
+            os.remove(path)
+        compacted += len(days)
+    return compacted
+
+
+# ✂️ Rétention : fichiers entièrement trop anciens supprimés, mois à cheval réécrits
+def prune(table, retention_days=None, history_dir=HISTORY_DIR):
+    keys = HISTORY_TABLES[table]
+    retention_days = HISTORY_DEFAULTS["retention_days"] if retention_days is None else retention_days
+    cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+
+    removed = 0
+    for first, last, path in partitions(table, history_dir):
+        if last < cutoff:
+            removed += pq.read_metadata(path).num_rows
+            os.remove(path)
+        elif first < cutoff:
+            df = pd.read_parquet(path)
+            kept = df[df[keys["date"]] >= cutoff]
+            removed += len(df) - len(kept)
+            _write(kept, path, [keys["ticker"], keys["date"]])
+    return removed
+
+
+def maintain(tables=None, retention_days=None, compact_after_days=None, history_dir=HISTORY_DIR):
+    for table in tables or HISTORY_TABLES:
+        compacted = compact(table, compact_after_days, history_dir)
+        removed = prune(table, retention_days, history_dir)
+        print(f"🗜️ {table} : {compacted} jours compactés, {removed} lignes hors rétention supprimées, "
+              f"{len(partitions(table, history_dir))} fichiers")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history-dir", default=HISTORY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser("query", help="Série temporelle d'un ou plusieurs tickers")
+    query.add_argument("--table", choices=list(HISTORY_TABLES), default="df_final_merged")
+    query.add_argument("--ticker", action="append", required=True, help="Répétable")
+    query.add_argument("--days", type=int, default=90, help="Profondeur en jours (ignorée si --start)")
+    query.add_argument("--start", help="Date ISO de début")
+    query.add_argument("--end", help="Date ISO de fin")
+    query.add_argument("--columns", nargs="+", help="Colonnes projetées (par défaut toutes)")
+
+    maintenance = commands.add_parser("maintain", help="Compaction puis rétention")
+    maintenance.add_argument("--retention-days", type=int, default=HISTORY_DEFAULTS["retention_days"])
+    maintenance.add_argument("--compact-after-days", type=int, default=HISTORY_DEFAULTS["compact_after_days"])
+    args = parser.parse_args()
+
+    if args.command == "query":
+        start = args.start or (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d")
+        df = history(args.table, args.ticker, start, args.end, args.columns, args.history_dir)
+        print(df.to_string(index=False) if not df.empty else "⚠️ Aucune ligne dans l'historique")
+    else:
+        maintain(retention_days=args.retention_days, compact_after_days=args.compact_after_days, history_dir=args.history_dir)
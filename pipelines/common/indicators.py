@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+# 📐 Moteur d'indicateurs techniques vectorisé (toute la cote d'un coup)
+# Entrée : matrice de clôtures (dates × tickers). Chaque colonne est traitée comme
+# la série `hist['Close'].dropna()` du ticker, avec les mêmes conventions que `ta`
+# (fillna=False) : RSI 14, SMA 20/50, MACD 12/26, ROC 10, Bollinger %B 20/2.
+
+INDICATOR_COLUMNS = ["RSI_14", "SMA20_above_SMA50", "MACD", "Momentum_10", "BB_Percent"]
+
+RSI_WINDOW = 14
+SMA_FAST, SMA_SLOW = 20, 50
+MACD_FAST, MACD_SLOW = 12, 26
+ROC_WINDOW = 10
+BB_WINDOW, BB_DEV = 20, 2
+
+
+# 🔧 Aligne chaque colonne sur sa dernière observation (NaN de tête = jours sans cotation)
+def _right_align(values):
+    order = np.argsort(~np.isnan(values), axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0), order
+
+
+# 🔁 EWM (adjust=False) vectorisée sur les colonnes, démarrant à la 1re valeur valide
+def _ewm_last(values, alpha):
+    state = np.full(values.shape[1], np.nan)
+    for row in values:
+        started = ~np.isnan(state)
+        state = np.where(started, (1 - alpha) * state + alpha * row, row)
+    return state
+
+
+def _window_last(aligned, window):
+    return aligned[-window:] if len(aligned) >= window else np.full((window, aligned.shape[1]), np.nan)
+
+
+# ⚡ Chemin rapide : uniquement la dernière valeur de chaque indicateur
+def latest_indicators(close):
+    if close.shape[1] == 0:
+        return pd.DataFrame(columns=["Ticker"] + INDICATOR_COLUMNS)
+
+    aligned, _ = _right_align(close.to_numpy(dtype=float))
+    n_obs = (~np.isnan(aligned)).sum(axis=0)
+    last = aligned[-1] if len(aligned) else np.full(aligned.shape[1], np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # RSI (lissage de Wilder) — la 1re variation vaut 0 comme dans `ta`
+        diff = np.diff(aligned, axis=0, prepend=np.nan)
+        observed = ~np.isnan(aligned)
+        up = np.where(observed, np.where(diff > 0, diff, 0.0), np.nan)
+        down = np.where(observed, np.where(diff < 0, -diff, 0.0), np.nan)
+        ema_up = _ewm_last(up, 1 / RSI_WINDOW)
+        ema_down = _ewm_last(down, 1 / RSI_WINDOW)
+        rsi = np.where(ema_down == 0, 100, 100 - 100 / (1 + ema_up / ema_down))
+        rsi = np.where(n_obs >= RSI_WINDOW, rsi, np.nan)
+
+        # SMA 20 / 50
+        sma_fast = _window_last(aligned, SMA_FAST).mean(axis=0)
+        sma_slow = _window_last(aligned, SMA_SLOW).mean(axis=0)
+
+        # MACD 12 / 26
+        ema_fast = _ewm_last(aligned, 2 / (MACD_FAST + 1))
+        ema_slow = _ewm_last(aligned, 2 / (MACD_SLOW + 1))
+        macd = np.where(n_obs >= MACD_SLOW, ema_fast - ema_slow, np.nan)
+
+        # ROC 10
+        previous = aligned[-ROC_WINDOW - 1] if len(aligned) > ROC_WINDOW else np.full(aligned.shape[1], np.nan)
+        roc = (last - previous) / previous * 100
+
+        # Bollinger %B 20 / 2
+        window = _window_last(aligned, BB_WINDOW)
+        mavg = window.mean(axis=0)
+        mstd = window.std(axis=0, ddof=0)
+        hband = mavg + BB_DEV * mstd
+        lband = mavg - BB_DEV * mstd
+        bb_pct = (last - lband) / (hband - lband)
+
+    return pd.DataFrame({
+        "Ticker": close.columns,
+        "RSI_14": rsi,
+        "SMA20_above_SMA50": (sma_fast > sma_slow).astype(int),
+        "MACD": macd,
+        "Momentum_10": roc,
+        "BB_Percent": bb_pct
+    })
+
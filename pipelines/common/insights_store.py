@@ -0,0 +1,191 @@
+import os
+import json
+import math
+import sqlite3
+import argparse
+from datetime import datetime
+
+# 🗂️ Store unique des fiches sociétés (SQLite, une ligne par ticker et par section)
+# Les sections sont les clés de premier niveau des anciennes fiches JSON
+# (fundamentals, visual_data, news_sentiment, ...). Chaque étape n'écrit que ses
+# sections, en une seule transaction ; l'export JSON par ticker (frontend) se fait
+# à la demande et ne réécrit que les fichiers dont le contenu a changé.
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+INSIGHTS_DB = os.path.join(BASE_DIR, "data", "insights.sqlite")
+EXPORT_DIR = os.path.join(BASE_DIR, "output", "insights_enriched_all")
+
+DOCUMENT_ORDER = [
+    "ticker", "name", "sector", "market_cap", "source_list", "fundamentals", "technical_indicators",
+    "scores", "volatility", "beta", "return_6m", "analyst_rating", "visual_data", "news_sentiment",
+    "extraction_date"
+]
+
+
+# 🧽 NaN / inf → None (JSON strict, ce que faisait clean_json_files.py après coup)
+def sanitize(obj):
+    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
+        return None
+    elif isinstance(obj, dict):
+        return {k: sanitize(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [sanitize(i) for i in obj]
+    return obj
+
+
+def _dumps(value):
+    return json.dumps(sanitize(value), ensure_ascii=False, allow_nan=False, default=str)
+
+
+def _order(document):
+    keys = sorted(document, key=lambda k: (DOCUMENT_ORDER.index(k) if k in DOCUMENT_ORDER else len(DOCUMENT_ORDER), k))
+    return {k: document[k] for k in keys}
+
+
+class InsightsStore:
+    def __init__(self, path=INSIGHTS_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sections (
+                ticker TEXT NOT NULL,
+                section TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (ticker, section)
+            ) WITHOUT ROWID
+        """)
+        # Marqueurs (ex. migration des fiches JSON déjà faite)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def tickers(self):
+        return [row[0] for row in self.conn.execute("SELECT DISTINCT ticker FROM sections ORDER BY ticker")]
+
+    # ✍️ Upsert de sections : itérable de (ticker, section, valeur), une transaction
+    def upsert_sections(self, rows):
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO sections (ticker, section, data, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (ticker, section) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+                """,
+                ((ticker, section, _dumps(value), now) for ticker, section, value in rows)
+            )
+
+    # 🆕 Remplace entièrement les fiches données ({ticker: document}), une transaction
+    def put_documents(self, documents):
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.executemany("DELETE FROM sections WHERE ticker = ?", ((t,) for t in documents))
+            self.conn.executemany(
+                "INSERT INTO sections (ticker, section, data, updated_at) VALUES (?, ?, ?, ?)",
+                ((ticker, section, _dumps(value), now) for ticker, doc in documents.items() for section, value in doc.items())
+            )
+
+    # 📖 Fiches reconstituées, éventuellement limitées à certaines sections → (ticker, document)
+    def iter_documents(self, sections=None, tickers=None):
+        query = "SELECT ticker, section, data FROM sections"
+        clauses, params = [], []
+        if sections is not None:
+            clauses.append(f"section IN ({','.join('?' * len(sections))})")
+            params.extend(sections)
+        if tickers is not None:
+            clauses.append(f"ticker IN ({','.join('?' * len(tickers))})")
+            params.extend(tickers)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY ticker"
+
+        current, document = None, {}
+        for ticker, section, data in self.conn.execute(query, params):
+            if ticker != current:
+                if current is not None:
+                    yield current, _order(document)
+                current, document = ticker, {}
+            document[section] = json.loads(data)
+        if current is not None:
+            yield current, _order(document)
+
+    def get_document(self, ticker, sections=None):
+        for _, document in self.iter_documents(sections=sections, tickers=[ticker]):
+            return document
+        return None
+
+    # 📤 Export JSON par ticker (frontend) : seuls les fichiers modifiés sont réécrits
+    def export_json(self, directory=EXPORT_DIR, tickers=None):
+        os.makedirs(directory, exist_ok=True)
+        written = unchanged = 0
+        for ticker, document in self.iter_documents(tickers=tickers):
+            content = json.dumps(document, indent=2, ensure_ascii=False)
+            path = os.path.join(directory, f"{ticker}.json")
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    if f.read() == content:
+                        unchanged += 1
+                        continue
+            except OSError:
+                pass
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            written += 1
+        return written, unchanged
+
+    # 📥 Migration : import des anciennes fiches JSON d'un dossier
+    def import_json(self, directory=EXPORT_DIR):
+        documents = {}
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+                    documents[filename[:-len(".json")]] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Fiche ignorée {filename} : {e}")
+        self.put_documents(documents)
+        return len(documents)
+
+    # 🏷️ Migration unique des anciennes fiches JSON, repérée par un marqueur dans le store
+    # (et non par un store vide) → fiches importées, None si déjà faite
+    def migrate_json(self, directory=EXPORT_DIR):
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return None
+        count = self.import_json(directory) if os.path.isdir(directory) else 0
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (datetime.now().isoformat(timespec="seconds"),)
+            )
+        return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store des fiches sociétés")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Exporte les fiches en JSON par ticker")
+    export_parser.add_argument("--dir", default=EXPORT_DIR)
+    export_parser.add_argument("tickers", nargs="*", help="Tickers à exporter (tous par défaut)")
+    import_parser = subparsers.add_parser("import", help="Importe un dossier de fiches JSON existant")
+    import_parser.add_argument("--dir", default=EXPORT_DIR)
+    args = parser.parse_args()
+
+    with InsightsStore() as store:
+        if args.command == "export":
+            written, unchanged = store.export_json(args.dir, tickers=args.tickers or None)
+            print(f"✅ {written} fiches exportées ({unchanged} inchangées) dans {args.dir}")
+        else:
+            count = store.import_json(args.dir)
+            print(f"✅ {count} fiches importées dans {store.path}")
@@ -0,0 +1,82 @@
+import json
+import asyncio
+from pipelines.common import telemetry
+
+# 📦 Mode « lot » des résumés LLM : N tickers par requête
+# Une requête contient les titres de plusieurs tickers (JSON) et la réponse attendue est
+# un objet JSON indexé par ticker : {"AAPL": {"summary": "...", "bullets": ["...", ...]}}.
+# Résumé et bullet points arrivent ensemble (une requête au lieu de deux par ticker).
+# Réponse invalide ou incomplète → le lot est coupé en deux et relancé ; un ticker seul
+# qui échoue encore est rendu à None (repli sur le mode ticker par ticker).
+# Les erreurs de transport levées par `call` (LLMError après les retries du client)
+# remontent telles quelles : ni découpage ni relance.
+# Désactivé par défaut dans enrich_sent_gpt.py (--llm-batch 1) : le prompt diffère du mode
+# ticker par ticker, donc les résumés produits aussi.
+
+BATCH_TEMPLATE = """Tu es un analyste financier senior spécialisé en analyse fondamentale.
+Voici, pour plusieurs entreprises cotées, les titres d’actualités économiques récents (JSON, indexé par ticker) :
+{headlines}
+
+🎯 Pour CHAQUE ticker :
+- "summary" : une synthèse courte (3-4 phrases), en français, orientée investisseur francophone, qui fait ressortir les signaux forts et indique si l’actualité influence le sentiment de marché. Pas de liste.
+- "bullets" : au plus 5 bullet points concis en français, limités aux informations susceptibles d’avoir un impact sur le prix de l’action (résultats, recommandations d’analystes, dividendes, M&A, contrats majeurs, régulation).
+
+✍️ Réponds UNIQUEMENT avec un objet JSON dont les clés sont exactement les tickers fournis :
+{{"TICKER": {{"summary": "...", "bullets": ["...", "..."]}}}}
+"""
+
+
+def build_batch_prompt(headlines):
+    return BATCH_TEMPLATE.format(headlines=json.dumps(headlines, ensure_ascii=False, indent=1))
+
+
+# ✅ Validation : entrées bien formées gardées, tickers manquants ou invalides rendus à part
+def parse_batch_response(text, tickers):
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return {}, list(tickers)
+    if not isinstance(data, dict):
+        return {}, list(tickers)
+
+    valid, invalid = {}, []
+    for ticker in tickers:
+        entry = data.get(ticker)
+        if (
+            isinstance(entry, dict)
+            and isinstance(entry.get("summary"), str) and entry["summary"].strip()
+            and isinstance(entry.get("bullets"), list)
+            and all(isinstance(b, str) for b in entry["bullets"])
+        ):
+            valid[ticker] = {
+                "summary": entry["summary"].strip(),
+                "bullets": [b.strip() for b in entry["bullets"] if b.strip()][:5]
+            }
+        else:
+            invalid.append(ticker)
+    return valid, invalid
+
+
+# 🔁 Lot {ticker: [titres]} → {ticker: {"summary", "bullets"} ou None}
+# `call(prompt, n_tickers)` est une coroutine qui rend le texte brut de la réponse
+async def summarize_batch(call, headlines):
+    response = await call(build_batch_prompt(headlines), len(headlines))
+    results, invalid = parse_batch_response(response, list(headlines))
+    if not invalid:
+        return results
+
+    telemetry.count("llm_batch_retries")
+    if len(headlines) == 1:
+        results[invalid[0]] = None
+        return results
+
+    # Tickers invalides relancés ensemble ; si tout le lot est invalide, coupé en deux moitiés
+    retry = {t: headlines[t] for t in invalid}
+    if len(retry) == len(headlines):
+        tickers = list(retry)
+        halves = [tickers[:len(tickers) // 2], tickers[len(tickers) // 2:]]
+    else:
+        halves = [list(retry)]
+    for part in await asyncio.gather(*(summarize_batch(call, {t: retry[t] for t in half}) for half in halves)):
+        results.update(part)
+    return results
@@ -0,0 +1,238 @@
+import os
+import time
+import random
+import asyncio
+import collections
+from pipelines.common import telemetry
+
+# 🤖 Client LLM partagé (OpenAI chat.completions)
+# - estimation des tokens par requête (tiktoken si installé, sinon ~4 caractères/token)
+# - budgets requêtes/minute et tokens/minute (fenêtres glissantes ; les tokens réservés
+#   au-delà de l'usage réel sont rendus à la réponse)
+# - concurrence adaptative AIMD : +1 après une fenêtre de succès rapides, ÷2 sur 429,
+#   -1 si la latence dépasse la cible
+# - retries avec backoff + jitter (429, 5xx, timeouts, coupures), Retry-After respecté
+# - rapport de run : requêtes, tokens, coût estimé, latences p50/p95, 429
+# Les erreurs définitives lèvent LLMError : à l'appelant de choisir son repli.
+
+LLM_DEFAULTS = {
+    "model": "gpt-3.5-turbo",
+    "rpm": 3500,
+    "tpm": 160000,
+    "initial_concurrency": 6,
+    "min_concurrency": 1,
+    "max_concurrency": 48,
+    "target_latency": 20.0,
+    "retries": 6,
+    "timeout": 60.0
+}
+
+# 💲 USD par million de tokens (entrée, sortie) — tarifs publics, à tenir à jour
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00)
+}
+
+
+class LLMError(Exception):
+    pass
+
+
+def estimate_tokens(messages, model=LLM_DEFAULTS["model"]):
+    text = "".join(m["content"] for m in messages)
+    try:
+        import tiktoken
+        encoding = tiktoken.encoding_for_model(model)
+        return len(encoding.encode(text)) + 4 * len(messages)
+    except Exception:
+        return len(text) // 4 + 4 * len(messages)
+
+
+# 🪣 Budget par fenêtre glissante de 60 s (requêtes ou tokens), version asyncio
+# (fenêtre plutôt que seau : pas de rafale au-delà du quota au démarrage)
+class MinuteBudget:
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.window = collections.deque()
+
+    def _used(self):
+        now = time.monotonic()
+        while self.window and now - self.window[0][0] >= 60:
+            self.window.popleft()
+        return sum(entry[1] for entry in self.window)
+
+    async def acquire(self, amount):
+        amount = min(amount, self.capacity)
+        while self._used() + amount > self.capacity:
+            await asyncio.sleep(max(0.05, 60 - (time.monotonic() - self.window[0][0])))
+        entry = [time.monotonic(), amount]
+        self.window.append(entry)
+        return entry
+
+    # Réservation corrigée après coup (usage réel connu à la réponse)
+    def settle(self, entry, amount):
+        entry[1] = min(entry[1], amount)
+
+
+class LLMClient:
+    def __init__(self, model=None, rpm=None, tpm=None, max_concurrency=None, retries=None, timeout=None, client_factory=None):
+        self.model = model or LLM_DEFAULTS["model"]
+        self.requests_budget = MinuteBudget(rpm or LLM_DEFAULTS["rpm"])
+        self.tokens_budget = MinuteBudget(tpm or LLM_DEFAULTS["tpm"])
+        self.max_concurrency = max_concurrency or LLM_DEFAULTS["max_concurrency"]
+        self.limit = min(LLM_DEFAULTS["initial_concurrency"], self.max_concurrency)
+        self.retries = LLM_DEFAULTS["retries"] if retries is None else retries
+        self.timeout = timeout or LLM_DEFAULTS["timeout"]
+        self.client_factory = client_factory
+        self.in_flight = 0
+        self.successes = 0
+        self.stats = {"requests": 0, "failures": 0, "rate_limited": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.latencies = []
+        self._client = None
+        self._loop = None
+
+    # Client et primitives asyncio liés à la boucle courante (recréés si asyncio.run change de boucle)
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slot_freed = asyncio.Condition()
+            self._client = None
+        if self._client is None:
+            if self.client_factory:
+                self._client = self.client_factory()
+            else:
+                from openai import AsyncOpenAI
+                self._client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0, timeout=self.timeout)
+
+    async def _acquire_slot(self):
+        async with self._slot_freed:
+            await self._slot_freed.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def _release_slot(self):
+        async with self._slot_freed:
+            self.in_flight -= 1
+            self._slot_freed.notify_all()
+
+    # 📈 AIMD sur la concurrence
+    def _adapt(self, rate_limited=False, latency=None):
+        if rate_limited:
+            self.limit = max(LLM_DEFAULTS["min_concurrency"], self.limit // 2)
+            self.successes = 0
+        elif latency is not None and latency > LLM_DEFAULTS["target_latency"]:
+            self.limit = max(LLM_DEFAULTS["min_concurrency"], self.limit - 1)
+            self.successes = 0
+        else:
+            self.successes += 1
+            if self.successes >= self.limit:
+                self.limit = min(self.max_concurrency, self.limit + 1)
+                self.successes = 0
+
+    @staticmethod
+    def _retry_after(error):
+        response = getattr(error, "response", None)
+        try:
+            return float(response.headers.get("retry-after"))
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _is_transient(error):
+        status = getattr(error, "status_code", None)
+        if status is not None:
+            return status == 429 or status >= 500
+        return type(error).__name__ in ("APITimeoutError", "APIConnectionError", "TimeoutError")
+
+    # 💬 Une complétion → texte de la réponse
+    async def complete(self, messages, max_tokens=400, temperature=0.7, **kwargs):
+        self._bind()
+        estimated = estimate_tokens(messages, self.model) + max_tokens
+
+        for attempt in range(self.retries + 1):
+            await self.requests_budget.acquire(1)
+            reserved = await self.tokens_budget.acquire(estimated)
+            await self._acquire_slot()
+            started = time.monotonic()
+            telemetry.count("network_calls")
+            self.stats["requests"] += 1
+            try:
+                response = await self._client.chat.completions.create(
+                    model=self.model, messages=messages, max_tokens=max_tokens, temperature=temperature, **kwargs
+                )
+            except Exception as e:
+                await self._release_slot()
+                rate_limited = getattr(e, "status_code", None) == 429
+                # Seul un 429 réduit la concurrence ; les autres erreurs la laissent inchangée
+                # (seules les réponses reçues l'augmentent)
+                if rate_limited:
+                    self.stats["rate_limited"] += 1
+                    telemetry.count("llm_rate_limited")
+                    self._adapt(rate_limited=True)
+                if not self._is_transient(e) or attempt == self.retries:
+                    self.stats["failures"] += 1
+                    raise LLMError(f"{type(e).__name__}: {e}") from e
+                delay = self._retry_after(e) or random.uniform(0, min(60.0, 2 ** attempt))
+                await asyncio.sleep(delay)
+                continue
+
+            latency = time.monotonic() - started
+            await self._release_slot()
+            self._adapt(latency=latency)
+            self.latencies.append(latency)
+
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.stats["prompt_tokens"] += usage.prompt_tokens
+                self.stats["completion_tokens"] += usage.completion_tokens
+                telemetry.count("llm_prompt_tokens", usage.prompt_tokens)
+                telemetry.count("llm_completion_tokens", usage.completion_tokens)
+                # Tokens réservés mais non consommés rendus au budget
+                self.tokens_budget.settle(reserved, usage.total_tokens)
+            return response.choices[0].message.content or ""
+
+    async def aclose(self):
+        if self._client is not None and hasattr(self._client, "close"):
+            await self._client.close()
+        self._client = None
+
+    # Scripts synchrones : une boucle le temps de l'appel
+    def complete_sync(self, messages, **kwargs):
+        async def run():
+            try:
+                return await self.complete(messages, **kwargs)
+            finally:
+                await self.aclose()
+        return asyncio.run(run())
+
+    def cost(self):
+        price_in, price_out = MODEL_PRICES.get(self.model, (0.0, 0.0))
+        return (self.stats["prompt_tokens"] * price_in + self.stats["completion_tokens"] * price_out) / 1_000_000
+
+    def report(self):
+        latencies = sorted(self.latencies)
+        p50 = telemetry.percentile(latencies, 50) if latencies else 0.0
+        p95 = telemetry.percentile(latencies, 95) if latencies else 0.0
+        print(
+            f"🤖 LLM {self.model} : {self.stats['requests']} requêtes ({self.stats['rate_limited']} × 429, "
+            f"{self.stats['failures']} échecs), {self.stats['prompt_tokens']} + {self.stats['completion_tokens']} tokens, "
+            f"coût ≈ ${self.cost():.4f}, latence p50 {p50:.2f}s / p95 {p95:.2f}s, concurrence finale {self.limit}"
+        )
+
+
+def add_llm_arguments(parser):
+    parser.add_argument("--llm-model", default=LLM_DEFAULTS["model"], help="Modèle OpenAI")
+    parser.add_argument("--llm-rpm", type=int, default=LLM_DEFAULTS["rpm"], help="Budget requêtes/minute")
+    parser.add_argument("--llm-tpm", type=int, default=LLM_DEFAULTS["tpm"], help="Budget tokens/minute")
+    parser.add_argument("--llm-max-concurrency", type=int, default=LLM_DEFAULTS["max_concurrency"], help="Plafond de la concurrence adaptative")
+    return parser
+
+
+def llm_config_from_args(args):
+    return {
+        "model": args.llm_model,
+        "rpm": args.llm_rpm,
+        "tpm": args.llm_tpm,
+        "max_concurrency": args.llm_max_concurrency
+    }
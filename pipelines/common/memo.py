@@ -0,0 +1,88 @@
+import os
+import hashlib
+import unicodedata
+from pipelines.common.disk_cache import DiskCache
+
+# 🧠 Mémo persistant des résultats de modèles (FinBERT, LLM), adressé par contenu
+# Clé = hash(modèle, gabarit de prompt, texte normalisé) : un titre ou un bloc de titres
+# déjà vu un jour précédent ne repasse ni par l'inférence ni par une API payante.
+# Stockage : DiskCache (data/cache/memo/<nom>/), TTL + éviction LRU bornée en taille.
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+MEMO_DIR = os.path.join(BASE_DIR, "data", "cache", "memo")
+
+MEMO_DEFAULTS = {
+    "ttl_days": 30.0,
+    "max_mb": 256
+}
+
+_MEMOS = {}
+
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFKC", str(text)).split())
+
+
+def memo_key(model_id, template, text):
+    digest = hashlib.sha256(f"{model_id}\0{template}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+    return f"{model_id}|{digest}"
+
+
+def get_memo(name, ttl_days=None, max_mb=None):
+    ttl_days = MEMO_DEFAULTS["ttl_days"] if ttl_days is None else ttl_days
+    max_mb = max_mb or MEMO_DEFAULTS["max_mb"]
+    if name not in _MEMOS:
+        _MEMOS[name] = DiskCache(os.path.join(MEMO_DIR, name))
+    _MEMOS[name].ttl = ttl_days * 86400
+    _MEMOS[name].max_bytes = int(max_mb * 1024 * 1024)
+    return _MEMOS[name]
+
+
+# 📦 Résultats d'un lot de textes : mémo d'abord, `compute` (liste → liste) pour le reste
+# (un résultat None, échec du calcul, n'est pas mémorisé)
+def memoize_batch(memo, model_id, template, texts, compute):
+    keys = [memo_key(model_id, template, text) for text in texts]
+    results = [memo.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed = compute([texts[i] for i in missing])
+        for i, value in zip(missing, computed):
+            results[i] = value
+            if value is not None:
+                memo.set(keys[i], value)
+    return results
+
+
+async def amemoize_batch(memo, model_id, template, texts, compute):
+    keys = [memo_key(model_id, template, text) for text in texts]
+    results = [memo.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed = await compute([texts[i] for i in missing])
+        for i, value in zip(missing, computed):
+            results[i] = value
+            if value is not None:
+                memo.set(keys[i], value)
+    return results
+
+
+# 📊 Taux de hit par mémo, puis purge (TTL / taille max)
+def report_memos():
+    for name, memo in _MEMOS.items():
+        print(memo.stats_line(name))
+        removed = memo.prune()
+        if removed:
+            print(f"🧹 {removed} entrées expirées/anciennes retirées du mémo {name}")
+
+
+def add_memo_arguments(parser):
+    parser.add_argument("--memo-ttl-days", type=float, default=MEMO_DEFAULTS["ttl_days"], help="Durée de validité du mémo FinBERT/LLM (jours, 0 = désactivé)")
+    parser.add_argument("--memo-max-mb", type=float, default=MEMO_DEFAULTS["max_mb"], help="Taille max de chaque mémo (Mo)")
+    return parser
+
+
+def memo_config_from_args(args):
+    return {
+        "ttl_days": args.memo_ttl_days,
+        "max_mb": args.memo_max_mb
+    }
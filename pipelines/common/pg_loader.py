@@ -0,0 +1,236 @@
+import io
+import json
+import hashlib
+import pandas as pd
+from pipelines.common.table_store import TABLES
+
+# 🐘 Chargement PostgreSQL par COPY (psycopg2 via SQLAlchemy)
+# - types de colonnes déclarés explicitement (schémas de table_store, sinon dtype pandas)
+# - COPY FROM STDIN par blocs (CSV en mémoire) dans une table de staging
+# - mode "swap" : staging renommée à la place de la table, dans la même transaction
+#   (les lecteurs voient l'ancienne table jusqu'au commit, jamais une table à moitié chargée)
+# - mode "upsert" : INSERT ... ON CONFLICT sur la clé déclarée (ex. Ticker, ExtractionDate),
+#   les lignes des jours précédents restent en place
+# - load_documents : fiches JSON en JSONB, écrites seulement si leur contenu diffère de la
+#   dernière version stockée du ticker
+
+PG_TYPES = {
+    "string": "TEXT",
+    "float64": "DOUBLE PRECISION",
+    "Int64": "BIGINT"
+}
+COPY_CHUNK_ROWS = 50000
+NULL = "\\N"
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _pg_type(series):
+    if pd.api.types.is_bool_dtype(series):
+        return "BOOLEAN"
+    if pd.api.types.is_integer_dtype(series):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(series):
+        return "DOUBLE PRECISION"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+# 🧱 Colonne → type Postgres : schéma table_store d'abord, dtype pandas sinon
+def column_types(df, schema=None):
+    declared = TABLES.get(schema, {}) if schema else {}
+    return {
+        column: PG_TYPES[declared[column]] if column in declared else _pg_type(df[column])
+        for column in df.columns
+    }
+
+
+def _create_table(cursor, table, types, key=None, temporary=False):
+    columns = [f"{quote(c)} {t}" for c, t in types.items()]
+    if key:
+        columns.append(f"PRIMARY KEY ({', '.join(quote(c) for c in key)})")
+    cursor.execute(f"CREATE {'TEMP ' if temporary else ''}TABLE {quote(table)} ({', '.join(columns)})"
+                   f"{' ON COMMIT DROP' if temporary else ''}")
+
+
+# 📤 COPY FROM STDIN par blocs de COPY_CHUNK_ROWS lignes (mémoire bornée)
+def copy_frame(cursor, table, df):
+    columns = ", ".join(quote(c) for c in df.columns)
+    sql = f"COPY {quote(table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')"
+    for start in range(0, len(df), COPY_CHUNK_ROWS):
+        buffer = io.StringIO()
+        df.iloc[start:start + COPY_CHUNK_ROWS].to_csv(buffer, index=False, header=False, na_rep=NULL)
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+
+
+def _existing_columns(cursor, table):
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() AND table_name = %s",
+        (table,)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _has_unique_key(cursor, table, key):
+    cursor.execute(
+        "SELECT array_agg(a.attname::text ORDER BY a.attname) FROM pg_index i "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+        "WHERE i.indrelid = to_regclass(%s) AND i.indisunique GROUP BY i.indexrelid",
+        (quote(table),)
+    )
+    return any(row[0] == sorted(key) for row in cursor.fetchall())
+
+
+def _swap(cursor, table, df, types, key):
+    staging = f"{table}__staging"
+    cursor.execute(f"DROP TABLE IF EXISTS {quote(staging)}")
+    _create_table(cursor, staging, types, key)
+    copy_frame(cursor, staging, df)
+    cursor.execute(f"DROP TABLE IF EXISTS {quote(table)}")
+    cursor.execute(f"ALTER TABLE {quote(staging)} RENAME TO {quote(table)}")
+    if key:
+        cursor.execute(f"ALTER TABLE {quote(table)} RENAME CONSTRAINT {quote(staging + '_pkey')} TO {quote(table + '_pkey')}")
+
+
+def _upsert(cursor, table, df, types, key):
+    existing = _existing_columns(cursor, table)
+    if not existing:
+        _create_table(cursor, table, types, key)
+    else:
+        # Colonnes apparues depuis le dernier chargement
+        for column in df.columns:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} {types[column]}")
+        # Table créée par l'ancien to_sql (sans clé) : index unique pour ON CONFLICT
+        if not _has_unique_key(cursor, table, key):
+            cursor.execute(
+                f"CREATE UNIQUE INDEX {quote(table + '_key')} ON {quote(table)} ({', '.join(quote(c) for c in key)})"
+            )
+
+    staging = f"{table}__staging"
+    _create_table(cursor, staging, types, temporary=True)
+    copy_frame(cursor, staging, df)
+    columns = ", ".join(quote(c) for c in df.columns)
+    updates = ", ".join(f"{quote(c)} = EXCLUDED.{quote(c)}" for c in df.columns if c not in key)
+    conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    cursor.execute(
+        f"INSERT INTO {quote(table)} ({columns}) SELECT {columns} FROM {quote(staging)} "
+        f"ON CONFLICT ({', '.join(quote(c) for c in key)}) {conflict}"
+    )
+
+
+# 🚚 Chargement d'un DataFrame dans une transaction → nombre de lignes chargées
+def load_frame(engine, table, df, key=None, schema=None, mode=None):
+    mode = mode or ("upsert" if key else "swap")
+    if mode == "upsert" and not key:
+        raise ValueError(f"{table} : le mode upsert demande une clé")
+    if key:
+        missing = [c for c in key if c not in df.columns]
+        if missing:
+            raise ValueError(f"{table} : colonnes de clé absentes {missing}")
+        before = len(df)
+        df = df.dropna(subset=key).drop_duplicates(subset=key, keep="last")
+        if len(df) < before:
+            print(f"⚠️ {table} : {before - len(df)} lignes sans clé ou en double ignorées")
+    types = column_types(df, schema)
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            if mode == "upsert":
+                _upsert(cursor, table, df, types, key)
+            else:
+                _swap(cursor, table, df, types, key)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    return len(df)
+
+
+# 🗂️ Fiches sociétés en JSONB, clé (ticker, extraction_date), détection de changement par hash
+# Chaque nuit apporte une nouvelle extraction_date : le hash (calculé hors extraction_date)
+# est comparé à celui de la dernière fiche stockée du ticker, quelle que soit sa date ;
+# une fiche identique n'est pas réinsérée (le volume écrit suit ce qui a changé).
+# index GIN (containment @>) et index d'expression sur les champs filtrés par le dashboard.
+DOCUMENT_INDEXES = {
+    "document_gin": "USING GIN (document jsonb_path_ops)",
+    "sector": "((document->>'sector'))",
+    "sentiment_label": "((document->'news_sentiment'->>'label'))",
+    "value_score": "(((document->'scores'->>'ValueScore')::double precision))",
+    "quality_score": "(((document->'scores'->>'QualityScore')::double precision))",
+    "signal_score": "(((document->'scores'->>'SignalScore')::double precision))"
+}
+
+
+def document_hash(document):
+    if isinstance(document, dict):
+        document = {k: v for k, v in document.items() if k != "extraction_date"}
+    canonical = json.dumps(document, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _create_documents_table(cursor, table):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {quote(table)} (
+            ticker TEXT NOT NULL,
+            extraction_date TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            document JSONB NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (ticker, extraction_date)
+        )
+    """)
+    for name, definition in DOCUMENT_INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {quote(f'{table}_{name}')} ON {quote(table)} {definition}")
+
+
+# 🚚 (ticker, extraction_date, document) → (fiches écrites, fiches inchangées)
+def load_documents(engine, table, documents):
+    rows = {}
+    for ticker, extraction_date, document in documents:
+        rows[(ticker, extraction_date)] = (document_hash(document), document)
+
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            _create_documents_table(cursor, table)
+            # Dernière version stockée de chaque ticker (index de clé primaire)
+            cursor.execute(
+                f"SELECT DISTINCT ON (ticker) ticker, content_hash FROM {quote(table)} "
+                f"WHERE ticker = ANY(%s) ORDER BY ticker, extraction_date DESC",
+                (sorted({ticker for ticker, _ in rows}),)
+            )
+            latest = dict(cursor.fetchall())
+            changed = pd.DataFrame(
+                [
+                    {"ticker": ticker, "extraction_date": date, "content_hash": content_hash,
+                     "document": json.dumps(document, ensure_ascii=False, default=str)}
+                    for (ticker, date), (content_hash, document) in rows.items()
+                    if latest.get(ticker) != content_hash
+                ],
+                columns=["ticker", "extraction_date", "content_hash", "document"]
+            )
+            if not changed.empty:
+                staging = f"{table}__staging"
+                _create_table(cursor, staging, {c: "TEXT" for c in changed.columns}, temporary=True)
+                copy_frame(cursor, staging, changed)
+                cursor.execute(f"""
+                    INSERT INTO {quote(table)} (ticker, extraction_date, content_hash, document)
+                    SELECT ticker, extraction_date, content_hash, document::jsonb FROM {quote(staging)}
+                    ON CONFLICT (ticker, extraction_date) DO UPDATE SET
+                        content_hash = EXCLUDED.content_hash, document = EXCLUDED.document, updated_at = now()
+                """)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    return len(changed), len(rows) - len(changed)
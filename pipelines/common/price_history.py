@@ -0,0 +1,91 @@
+import time
+import pandas as pd
+import yfinance as yf
+from pipelines.common import telemetry
+
+# 📈 Store partagé des historiques de prix
+# Un seul téléchargement par ticker et par run : les étapes (returns, volatilité,
+# indicateurs techniques, filtre min_days) lisent toutes depuis ce store.
+
+HISTORY_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class PriceHistoryStore:
+    def __init__(self, period="6mo", interval="1d", chunk_size=200, download_fn=None):
+        self.period = period
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.download_fn = download_fn or yf.download
+        self._frames = {}
+        self.download_calls = 0
+
+    # 🔽 Téléchargement groupé de tous les tickers pas encore en mémoire
+    def prefetch(self, tickers):
+        missing = [t for t in dict.fromkeys(tickers) if t not in self._frames]
+        for start in range(0, len(missing), self.chunk_size):
+            chunk = missing[start:start + self.chunk_size]
+            print(f"📥 Historique {self.period} : {start + len(chunk)}/{len(missing)} tickers")
+            started = time.monotonic()
+            try:
+                self.download_calls += 1
+                telemetry.count("network_calls")
+                raw = self.download_fn(
+                    chunk,
+                    period=self.period,
+                    interval=self.interval,
+                    group_by="ticker",
+                    auto_adjust=True,
+                    threads=True,
+                    progress=False
+                )
+            except Exception as e:
+                print(f"⚠️ Erreur téléchargement groupé : {e}")
+                raw = pd.DataFrame()
+            telemetry.item(f"history[{start}:{start + len(chunk)}]", time.monotonic() - started, ok=not raw.empty)
+            if telemetry.enabled() and not raw.empty:
+                telemetry.count("bytes", int(raw.memory_usage(deep=True).sum()))
+
+            for ticker in chunk:
+                self._frames[ticker] = _extract_ticker_frame(raw, ticker, len(chunk))
+
+    # 📄 Historique d'un ticker (téléchargé à la demande si absent du store)
+    def get(self, ticker):
+        if ticker not in self._frames:
+            self.prefetch([ticker])
+        return self._frames[ticker]
+
+    def has_min_history(self, ticker, min_days=50):
+        return len(self.get(ticker)) >= min_days
+
+    # 📊 Return 6M + volatilité journalière (mêmes formules que les étapes historiques)
+    def returns_and_volatility(self, ticker):
+        close = self.get(ticker)["Close"]
+        return close.iloc[-1] / close.iloc[0] - 1, close.pct_change().std()
+
+    # 🧮 Matrice (dates × tickers) des clôtures, pour les calculs vectorisés
+    def close_matrix(self, tickers, min_days=50):
+        closes = {}
+        for ticker in dict.fromkeys(tickers):
+            hist = self.get(ticker)
+            if len(hist) < min_days:
+                continue
+            closes[ticker] = hist.dropna()["Close"]
+        return pd.DataFrame(closes)
+
+
+def _extract_ticker_frame(raw, ticker, n_requested):
+    if raw is None or raw.empty:
+        return pd.DataFrame(columns=HISTORY_FIELDS)
+
+    if isinstance(raw.columns, pd.MultiIndex):
+        if ticker not in raw.columns.get_level_values(0):
+            return pd.DataFrame(columns=HISTORY_FIELDS)
+        frame = raw[ticker]
+    elif n_requested == 1:
+        frame = raw
+    else:
+        return pd.DataFrame(columns=HISTORY_FIELDS)
+
+    frame = frame[[c for c in HISTORY_FIELDS if c in frame.columns]]
+    # Le calendrier commun contient les jours fériés des autres places : on les retire
+    return frame.dropna(how="all").copy()
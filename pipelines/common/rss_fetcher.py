@@ -0,0 +1,116 @@
+import os
+import asyncio
+import aiohttp
+import feedparser
+from urllib.parse import urlparse
+from pipelines.common.disk_cache import DiskCache
+from pipelines.common.fetcher import backoff_delay
+from pipelines.common import telemetry
+
+# 📰 Fetch asynchrone des flux RSS (Google News) pour l'étape sentiment
+# - une session aiohttp partagée : pool de connexions keep-alive
+# - plafond de requêtes simultanées global et par hôte
+# - GET conditionnels (ETag / If-Modified-Since) : sur 304, le dernier flux reçu est relu
+#   depuis le cache disque
+# - timeout par requête, backoff avec jitter sur 429 / 5xx
+# - parsing feedparser dans un thread : la boucle asyncio ne parse jamais de XML
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+RSS_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "rss")
+
+RSS_DEFAULTS = {
+    "concurrency": 32,
+    "per_host": 8,
+    "timeout": 20.0,
+    "retries": 3,
+    "cache_ttl_hours": 72.0,
+    "cache_max_mb": 256
+}
+
+
+class RssFetcher:
+    def __init__(self, concurrency=None, per_host=None, timeout=None, retries=None, cache_ttl_hours=None, cache_max_mb=None):
+        self.concurrency = concurrency or RSS_DEFAULTS["concurrency"]
+        self.per_host = per_host or RSS_DEFAULTS["per_host"]
+        self.timeout = timeout or RSS_DEFAULTS["timeout"]
+        self.retries = RSS_DEFAULTS["retries"] if retries is None else retries
+        ttl_hours = RSS_DEFAULTS["cache_ttl_hours"] if cache_ttl_hours is None else cache_ttl_hours
+        self.cache = DiskCache(
+            RSS_CACHE_DIR, ttl=ttl_hours * 3600,
+            max_bytes=int((cache_max_mb or RSS_DEFAULTS["cache_max_mb"]) * 1024 * 1024)
+        )
+        self.session = None
+        self.not_modified = 0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    # 🌐 Corps du flux (texte), avec GET conditionnel → None si indisponible
+    async def fetch(self, url):
+        cached = self.cache.get(url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        for attempt in range(self.retries + 1):
+            telemetry.count("network_calls")
+            try:
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status == 304 and cached:
+                        self.not_modified += 1
+                        return cached["body"]
+                    if response.status == 429 or response.status >= 500:
+                        raise aiohttp.ClientResponseError(response.request_info, response.history, status=response.status)
+                    response.raise_for_status()
+                    body = await response.text(errors="replace")
+                    telemetry.count("bytes", len(body))
+                    if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+                        self.cache.set(url, {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                            "body": body
+                        })
+                    return body
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, "status", None)
+                transient = status is None or status == 429 or status >= 500
+                if not transient or attempt == self.retries:
+                    print(f"[RSS ERROR] {urlparse(url).netloc} → {e}")
+                    return cached["body"] if cached else None
+                await asyncio.sleep(backoff_delay(attempt))
+
+    # 🧾 Flux parsé (feedparser hors boucle asyncio)
+    async def parse(self, url):
+        body = await self.fetch(url)
+        if body is None:
+            return feedparser.FeedParserDict(entries=[])
+        return await asyncio.get_running_loop().run_in_executor(None, feedparser.parse, body)
+
+    def report(self):
+        print(self.cache.stats_line("RSS") + f", {self.not_modified} flux inchangés (304)")
+        self.cache.prune()
+
+
+def add_rss_arguments(parser):
+    parser.add_argument("--rss-concurrency", type=int, default=RSS_DEFAULTS["concurrency"], help="Requêtes RSS simultanées (total)")
+    parser.add_argument("--rss-per-host", type=int, default=RSS_DEFAULTS["per_host"], help="Requêtes RSS simultanées par hôte")
+    parser.add_argument("--rss-timeout", type=float, default=RSS_DEFAULTS["timeout"], help="Timeout par flux (secondes)")
+    parser.add_argument("--rss-retries", type=int, default=RSS_DEFAULTS["retries"], help="Tentatives supplémentaires sur 429/5xx/timeout")
+    return parser
+
+
+def rss_config_from_args(args):
+    return {
+        "concurrency": args.rss_concurrency,
+        "per_host": args.rss_per_host,
+        "timeout": args.rss_timeout,
+        "retries": args.rss_retries
+    }
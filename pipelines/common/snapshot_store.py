@@ -0,0 +1,358 @@
+import os
+import sys
+import json
+import time
+import zlib
+import struct
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, BASE_DIR)
+
+# 🧊 Archive quotidienne dédupliquée (stockage adressé par contenu)
+# output/history/store/packs/<date>.<n>.pack : blocs nouveaux du snapshot, un flux zlib
+#   (+ .idx : empreintes et longueurs), chaque bloc n'est stocké qu'une fois
+# output/history/store/snapshots/<YYYY-MM-DD>.json.z : manifeste du jour (fichier → blocs),
+#   encodé en différence du manifeste de la veille
+# - texte (JSON indenté, CSV) : découpage par lignes, frontières choisies par le contenu
+#   (crc32 de la ligne) → une série décalée d'un jour ne change que les blocs de ses bords
+# - binaire (SQLite...) : blocs de taille fixe alignés sur les pages
+# - fichier de même taille et même mtime que dans le snapshot précédent : blocs repris
+#   sans relecture
+# Chaque jour n'ajoute donc que ses blocs nouveaux ; restore reconstruit un jour à l'octet
+# près (sha256 de chaque fichier vérifié).
+#   python pipelines/common/snapshot_store.py list
+#   python pipelines/common/snapshot_store.py restore 2026-10-17 --dest /tmp/restore
+#   python pipelines/common/snapshot_store.py prune --keep-days 365
+
+STORE_DIR = os.path.join(BASE_DIR, "output", "history", "store")
+TEXT_EXTENSIONS = {".json", ".csv", ".txt"}
+# Empreinte des blocs et fichiers : sha256 tronqué à 128 bits
+DIGEST_BYTES = 16
+IDX_RECORD = struct.Struct(f"<{DIGEST_BYTES}sI")
+
+SNAPSHOT_DEFAULTS = {
+    "min_chunk": 256,
+    "max_chunk": 16 * 1024,
+    "boundary_mask": 0x0F,      # ~1 ligne sur 16 termine un bloc
+    "block_size": 16 * 1024,
+    "compression_level": 6,
+    "keyframe_every": 30,
+    "keep_days": 365
+}
+
+
+# ✂️ Découpage d'un texte en blocs à frontières de lignes définies par le contenu
+def chunk_lines(data, min_chunk=None, max_chunk=None, mask=None):
+    min_chunk = min_chunk or SNAPSHOT_DEFAULTS["min_chunk"]
+    max_chunk = max_chunk or SNAPSHOT_DEFAULTS["max_chunk"]
+    mask = SNAPSHOT_DEFAULTS["boundary_mask"] if mask is None else mask
+    chunks, start, size = [], 0, 0
+    for line in data.splitlines(keepends=True):
+        size += len(line)
+        if size >= max_chunk or (size >= min_chunk and zlib.crc32(line) & mask == 0):
+            chunks.append(data[start:start + size])
+            start, size = start + size, 0
+    if size:
+        chunks.append(data[start:])
+    return chunks
+
+
+def chunk_blocks(data, block_size=None):
+    block_size = block_size or SNAPSHOT_DEFAULTS["block_size"]
+    return [data[i:i + block_size] for i in range(0, len(data), block_size)]
+
+
+def chunk_file(path, data):
+    if os.path.splitext(path)[1].lower() in TEXT_EXTENSIONS:
+        return chunk_lines(data)
+    return chunk_blocks(data)
+
+
+def digest(data):
+    return hashlib.sha256(data).digest()[:DIGEST_BYTES].hex()
+
+
+# Liste de blocs → opérations par rapport à la liste de base du même fichier :
+# [début, nombre] = plage recopiée de la base, chaîne = empreinte nouvelle
+def encode_chunks(chunks, base_chunks):
+    positions = {d: i for i, d in enumerate(base_chunks)}
+    ops = []
+    for d in chunks:
+        i = positions.get(d)
+        if i is None:
+            ops.append(d)
+        elif ops and isinstance(ops[-1], list) and sum(ops[-1]) == i:
+            ops[-1][1] += 1
+        else:
+            ops.append([i, 1])
+    return ops
+
+
+def decode_chunks(ops, base_chunks):
+    chunks = []
+    for op in ops:
+        if isinstance(op, list):
+            chunks.extend(base_chunks[op[0]:op[0] + op[1]])
+        else:
+            chunks.append(op)
+    return chunks
+
+
+class SnapshotStore:
+    def __init__(self, directory=STORE_DIR):
+        self.directory = directory
+        self.packs_dir = os.path.join(directory, "packs")
+        self.snapshots_dir = os.path.join(directory, "snapshots")
+        os.makedirs(self.packs_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        self._index = None
+        self._manifests = {}
+
+    # Empreinte → (pack, position, longueur) ; .idx binaire (empreinte, longueur) dans l'ordre du pack
+    def index(self):
+        if self._index is None:
+            self._index = {}
+            for name in sorted(os.listdir(self.packs_dir)):
+                if not name.endswith(".idx"):
+                    continue
+                with open(os.path.join(self.packs_dir, name), "rb") as f:
+                    records = f.read()
+                offset = 0
+                for raw, length in IDX_RECORD.iter_unpack(records):
+                    self._index[raw.hex()] = (name[:-len(".idx")], offset, length)
+                    offset += length
+        return self._index
+
+    # 📦 Blocs nouveaux → un pack (un seul flux zlib : la compression profite des
+    # ressemblances entre blocs) ; le .idx écrit en dernier valide le pack
+    def _write_pack(self, name, chunks):
+        path = os.path.join(self.packs_dir, name)
+        compressor = zlib.compressobj(SNAPSHOT_DEFAULTS["compression_level"])
+        records, offset = [], 0
+        with open(f"{path}.pack.tmp", "wb") as f:
+            for d, chunk in chunks.items():
+                f.write(compressor.compress(chunk))
+                records.append(IDX_RECORD.pack(bytes.fromhex(d), len(chunk)))
+                self.index()[d] = (name, offset, len(chunk))
+                offset += len(chunk)
+            f.write(compressor.flush())
+        os.replace(f"{path}.pack.tmp", f"{path}.pack")
+        with open(f"{path}.idx.tmp", "wb") as f:
+            f.write(b"".join(records))
+        os.replace(f"{path}.idx.tmp", f"{path}.idx")
+        return os.path.getsize(f"{path}.pack") + os.path.getsize(f"{path}.idx")
+
+    def _read_pack(self, name):
+        with open(os.path.join(self.packs_dir, f"{name}.pack"), "rb") as f:
+            return zlib.decompress(f.read())
+
+    # Empreintes → contenus, chaque pack décompressé une seule fois
+    def get_chunks(self, digests):
+        by_pack = {}
+        for d in set(digests):
+            name, offset, length = self.index()[d]
+            by_pack.setdefault(name, []).append((d, offset, length))
+        chunks = {}
+        for name, entries in by_pack.items():
+            data = self._read_pack(name)
+            for d, offset, length in entries:
+                chunks[d] = data[offset:offset + length]
+        return chunks
+
+    def snapshots(self):
+        return sorted(name[:-len(".json.z")] for name in os.listdir(self.snapshots_dir) if name.endswith(".json.z"))
+
+    def _manifest_path(self, date):
+        return os.path.join(self.snapshots_dir, f"{date}.json.z")
+
+    def _read_manifest(self, date):
+        with open(self._manifest_path(date), "rb") as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    def _write_manifest(self, date, manifest):
+        path = self._manifest_path(date)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(zlib.compress(json.dumps(manifest, separators=(",", ":")).encode("utf-8"), 9))
+        os.replace(f"{path}.tmp", path)
+        self._manifests.pop(date, None)
+
+    # 📄 Manifeste résolu : {"date", "created", "depth", "files": {chemin: {"size", "mtime_ns", "sha256", "chunks"}}}
+    # Sur disque, chaque fichier ne décrit que ses changements par rapport au snapshot de base
+    # (la veille) ; un manifeste complet tous les keyframe_every snapshots borne la chaîne.
+    def manifest(self, date):
+        if date not in self._manifests:
+            stored = self._read_manifest(date)
+            base_files = self.manifest(stored["base"])["files"] if stored["base"] else {}
+            files = {}
+            for path, (size, mtime_ns, sha256, ops) in stored["files"].items():
+                base_chunks = base_files[path]["chunks"] if path in base_files else []
+                files[path] = {"size": size, "mtime_ns": mtime_ns, "sha256": sha256, "chunks": decode_chunks(ops, base_chunks)}
+            self._manifests[date] = {"date": date, "created": stored["created"], "depth": stored["depth"], "files": files}
+        return self._manifests[date]
+
+    def _save_manifest(self, date, created, files, base=None):
+        base_manifest = self.manifest(base) if base else None
+        if base_manifest and base_manifest["depth"] + 1 >= SNAPSHOT_DEFAULTS["keyframe_every"]:
+            base_manifest = None
+        base_files = base_manifest["files"] if base_manifest else {}
+        self._write_manifest(date, {
+            "date": date,
+            "created": created,
+            "base": base_manifest["date"] if base_manifest else None,
+            "depth": base_manifest["depth"] + 1 if base_manifest else 0,
+            "files": {
+                path: [e["size"], e["mtime_ns"], e["sha256"], encode_chunks(e["chunks"], base_files.get(path, {}).get("chunks", []))]
+                for path, e in files.items()
+            }
+        })
+
+    # 📸 Snapshot des cibles (fichiers ou dossiers, chemins relatifs à root) → statistiques
+    def snapshot(self, targets, root=BASE_DIR, date=None, rehash=False):
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        dates = self.snapshots()
+        if any(d > date for d in dates):
+            raise ValueError(f"Des snapshots postérieurs au {date} existent déjà")
+        started = time.monotonic()
+        base = max((d for d in dates if d < date), default=None)
+        previous = self.manifest(base)["files"] if base else {}
+        known = self.index()
+        stats = {"files": 0, "reused_files": 0, "chunks": 0, "new_chunks": 0, "bytes": 0, "stored_bytes": 0}
+        files, new_chunks = {}, {}
+
+        for relpath in _walk(targets, root):
+            path = os.path.join(root, relpath)
+            stat = os.stat(path)
+            stats["files"] += 1
+            stats["bytes"] += stat.st_size
+            entry = previous.get(relpath)
+            # Fichier inchangé depuis le snapshot précédent : blocs repris sans relecture
+            if (not rehash and entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+                    and all(c in known for c in entry["chunks"])):
+                files[relpath] = entry
+                stats["reused_files"] += 1
+                stats["chunks"] += len(entry["chunks"])
+                continue
+
+            with open(path, "rb") as f:
+                data = f.read()
+            chunks = []
+            for chunk in chunk_file(relpath, data):
+                d = digest(chunk)
+                if d not in known and d not in new_chunks:
+                    new_chunks[d] = chunk
+                chunks.append(d)
+            stats["chunks"] += len(chunks)
+            files[relpath] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest(data), "chunks": chunks}
+
+        if new_chunks:
+            stats["new_chunks"] = len(new_chunks)
+            stats["stored_bytes"] = self._write_pack(f"{date}.{time.time_ns()}", new_chunks)
+        self._save_manifest(date, datetime.now().isoformat(timespec="seconds"), files, base)
+        stats["stored_bytes"] += os.path.getsize(self._manifest_path(date))
+        stats["elapsed"] = time.monotonic() - started
+        return stats
+
+    # ♻️ Reconstruction d'un jour dans dest (tous les fichiers ou seulement paths)
+    def restore(self, date, dest, paths=None):
+        files = self.manifest(date)["files"]
+        selected = [p for p in files if not paths or any(p == q or p.startswith(q.rstrip("/") + "/") for q in paths)]
+        chunks = self.get_chunks(c for p in selected for c in files[p]["chunks"])
+        for relpath in selected:
+            entry = files[relpath]
+            data = b"".join(chunks[d] for d in entry["chunks"])
+            if digest(data) != entry["sha256"]:
+                raise ValueError(f"Snapshot {date} corrompu : {relpath}")
+            target = os.path.join(dest, relpath)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+            os.utime(target, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        return len(selected)
+
+    # ✂️ Rétention : manifestes plus anciens que keep_days supprimés (le premier conservé
+    # devient complet) ; packs sans bloc référencé supprimés, packs partiels réécrits
+    def prune(self, keep_days=None):
+        keep_days = SNAPSHOT_DEFAULTS["keep_days"] if keep_days is None else keep_days
+        cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y-%m-%d")
+        dates = self.snapshots()
+        removed = [d for d in dates if d < cutoff]
+        kept = [d for d in dates if d >= cutoff]
+        if not removed:
+            return 0, 0
+        if kept:
+            first = self.manifest(kept[0])
+            self._save_manifest(first["date"], first["created"], first["files"])
+            # Manifestes suivants décodés avant que leur chaîne ne change
+            for date in kept:
+                self.manifest(date)
+        for date in removed:
+            os.remove(self._manifest_path(date))
+            self._manifests.pop(date, None)
+
+        referenced = {c for date in kept for entry in self.manifest(date)["files"].values() for c in entry["chunks"]}
+        by_pack = {}
+        for d, (name, _, _) in self.index().items():
+            by_pack.setdefault(name, []).append(d)
+        orphans = 0
+        for name, digests in by_pack.items():
+            live = [d for d in digests if d in referenced]
+            if len(live) == len(digests):
+                continue
+            orphans += len(digests) - len(live)
+            if live:
+                self._write_pack(f"{name}.r{time.time_ns()}", self.get_chunks(live))
+            for extension in (".idx", ".pack"):
+                os.remove(os.path.join(self.packs_dir, name + extension))
+        self._index = None
+        return len(removed), orphans
+
+    def size(self):
+        return sum(
+            os.path.getsize(os.path.join(folder, name))
+            for folder, _, names in os.walk(self.directory) for name in names
+        )
+
+
+# Cibles → chemins relatifs des fichiers (dossiers parcourus, ordre stable)
+def _walk(targets, root):
+    for target in targets:
+        path = os.path.join(root, target)
+        if os.path.isfile(path):
+            yield os.path.relpath(path, root)
+        elif os.path.isdir(path):
+            for folder, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    yield os.path.relpath(os.path.join(folder, name), root)
+        else:
+            print(f"  ⚠️ Fichier manquant : {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store", default=STORE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Snapshots disponibles")
+    restore = commands.add_parser("restore", help="Reconstruit un jour à l'identique")
+    restore.add_argument("date", help="Date du snapshot (YYYY-MM-DD)")
+    restore.add_argument("--dest", required=True, help="Dossier de destination")
+    restore.add_argument("--path", action="append", dest="paths", help="Fichier ou dossier à restaurer (répétable, par défaut tout)")
+    prune = commands.add_parser("prune", help="Supprime les snapshots anciens et les blocs orphelins")
+    prune.add_argument("--keep-days", type=int, default=SNAPSHOT_DEFAULTS["keep_days"])
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.store)
+    if args.command == "list":
+        for date in store.snapshots():
+            files = store.manifest(date)["files"]
+            print(f"  {date} : {len(files)} fichiers, {sum(e['size'] for e in files.values()) / 1e6:.1f} Mo")
+        print(f"📦 Stockage total : {store.size() / 1e6:.1f} Mo")
+    elif args.command == "restore":
+        restored = store.restore(args.date, args.dest, args.paths)
+        print(f"♻️ {restored} fichiers du {args.date} restaurés dans {args.dest}")
+    else:
+        removed, orphans = store.prune(args.keep_days)
+        print(f"✂️ {removed} snapshots et {orphans} blocs orphelins supprimés")
@@ -0,0 +1,90 @@
+import os
+import json
+import hashlib
+import tempfile
+
+# 🧾 Cache de build des étapes nocturnes
+# Empreinte d'une étape = hash(script + modules communs + date du run + contenu de ses entrées).
+# Les dossiers (fiches exportées, historiques) sont signés par leurs tailles et mtimes.
+# Si l'empreinte correspond à celle du manifeste et que les sorties sont présentes,
+# l'étape est sautée et ses sorties enregistrées sont réutilisées.
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+MANIFEST_PATH = os.path.join(BASE_DIR, "data", "cache", "stage_manifest.json")
+COMMON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _hash_file(path, digest):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+
+# #️⃣ Hash du contenu d'un fichier ou d'un dossier (chemins relatifs + contenus), None si absent
+def hash_path(path):
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(".pyc"):
+                    continue
+                full_path = os.path.join(root, name)
+                digest.update(os.path.relpath(full_path, path).encode("utf-8") + b"\0")
+                _hash_file(full_path, digest)
+        return digest.hexdigest()
+    if os.path.isfile(path):
+        digest = hashlib.sha256()
+        _hash_file(path, digest)
+        return digest.hexdigest()
+    return None
+
+
+# 🏷️ Signature légère (chemins relatifs, tailles, mtimes) : dossiers de sortie volumineux
+# ou croissants (historiques, fiches exportées) sans relire leur contenu, None si absent
+def stat_signature(path):
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                relpath = os.path.relpath(os.path.join(root, name), path)
+                digest.update(f"{relpath}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode("utf-8"))
+        return digest.hexdigest()
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+    return None
+
+
+# Fichier → hash du contenu ; dossier → signature stat (les écritures de fiches ne
+# réécrivent que les fichiers modifiés, leur mtime suffit)
+def path_signature(path):
+    return stat_signature(path) if os.path.isdir(path) else hash_path(path)
+
+
+def stage_fingerprint(script, input_hashes, run_date):
+    digest = hashlib.sha256()
+    digest.update(run_date.encode("utf-8"))
+    digest.update(hash_path(script).encode("utf-8"))
+    digest.update(hash_path(COMMON_DIR).encode("utf-8"))
+    for path in sorted(input_hashes):
+        digest.update(f"{path}={input_hashes[path]}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
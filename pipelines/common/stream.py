@@ -0,0 +1,144 @@
+import asyncio
+
+# 🚰 Pipeline asynchrone producteur/consommateur
+# Chaque étape a sa file bornée et son nombre de workers : un élément lent n'occupe
+# qu'un worker de son étape, les autres continuent. Le débit n'est limité que par
+# l'étape la plus lente (rapportée à sa concurrence).
+# - une étape est une coroutine élément → élément (None = élément abandonné)
+# - `sink` reçoit chaque élément sorti de la dernière étape, au fil de l'eau
+# - `on_drop(élément, erreur)` est appelé pour un élément abandonné ou en erreur
+
+
+class Stage:
+    def __init__(self, name, fn, concurrency=1):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, concurrency)
+
+
+async def run_pipeline(items, stages, sink, on_drop=None, queue_size=64):
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    # Une erreur dans on_drop ne doit ni tuer le worker ni rappeler on_drop
+    def drop(stage, item, error):
+        if not on_drop:
+            return
+        try:
+            on_drop(item, error)
+        except Exception as e:
+            print(f"❌ [{stage.name}/on_drop] {e}")
+
+    async def worker(stage, inbox, outbox):
+        while True:
+            item = await inbox.get()
+            try:
+                try:
+                    result = await stage.fn(item)
+                except Exception as e:
+                    print(f"❌ [{stage.name}] {e}")
+                    drop(stage, item, e)
+                    continue
+                if result is None:
+                    drop(stage, item, None)
+                else:
+                    await outbox.put(result)
+            finally:
+                inbox.task_done()
+
+    async def drain(inbox):
+        while True:
+            item = await inbox.get()
+            try:
+                sink(item)
+            except Exception as e:
+                print(f"❌ [sink] {e}")
+            finally:
+                inbox.task_done()
+
+    tasks = [
+        asyncio.create_task(worker(stage, queues[i], queues[i + 1]))
+        for i, stage in enumerate(stages) for _ in range(stage.concurrency)
+    ]
+    tasks.append(asyncio.create_task(drain(queues[-1])))
+    try:
+        for item in items:
+            await queues[0].put(item)
+        # Un worker pousse sa sortie avant task_done : une fois la file i vidée,
+        # tous ses éléments sont déjà dans la file i + 1
+        for queue in queues:
+            await queue.join()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# 🧺 Regroupement en lots dynamiques : les éléments soumis par toutes les coroutines
+# partent par lots de `max_batch` au plus, ou après `max_wait` secondes d'attente.
+# `process` est une coroutine liste → liste (même ordre) ; `max_inflight` lots au plus
+# sont traités en même temps, les suivants continuent de grossir. Une erreur du lot est
+# propagée aux futures de ses éléments.
+class MicroBatcher:
+    def __init__(self, process, max_batch, max_wait, max_inflight=1):
+        self.process = process
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.max_inflight = max(1, max_inflight)
+        self._queue = None
+        self._runner = None
+        self._pending = set()
+
+    def start(self):
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._queue = asyncio.Queue()
+        self._runner = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._runner:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def submit(self, items):
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in items]
+        for item, future in zip(items, futures):
+            self._queue.put_nowait((item, future))
+        return await asyncio.gather(*futures)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            task = asyncio.create_task(self._process(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _process(self, batch):
+        try:
+            results = await self.process([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
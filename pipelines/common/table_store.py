@@ -0,0 +1,154 @@
+import os
+import pandas as pd
+import pyarrow.parquet as pq
+
+# 🗄️ Tables intermédiaires en Parquet (typées, lecture par colonnes)
+# Chaque table a un schéma explicite : les colonnes connues sont converties au type
+# déclaré avant écriture, donc plus de types ré-inférés à chaque lecture ni de lignes
+# perdues sur les champs texte longs (`source`). Les CSV restent un export optionnel
+# pour consultation (PIPELINE_EXPORT_CSV=1 ou export_csv=True).
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+CSV_EXPORT_ENV = "PIPELINE_EXPORT_CSV"
+
+IDENTITY = {
+    "Ticker": "string",
+    "Company": "string",
+    "Sector": "string",
+    "IndexSource": "string",
+    "ExtractionDate": "string"
+}
+FUNDAMENTALS = {
+    "Return_6M": "float64",
+    "Volatility": "float64",
+    "Beta": "float64",
+    "PE": "float64",
+    "PB": "float64",
+    "EV_Revenue": "float64",
+    "GrossMargin": "float64",
+    "ProfitMargin": "float64",
+    "ROE": "float64",
+    "MarketCap": "float64",
+    "EV_EBITDA": "float64",
+    "FCF_Yield": "float64",
+    "Interest_Coverage": "float64",
+    "Price_Sales": "float64",
+    "Net_Debt_Equity": "float64"
+}
+TECHNICALS = {
+    "RSI_14": "float64",
+    "SMA20_above_SMA50": "Int64",
+    "MACD": "float64",
+    "Momentum_10": "float64",
+    "BB_Percent": "float64"
+}
+SCORES = {
+    "ValueScore": "float64",
+    "QualityScore": "float64",
+    "SignalScore": "float64"
+}
+
+TABLES = {
+    "df_final": {**IDENTITY, **FUNDAMENTALS, **TECHNICALS, **SCORES},
+    "tickers_to_enrich": {"Ticker": "string", "Source": "string", "Date": "string"},
+    "df_final_enriched": {**IDENTITY, **FUNDAMENTALS, **TECHNICALS, **SCORES},
+    "df_final_merged": {**IDENTITY, **FUNDAMENTALS, **TECHNICALS, **SCORES},
+    "sentiment_news_summary_full": {
+        "Ticker": "string",
+        "news_count": "Int64",
+        "sentiment_score": "float64",
+        "positive_ratio": "float64",
+        "negative_ratio": "float64",
+        "neutral_ratio": "float64",
+        "gpt_label": "string",
+        "mistral_label": "string",
+        "bullet_positive_count": "Int64",
+        "bullet_negative_count": "Int64",
+        "source": "string"
+    },
+    "df_sentiment_full": {
+        "ticker": "string", "name": "string", "sector": "string", "market_cap": "float64", "CapType": "string",
+        "PE": "float64", "PB": "float64", "ROE": "float64", "ROA": "float64", "ProfitMargin": "float64",
+        "GrossMargin": "float64", "FCF_Margin": "float64", "DividendYield": "float64", "DebtEquity": "float64",
+        "CurrentRatio": "float64", "QuickRatio": "float64", "PriceToFCF": "float64", "EV_Revenue": "float64",
+        "EV_EBITDA": "float64", "Beta": "float64", "Volatility": "float64", "return_6m": "float64",
+        "RSI_14": "float64", "Momentum_10": "float64", "MACD": "float64", "BB_Percent": "float64",
+        "SMA20_above_SMA50": "Int64", "sentiment_score": "float64", "sentiment_label": "string",
+        "positive_ratio": "float64", "neutral_ratio": "float64", "negative_ratio": "float64",
+        "bullet_positive_count": "Int64", "bullet_negative_count": "Int64", "recommendation": "string",
+        "analyst_count": "Int64", "target_mean_price": "float64", "current_price": "float64",
+        "percent_change": "float64", "extraction_date": "string"
+    }
+}
+
+
+def table_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f"{name}.parquet")
+
+
+def csv_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, f"{name}.csv")
+
+
+def _cast(series, dtype):
+    if dtype == "string":
+        return series.astype("string")
+    numeric = pd.to_numeric(series, errors="coerce")
+    if dtype == "Int64":
+        return numeric.round().astype("Int64")
+    return numeric.astype(dtype)
+
+
+# 🧱 Conversion au schéma de la table (les colonnes hors schéma sont gardées telles quelles)
+def apply_schema(name, df):
+    schema = TABLES[name]
+    extra = [c for c in df.columns if c not in schema]
+    if extra:
+        print(f"⚠️ {name} : colonnes hors schéma conservées sans typage : {extra}")
+    df = df.copy()
+    for column, dtype in schema.items():
+        if column in df.columns:
+            df[column] = _cast(df[column], dtype)
+    return df
+
+
+def write_table(name, df, data_dir=DATA_DIR, export_csv=None):
+    df = apply_schema(name, df).reset_index(drop=True)
+    path = table_path(name, data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+    if export_csv is None:
+        export_csv = os.getenv(CSV_EXPORT_ENV, "").lower() in ("1", "true", "yes")
+    if export_csv:
+        df.to_csv(csv_path(name, data_dir), index=False)
+    return path
+
+
+# 📖 Lecture avec projection : seules les colonnes demandées sont décodées
+def read_table(name, columns=None, data_dir=DATA_DIR):
+    path = table_path(name, data_dir)
+    schema = TABLES[name]
+
+    if os.path.exists(path):
+        if columns is None:
+            return pd.read_parquet(path)
+        available = set(pq.read_schema(path).names)
+        df = pd.read_parquet(path, columns=[c for c in columns if c in available])
+    elif os.path.exists(csv_path(name, data_dir)):
+        # Transition : tables encore au format CSV d'un ancien run
+        print(f"⚠️ {name} : Parquet absent, lecture du CSV")
+        usecols = None if columns is None else (lambda c: c in columns)
+        df = apply_schema(name, pd.read_csv(csv_path(name, data_dir), usecols=usecols))
+        if columns is None:
+            return df
+    else:
+        raise FileNotFoundError(f"Table introuvable : {path}")
+
+    for column in columns:
+        if column not in df.columns:
+            df[column] = _cast(pd.Series(pd.NA, index=df.index, dtype="object"), schema.get(column, "float64"))
+    return df[list(columns)]
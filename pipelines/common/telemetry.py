@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import math
+import time
+import atexit
+import threading
+
+# 📡 Télémétrie structurée des scripts de pipeline (fichier JSONL annexe)
+# tasks.py fixe PIPELINE_TELEMETRY=<chemin.jsonl> pour chaque étape ; sans cette
+# variable, toutes les fonctions sont des no-op. Événements :
+#   step_start / step_end  → début/fin d'une sous-étape (durée, items, compteurs)
+#   item                   → latence d'un ticker (fetch, appel API, ...)
+# Compteurs usuels : network_calls, bytes, cache_hits, cache_misses.
+
+ENV_VAR = "PIPELINE_TELEMETRY"
+
+_LOCK = threading.Lock()
+_FILE = None
+_STEP = {"name": None, "started": None, "items": 0, "counters": {}}
+
+
+def enabled():
+    return bool(os.environ.get(ENV_VAR))
+
+
+def _script():
+    return os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python"
+
+
+def emit(event, **fields):
+    global _FILE
+    path = os.environ.get(ENV_VAR)
+    if not path:
+        return
+    record = {"ts": round(time.time(), 3), "script": _script(), "event": event, **fields}
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _LOCK:
+        if _FILE is None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            _FILE = open(path, "a", encoding="utf-8", buffering=1)
+        _FILE.write(line + "\n")
+
+
+# 🏁 Termine la sous-étape en cours et démarre la suivante
+def step(name, total=None):
+    end_step()
+    with _LOCK:
+        _STEP.update(name=name, started=time.monotonic(), items=0, counters={})
+    emit("step_start", step=name, total=total)
+
+
+def end_step():
+    with _LOCK:
+        name, started = _STEP["name"], _STEP["started"]
+        if name is None:
+            return
+        items, counters = _STEP["items"], dict(_STEP["counters"])
+        _STEP.update(name=None, started=None, items=0, counters={})
+    emit("step_end", step=name, duration=round(time.monotonic() - started, 3), items=items, counters=counters)
+
+
+def count(counter, n=1):
+    if not enabled():
+        return
+    with _LOCK:
+        counters = _STEP["counters"]
+        counters[counter] = counters.get(counter, 0) + n
+
+
+# ⏱️ Latence d'un item (ticker, article, ...) dans la sous-étape en cours
+def item(key, latency, ok=True):
+    if not enabled():
+        return
+    with _LOCK:
+        _STEP["items"] += 1
+        name = _STEP["name"]
+    emit("item", step=name, key=key, latency=round(latency, 4), ok=ok)
+
+
+atexit.register(end_step)
+
+
+# 📖 Lecture incrémentale d'un fichier JSONL (reprend à `offset`) → (événements, nouvel offset)
+def read_events(path, offset=0):
+    events = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            f.seek(offset)
+            while True:
+                line = f.readline()
+                if not line.endswith("\n"):
+                    break
+                offset = f.tell()
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return events, offset
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# 📊 Agrégat par sous-étape : durée, nb items, p50/p95 des latences, compteurs
+def summarize(events):
+    steps = {}
+    for event in events:
+        name = event.get("step") or "(hors étape)"
+        entry = steps.setdefault(name, {"step": name, "duration": 0.0, "items": 0, "latencies": [], "errors": 0, "counters": {}})
+        if event["event"] == "step_end":
+            entry["duration"] += event.get("duration", 0.0)
+            for counter, n in event.get("counters", {}).items():
+                entry["counters"][counter] = entry["counters"].get(counter, 0) + n
+        elif event["event"] == "item":
+            entry["items"] += 1
+            entry["latencies"].append(event["latency"])
+            if not event.get("ok", True):
+                entry["errors"] += 1
+
+    summary = []
+    for entry in steps.values():
+        latencies = entry.pop("latencies")
+        entry["p50"] = percentile(latencies, 50)
+        entry["p95"] = percentile(latencies, 95)
+        summary.append(entry)
+    return summary
@@ -0,0 +1,131 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pipelines.common import telemetry
+from pipelines.common.memo import get_memo, memoize_batch, amemoize_batch
+from pipelines.common.stream import MicroBatcher
+
+# 🌍 Traduction vers l'anglais (avant classification FinBERT des résumés)
+# - mémoire de traduction persistante (mémo par hash du texte, pipelines/common/memo.py)
+# - lots : plusieurs résumés par requête (une ligne par texte, découpage par taille)
+# - requêtes dans un thread dédié : la boucle asyncio n'attend jamais le réseau
+# - backend interchangeable : "google" (deep_translator) ou "offline" (identité, tests)
+# Un texte non traduit (erreur) est rendu tel quel et n'est pas mémorisé.
+
+TRANSLATION_DEFAULTS = {
+    "backend": "google",
+    "target": "en",
+    "max_batch": 16,
+    "max_wait_ms": 200.0,
+    "workers": 2
+}
+
+MAX_REQUEST_CHARS = 4500
+
+
+class GoogleBackend:
+    name = "google"
+
+    def __init__(self, target):
+        self.target = target
+
+    def _translate_one(self, text):
+        from deep_translator import GoogleTranslator
+        try:
+            telemetry.count("network_calls")
+            return GoogleTranslator(source="auto", target=self.target).translate(text)
+        except Exception as e:
+            print(f"[TRANSLATION ERROR] {e}")
+            return None
+
+    # 📦 Textes joints par saut de ligne, en requêtes de MAX_REQUEST_CHARS au plus ;
+    # si le nombre de lignes rendues ne correspond pas, repli texte par texte
+    def translate_batch(self, texts):
+        lines = [" ".join(text.split()) for text in texts]
+        chunks, current = [], []
+        for line in lines:
+            if current and sum(len(l) + 1 for l in current) + len(line) > MAX_REQUEST_CHARS:
+                chunks.append(current)
+                current = []
+            current.append(line)
+        if current:
+            chunks.append(current)
+
+        results = []
+        for chunk in chunks:
+            if len(chunk) == 1:
+                results.append(self._translate_one(chunk[0]))
+                continue
+            translated = self._translate_one("\n".join(chunk))
+            parts = translated.split("\n") if translated else []
+            if len(parts) == len(chunk):
+                results.extend(part.strip() for part in parts)
+            else:
+                results.extend(self._translate_one(line) for line in chunk)
+        return results
+
+
+class OfflineBackend:
+    name = "offline"
+
+    def __init__(self, target):
+        self.target = target
+
+    def translate_batch(self, texts):
+        return list(texts)
+
+
+BACKENDS = {"google": GoogleBackend, "offline": OfflineBackend}
+
+
+class Translator:
+    def __init__(self, backend=None, target=None, max_batch=None, max_wait_ms=None, workers=None, memo=None):
+        self.target = target or TRANSLATION_DEFAULTS["target"]
+        self.backend = BACKENDS[backend or TRANSLATION_DEFAULTS["backend"]](self.target)
+        self.max_batch = max_batch or TRANSLATION_DEFAULTS["max_batch"]
+        self.max_wait = (TRANSLATION_DEFAULTS["max_wait_ms"] if max_wait_ms is None else max_wait_ms) / 1000
+        self.workers = workers or TRANSLATION_DEFAULTS["workers"]
+        self.memo = memo if memo is not None else get_memo("translation")
+        self._executor = None
+        self._batcher = None
+
+    async def __aenter__(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._batcher = MicroBatcher(self._translate_batch, self.max_batch, self.max_wait, max_inflight=self.workers)
+        self._batcher.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._batcher.close()
+        self._executor.shutdown()
+
+    async def _translate_batch(self, texts):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.backend.translate_batch, texts)
+
+    # 🔁 Version asynchrone (lots partagés entre coroutines)
+    async def translate(self, texts):
+        if not texts:
+            return []
+        results = await amemoize_batch(self.memo, self.backend.name, self.target, texts, self._batcher.submit)
+        return [result if result is not None else text for text, result in zip(texts, results)]
+
+    # 🔁 Version synchrone (scripts séquentiels)
+    def translate_sync(self, texts):
+        if not texts:
+            return []
+        results = memoize_batch(self.memo, self.backend.name, self.target, texts, self.backend.translate_batch)
+        return [result if result is not None else text for text, result in zip(texts, results)]
+
+
+def add_translation_arguments(parser):
+    parser.add_argument("--translation-backend", choices=sorted(BACKENDS), default=TRANSLATION_DEFAULTS["backend"], help="Backend de traduction (offline = identité, pour les tests)")
+    parser.add_argument("--translation-batch", type=int, default=TRANSLATION_DEFAULTS["max_batch"], help="Textes max par lot de traduction")
+    parser.add_argument("--translation-wait-ms", type=float, default=TRANSLATION_DEFAULTS["max_wait_ms"], help="Attente max avant d'envoyer un lot incomplet (ms)")
+    return parser
+
+
+def translation_config_from_args(args):
+    return {
+        "backend": args.translation_backend,
+        "max_batch": args.translation_batch,
+        "max_wait_ms": args.translation_wait_ms
+    }
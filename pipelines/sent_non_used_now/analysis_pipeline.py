@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -8,17 +9,21 @@ from sklearn.cluster import KMeans
 import sqlite3
 from datetime import datetime
 import plotly.express as px
-from openai import OpenAI
 from dotenv import load_dotenv
 from pathlib import Path
 
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.llm_client import LLMClient
+from pipelines.common.table_store import read_table
+
 # Chargement sécurisé du .env
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 
 # Chargement des données
 
 def load_data():
-    df = pd.read_csv("data/df_final_merged.csv")
+    df = read_table("df_final_merged")
     df['ExtractionDate'] = datetime.today().strftime('%Y-%m-%d')
     df['Ticker'] = df['Ticker'].astype(str).str.upper().str.strip()
     df['CapType'] = df['IndexSource'].apply(lambda x: 'BigCap' if x in ['SP500', 'CAC40', 'Nikkei225'] else 'SmallCap')
@@ -121,7 +126,7 @@ df_kmeans.to_csv("data/df_kmeans_clusters.csv", index=False)
 
 # Résumé GPT
 try:
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    llm = LLMClient(model="gpt-3.5-turbo")
     cluster_summary = df_kmeans.groupby("Cluster")[features].mean().round(3)
     prompt = f"""
     Tu es un analyste quantitatif expert en finance.
@@ -129,17 +134,17 @@ try:
     {cluster_summary.to_string()}
     Merci de produire un résumé structuré et clair pour un dashboard d’analyse.
     """
-    chat_completion = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
+    cluster_descriptions = llm.complete_sync(
+        [
             {"role": "system", "content": "Tu es un expert en analyse financière."},
             {"role": "user", "content": prompt}
         ],
         temperature=0.5,
-        max_tokens=1000,
+        max_tokens=1000
     )
     with open("output/cluster_descriptions.txt", "w", encoding="utf-8") as f:
-        f.write(chat_completion.choices[0].message.content)
+        f.write(cluster_descriptions)
     print("✅ Résumé des clusters généré par OpenAI et sauvegardé dans 'output/cluster_descriptions.txt'.")
+    llm.report()
 except Exception as e:
     print(f"⚠️ Erreur GPT : {e}")
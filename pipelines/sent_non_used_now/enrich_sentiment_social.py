@@ -1,12 +1,14 @@
 import os
+import sys
 import time
 import random
 import pandas as pd
 import requests
 from tqdm import tqdm
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
 import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from pipelines.common.finbert_client import FinbertSync
+from pipelines.common.table_store import read_table
 
 # 📁 Répertoires
 BASE_DIR = os.path.dirname(__file__)
@@ -15,23 +17,19 @@ OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # ✅ Chargement de la table complète et filtrage des entreprises US (SP500 + AltScreen)
-df_all = pd.read_csv(os.path.join(DATA_DIR, "df_final_merged.csv"))
+df_all = read_table("df_final_merged", columns=["Ticker", "Company", "IndexSource"])
 df_us = df_all[df_all["IndexSource"].isin(["SP500", "AltScreen"])]
 df_us = df_us[["Ticker", "Company"]].dropna().drop_duplicates()
 tickers_info = df_us.to_dict(orient="records")
 
 # 🔣 FinBERT setup
 MODEL_NAME = "yiyanghkust/finbert-tone"
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
-model.eval()
+# Probabilités par classe (ordre id2label), via le démon FinBERT s'il tourne
+finbert = FinbertSync(MODEL_NAME, all_scores=True)
 
 # 🧠 Prédiction du sentiment
 def predict_sentiment(texts):
-    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = model(**inputs)
-        probs = torch.nn.functional.softmax(outputs.logits, dim=-1).numpy()
+    probs = np.array(finbert(texts))
     preds = np.argmax(probs, axis=1)
     return preds, probs
 
@@ -1,12 +1,14 @@
 import os
+import sys
 import time
 import random
 import pandas as pd
 import requests
 from tqdm import tqdm
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
 import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from pipelines.common.finbert_client import FinbertSync
+from pipelines.common.table_store import read_table
 
 # 🔄 Fallback Reddit
 def search_reddit_messages(query, limit=20):
@@ -27,7 +29,7 @@ OUTPUT_DIR = os.path.join(BASE_DIR, "output")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # 📊 Chargement des entreprises du Nikkei 225
-df = pd.read_csv(os.path.join(DATA_DIR, "df_final_merged.csv"))
+df = read_table("df_final_merged", columns=["Ticker", "Company", "IndexSource"])
 df_jp = df[df["IndexSource"] == "Nikkei225"][["Ticker", "Company"]].dropna()
 tickers_info = df_jp.to_dict(orient="records")
 
@@ -52,9 +54,8 @@ stocktwits_mapping = {
 
 # 🔣 FinBERT
 MODEL = "yiyanghkust/finbert-tone"
-tokenizer = AutoTokenizer.from_pretrained(MODEL)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL)
-model.eval()
+# Probabilités par classe (ordre id2label), via le démon FinBERT s'il tourne
+finbert = FinbertSync(MODEL, all_scores=True)
 
 def clean_name(name):
     name = name.lower()
@@ -63,10 +64,7 @@ def clean_name(name):
     return name.strip()
 
 def predict_sentiment(texts):
-    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=512)
-    with torch.no_grad():
-        outputs = model(**inputs)
-        probs = torch.nn.functional.softmax(outputs.logits, dim=-1).numpy()
+    probs = np.array(finbert(texts))
     preds = np.argmax(probs, axis=1)
     return preds, probs
 
@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import random
 import requests
@@ -6,7 +7,9 @@ import pandas as pd
 import urllib.parse
 import warnings
 from tqdm import tqdm
-from transformers import pipeline
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from pipelines.common.finbert_client import FinbertSync
+from pipelines.common.table_store import read_table
 
 # 📁 Dossiers
 BASE_DIR = os.path.dirname(__file__)
@@ -18,7 +21,7 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 # 📊 Chargement des données
-df_meta = pd.read_csv(os.path.join(DATA_DIR, "df_final_merged.csv"))
+df_meta = read_table("df_final_merged")
 
 # 🔍 Fonction Google Suggest
 def get_google_suggestions(query):
@@ -62,7 +65,7 @@ def analyze_sentiment_batch(suggestions):
 # 🚀 Script principal
 if __name__ == "__main__":
     print("🔁 Chargement du modèle FinBERT...")
-    finbert = pipeline("sentiment-analysis", model="ProsusAI/finbert", device=-1)
+    finbert = FinbertSync("ProsusAI/finbert")
 
     results = []
     print(f"🔍 Lancement de l’analyse des suggestions sur {len(df_meta)} entreprises...")
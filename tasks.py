@@ -1,61 +1,204 @@
 import subprocess
+import threading
 import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from tqdm import tqdm
 import sys
 import os
+import json
+import shutil
 import argparse
 
 # 📁 Se positionner dans le dossier racine du projet
 os.chdir(os.path.dirname(__file__))
 
+from pipelines.common.stage_cache import path_signature, stat_signature, stage_fingerprint, load_manifest, save_manifest
+from pipelines.common import telemetry
+from pipelines.common.table_store import CSV_EXPORT_ENV
+from pipelines.common.finbert_client import DAEMON_ENV
+from pipelines.common.finbert_daemon import start_daemon, stop_daemon
+
+# 🔗 Chaque pipeline déclare ses fichiers d'entrée et de sortie : le DAG d'exécution en est déduit
+INSIGHTS_DB = "data/insights.sqlite"
+INSIGHTS_DIR = "output/insights_enriched_all"
+OVERVIEW_FILES = [
+    "data/overview/fear_greed.json", "data/overview/vix.json", "data/overview/indices.csv",
+    "data/overview/sector_heatmap.json", "data/overview/sector_performance.json",
+    "data/overview/sector_volatility.json", "data/overview/news.json",
+    "data/overview/index_sparklines.json", "data/overview/headline_summary.json",
+    "data/overview/generated_at.json"
+]
+INDEX_FILES = ["data/overview/spy_data.json", "data/overview/ewq_data.json", "data/overview/ewj_data.json"]
+# Données overview lues par le résumé (générées hors DAG par generate_overview_data.py)
+OVERVIEW_DATA_FILES = [
+    "data/overview/fear_greed.json", "data/overview/vix.json", "data/overview/sector_performance.json",
+    "data/overview/sector_volatility.json", "data/overview/index_sparklines.json", "data/overview/news.json"
+]
+HEADLINE_FILE = "data/overview/headline_summary.json"
+
 PIPELINES = [
-    {"name": " 1️⃣ ETL Indices majeurs (S&P500, CAC40, Nikkei)", "script": "pipelines/1_companies/etl_pipeline.py", "steps": 14},
-    {"name": " 2️⃣ Enrichissement Small Caps", "script": "pipelines/1_companies/enrich_etl.py", "steps": 2},
-    {"name": " 3️⃣ Fusion finale des données", "script": "pipelines/1_companies/merge_uniform.py", "steps": 2},
+    {"name": " 1️⃣ ETL Indices majeurs (S&P500, CAC40, Nikkei)", "script": "pipelines/1_companies/etl_pipeline.py", "steps": 13,
+     "inputs": [], "outputs": ["data/df_final.parquet"]},
+    {"name": " 2️⃣ Enrichissement Small Caps", "script": "pipelines/1_companies/enrich_etl.py", "steps": 3,
+     "inputs": [], "outputs": ["data/tickers_to_enrich.parquet", "data/df_final_enriched.parquet"]},
+    {"name": " 3️⃣ Fusion finale des données", "script": "pipelines/1_companies/merge_uniform.py", "steps": 3,
+     "inputs": ["data/df_final.parquet", "data/df_final_enriched.parquet"], "outputs": ["data/df_final_merged.parquet"]},
 
     # ✅ Changement d'ordre ici
-    {"name": " 4️⃣ Index Data", "script": "pipelines/2_overview/Index_data.py", "steps": 2},
-    {"name": " 5️⃣ Données Overview Générales", "script": "pipelines/2_overview/generate_overview_full.py", "steps": 5},
+    {"name": " 4️⃣ Index Data", "script": "pipelines/2_overview/Index_data.py", "steps": 1,
+     "inputs": [], "outputs": INDEX_FILES},
+    {"name": " 5️⃣ Données Overview Générales", "script": "pipelines/2_overview/generate_overview_full.py", "steps": 1,
+     "inputs": INDEX_FILES + OVERVIEW_DATA_FILES, "outputs": [HEADLINE_FILE]},
+
+    {"name": " 6️⃣ Enrichissement Compagnies", "script": "pipelines/3_enrich_companies/enrich_companies.py", "steps": 2,
+     "inputs": ["data/df_final_merged.parquet"], "outputs": [INSIGHTS_DB, "errors_to_retry.json"]},
+    {"name": " 7️⃣ Raffinement Compagnies", "script": "pipelines/3_enrich_companies/refine_companies.py", "steps": 2,
+     "inputs": [INSIGHTS_DB], "outputs": [INSIGHTS_DB]},
+
+    {"name": " 8️⃣ Analyse News (GPT)", "script": "pipelines/4_sentiment/enrich_sent_gpt.py", "steps": 2, "finbert": True,
+     "inputs": ["data/df_final_merged.parquet"], "outputs": ["data/sentiment_news_summary_full.parquet", "data/news_summaries_full.json"]},
+    {"name": " 9️⃣ Fusion News GPT", "script": "pipelines/4_sentiment/merge_news_gpt.py", "steps": 1,
+     "inputs": ["data/news_summaries_full.json", "data/sentiment_news_summary_full.parquet", "data/df_final_merged.parquet", INSIGHTS_DB],
+     "outputs": [INSIGHTS_DB]},
+    {"name": " 🔟 Export JSON", "script": "pipelines/6_final/clean_json_files.py", "steps": 1,
+     "inputs": [INSIGHTS_DB], "outputs": [INSIGHTS_DIR]},
+
+    {"name": " 🔁 Génération df_sentiment_full", "script": "pipelines/4_sentiment/generate_df_sentiment_full.py", "steps": 1,
+     "inputs": [INSIGHTS_DB], "outputs": ["data/df_sentiment_full.parquet"]},
+    {"name": " 📦 Archivage Snapshot", "script": "pipelines/6_final/archive_daily_snapshot.py", "steps": 1,
+     "inputs": ["data/df_final_merged.parquet", "data/news_summaries_full.json", INSIGHTS_DB, INSIGHTS_DIR, "data/df_sentiment_full.parquet"] + OVERVIEW_FILES,
+     "outputs": ["output/history", "data/history"]}
+]
+
+# 📡 Télémétrie JSONL : un dossier par run, un fichier par étape (voir pipelines/common/telemetry.py)
+TELEMETRY_DIR = "data/telemetry"
+TELEMETRY_KEEP_RUNS = 30
+
+OUTPUT_LOCK = threading.Lock()
+
+
+# 🧩 Dépendances : lecture après écriture, écriture après écriture, écriture après lecture
+def build_dag(pipelines):
+    deps = {i: set() for i in range(len(pipelines))}
+    last_writer = {}
+    readers_since_write = {}
+
+    for i, pipeline in enumerate(pipelines):
+        for path in pipeline["inputs"]:
+            if path in last_writer:
+                deps[i].add(last_writer[path])
+        for path in pipeline["outputs"]:
+            if path in last_writer:
+                deps[i].add(last_writer[path])
+            deps[i].update(readers_since_write.get(path, set()))
+
+        for path in pipeline["inputs"]:
+            readers_since_write.setdefault(path, set()).add(i)
+        for path in pipeline["outputs"]:
+            last_writer[path] = i
+            readers_since_write[path] = set()
+        deps[i].discard(i)
 
-    {"name": " 6️⃣ Enrichissement Compagnies", "script": "pipelines/3_enrich_companies/enrich_companies.py", "steps": 3},
-    {"name": " 7️⃣ Raffinement Compagnies", "script": "pipelines/3_enrich_companies/refine_companies.py", "steps": 2},
+    check_dag(pipelines, deps)
+    return deps
 
-    {"name": " 8️⃣ Analyse News (GPT)", "script": "pipelines/4_sentiment/enrich_sent_gpt.py", "steps": 3},
-    {"name": " 9️⃣ Fusion News GPT", "script": "pipelines/4_sentiment/merge_news_gpt.py", "steps": 2},
-    {"name": " 🔟 Nettoyage JSON", "script": "pipelines/6_final/clean_json_files.py", "steps": 1},
 
-    {"name": " 🔁 Génération df_sentiment_full", "script": "pipelines/4_sentiment/generate_df_sentiment_full.py", "steps": 2},
-    {"name": " 📦 Archivage Snapshot", "script": "pipelines/6_final/archive_daily_snapshot.py", "steps": 1}
+# ✅ Ordres imposés quel que soit le parallélisme (avant, après) : le résumé overview
+# lit les fichiers d'indices du jour
+REQUIRED_ORDER = [
+    ("pipelines/2_overview/Index_data.py", "pipelines/2_overview/generate_overview_full.py")
 ]
 
-def run_pipeline_with_progress(pipeline):
+
+def check_dag(pipelines, deps):
+    scripts = {pipeline["script"]: i for i, pipeline in enumerate(pipelines)}
+    for before, after in REQUIRED_ORDER:
+        if before in scripts and after in scripts and scripts[before] not in deps[scripts[after]]:
+            raise ValueError(f"DAG incohérent : {after} doit attendre {before} (entrées/sorties à corriger)")
+
+
+# 🏭 Pour chaque étape : quelle étape précédente a produit chacune de ses entrées
+def input_producers(pipelines):
+    producers = {}
+    last_writer = {}
+    for i, pipeline in enumerate(pipelines):
+        producers[i] = {path: last_writer[path] for path in pipeline["inputs"] if path in last_writer}
+        for path in pipeline["outputs"]:
+            last_writer[path] = i
+    return producers
+
+
+# 🕒 Date de dernière modification d'un fichier ou d'un dossier (fichier le plus récent)
+def last_modified(path):
+    if os.path.isdir(path):
+        mtimes = [os.path.getmtime(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files]
+        return max(mtimes) if mtimes else None
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+# 🔎 Étape à relancer : sorties absentes, entrées plus récentes que les sorties, ou source externe
+def is_stale(pipeline):
+    if not pipeline["inputs"]:
+        return True
+    output_times = [last_modified(p) for p in pipeline["outputs"]]
+    if any(t is None for t in output_times):
+        return True
+    input_times = [t for t in (last_modified(p) for p in pipeline["inputs"]) if t is not None]
+    return bool(input_times) and max(input_times) > min(output_times)
+
+
+def emit(line, prefix=None):
+    with OUTPUT_LOCK:
+        if prefix:
+            tqdm.write(f"[{prefix}] {line.rstrip()}")
+        else:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+
+
+def telemetry_path(run_dir, pipeline):
+    return os.path.join(run_dir, os.path.basename(pipeline["script"]).replace(".py", ".jsonl"))
+
+
+# 🔧 Lance un script ; la progression vient des événements step_end de sa télémétrie
+def run_pipeline_with_progress(pipeline, position=0, prefix=None, run_dir=None):
     name = pipeline["name"]
     script = pipeline["script"]
     steps = pipeline["steps"]
-    step_percent = 100 // steps
 
-    print(f"\n🔧 Démarrage de : {name}")
-    progress_bar = tqdm(total=100, desc=name, bar_format="{l_bar}{bar}| {n_fmt}%", ncols=100)
+    emit(f"\n🔧 Démarrage de : {name}\n", prefix)
+    progress_bar = tqdm(total=100, desc=name, bar_format="{l_bar}{bar}| {n_fmt}%{postfix}", ncols=120, position=position, leave=prefix is None)
+
+    env = dict(os.environ)
+    events_path = None
+    if run_dir:
+        events_path = os.path.abspath(telemetry_path(run_dir, pipeline))
+        env[telemetry.ENV_VAR] = events_path
 
     process = subprocess.Popen(
-        ["python", script],
+        [sys.executable, script],
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         bufsize=1,
-        universal_newlines=True
+        universal_newlines=True,
+        env=env
     )
 
-    progress = 0
+    offset = 0
+    steps_done = 0
     for line in process.stdout:
-        sys.stdout.write(line)
-        sys.stdout.flush()
-        if any(kw in line.lower() for kw in [
-            "étape", "step", "extraction", "nettoyage", "short", "midterm", "résumé", "enrich",
-            "fiche", "json", "lecture", "sauvegarde", "df", "csv", "chargement"
-        ]):
-            progress = min(progress + step_percent, 100)
-            progress_bar.n = progress
-            progress_bar.refresh()
+        emit(line, prefix)
+        if events_path is None:
+            continue
+        events, offset = telemetry.read_events(events_path, offset)
+        for event in events:
+            if event["event"] == "step_start":
+                progress_bar.set_postfix_str(event["step"], refresh=False)
+            elif event["event"] == "step_end":
+                steps_done += 1
+        progress_bar.n = min(100, steps_done * 100 // max(steps, 1))
+        progress_bar.refresh()
 
     process.stdout.close()
     returncode = process.wait()
@@ -64,20 +207,204 @@ def run_pipeline_with_progress(pipeline):
     progress_bar.close()
 
     if returncode == 0:
-        print(f"{name} terminé avec succès.")
+        emit(f"{name} terminé avec succès.\n", prefix)
         return True
     else:
-        print(f"Erreur pendant l'exécution de {name}. Code de retour : {returncode}")
+        emit(f"Erreur pendant l'exécution de {name}. Code de retour : {returncode}\n", prefix)
         return False
 
+
+# 🚀 Exécution du DAG : les branches indépendantes tournent en parallèle (max `workers`)
+# Une étape dont l'empreinte (script, entrées, date) est inchangée est sautée (cache de build).
+def run_dag(pipelines, to_run, workers=1, use_cache=True, run_dir=None):
+    deps = build_dag(pipelines)
+    producers = input_producers(pipelines)
+    status = {i: ("done" if i not in to_run else "pending") for i in range(len(pipelines))}
+    timings = {}
+    slots = list(range(workers))
+    running = {}
+    manifest = load_manifest()
+    run_date = datetime.now().strftime("%Y-%m-%d")
+    fingerprints = {}
+    known_outputs = {}
+    # Sorties lues par une autre étape : signature de contenu ; les autres : signature stat
+    consumed = {path for pipeline in pipelines for path in pipeline["inputs"]}
+
+    # Entrée produite par une étape de ce run → hash enregistré à sa sortie, sinon hash du disque
+    def fingerprint(i):
+        if i not in fingerprints:
+            input_hashes = {}
+            for path in pipelines[i]["inputs"]:
+                producer = producers[i].get(path)
+                recorded = known_outputs.get(producer, {}).get(path)
+                input_hashes[path] = recorded or path_signature(path)
+            fingerprints[i] = stage_fingerprint(pipelines[i]["script"], input_hashes, run_date)
+        return fingerprints[i]
+
+    def cached(i):
+        entry = manifest.get(pipelines[i]["script"])
+        return (
+            use_cache and entry is not None
+            and entry.get("fingerprint") == fingerprint(i)
+            and all(os.path.exists(p) for p in pipelines[i]["outputs"])
+        )
+
+    def launch(executor, i):
+        slot = slots.pop(0)
+        prefix = pipelines[i]["script"].split("/")[-1].replace(".py", "") if workers > 1 else None
+        started = time.monotonic()
+        future = executor.submit(run_pipeline_with_progress, pipelines[i], slot, prefix, run_dir)
+        running[future] = (i, slot, started)
+        status[i] = "running"
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            progressed = True
+            while progressed:
+                progressed = False
+                for i in sorted(k for k, v in status.items() if v == "pending"):
+                    if any(status[d] in ("failed", "skipped") for d in deps[i]):
+                        status[i] = "skipped"
+                        emit(f"⏭️ {pipelines[i]['name']} ignoré (dépendance en échec)\n")
+                    elif all(status[d] in ("done", "cached") for d in deps[i]):
+                        if cached(i):
+                            status[i] = "cached"
+                            known_outputs[i] = manifest[pipelines[i]["script"]]["outputs"]
+                            emit(f"♻️ {pipelines[i]['name']} : empreinte inchangée, sorties réutilisées\n")
+                            progressed = True
+                        elif slots:
+                            launch(executor, i)
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i, slot, started = running.pop(future)
+                timings[i] = time.monotonic() - started
+                status[i] = "done" if future.result() else "failed"
+                slots.append(slot)
+                script = pipelines[i]["script"]
+                if status[i] == "done":
+                    known_outputs[i] = {
+                        p: path_signature(p) if p in consumed else stat_signature(p) for p in pipelines[i]["outputs"]
+                    }
+                    manifest[script] = {
+                        "fingerprint": fingerprint(i),
+                        "outputs": known_outputs[i],
+                        "run_date": run_date,
+                        "duration": round(timings[i], 1)
+                    }
+                else:
+                    manifest.pop(script, None)
+                    emit(f"❌ Pipeline stoppé à l'étape {i}: {pipelines[i]['name']}\n")
+                save_manifest(manifest)
+
+    return status, timings, deps
+
+
+# 📊 Rapport : temps par étape, somme séquentielle vs chemin critique
+def print_timing_report(pipelines, status, timings, deps, wall_time):
+    print("\n⏱️ Temps par étape :")
+    for i, pipeline in enumerate(pipelines):
+        if i in timings:
+            print(f"  {pipeline['name']:<52} {timings[i]:8.1f}s  ({status[i]})")
+        elif status[i] in ("skipped", "cached"):
+            print(f"  {pipeline['name']:<52} {'—':>8}   ({status[i]})")
+
+    finish = {}
+    for i in range(len(pipelines)):
+        finish[i] = timings.get(i, 0.0) + max((finish[d] for d in deps[i]), default=0.0)
+    critical = max(finish.values(), default=0.0)
+    print(f"\n  Somme des étapes     : {sum(timings.values()):8.1f}s")
+    print(f"  Chemin critique      : {critical:8.1f}s")
+    print(f"  Durée réelle du run  : {wall_time:8.1f}s")
+
+
+# 📡 Rapport télémétrie : par sous-étape, durée, items, latence p50/p95 par ticker, compteurs
+def print_telemetry_report(pipelines, run_dir):
+    report = {}
+    for pipeline in pipelines:
+        events, _ = telemetry.read_events(telemetry_path(run_dir, pipeline))
+        if events:
+            report[pipeline["script"]] = telemetry.summarize(events)
+    if not report:
+        return
+
+    def fmt(value):
+        return f"{value * 1000:8.0f}ms" if value is not None else f"{'—':>10}"
+
+    print("\n📡 Télémétrie par sous-étape :")
+    print(f"  {'sous-étape':<36} {'durée':>9} {'items':>6} {'p50':>10} {'p95':>10} {'réseau':>7} {'cache':>7}")
+    for script, steps in report.items():
+        print(f"  {script}")
+        for entry in steps:
+            counters = entry["counters"]
+            print(
+                f"    {entry['step']:<34} {entry['duration']:8.1f}s {entry['items']:6d} {fmt(entry['p50'])} {fmt(entry['p95'])}"
+                f" {counters.get('network_calls', 0):7d} {counters.get('cache_hits', 0):7d}"
+            )
+
+    slowest = max((e for steps in report.values() for e in steps), key=lambda e: e["duration"])
+    print(f"\n  Sous-étape dominante : {slowest['step']} ({slowest['duration']:.1f}s)")
+
+    with open(os.path.join(run_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"  Rapport complet : {os.path.join(run_dir, 'report.json')}")
+
+
+# 🧹 Ne garde que les derniers runs de télémétrie
+def prune_telemetry_runs(keep=TELEMETRY_KEEP_RUNS):
+    if not os.path.isdir(TELEMETRY_DIR):
+        return
+    runs = sorted(d for d in os.listdir(TELEMETRY_DIR) if os.path.isdir(os.path.join(TELEMETRY_DIR, d)))
+    for run in runs[:-keep]:
+        shutil.rmtree(os.path.join(TELEMETRY_DIR, run), ignore_errors=True)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--start-from", type=int, default=0, help="Indice du pipeline à partir duquel reprendre l'exécution (ex: 5 pour Index Data)")
+    parser.add_argument("--start-from", type=int, default=None, help="Reprise : les étapes avant cet indice sont considérées faites, et parmi les suivantes seules celles dont les entrées ont changé sont relancées (ex: 5 pour Index Data)")
+    parser.add_argument("--workers", type=int, default=3, help="Nombre d'étapes indépendantes exécutées en parallèle")
+    parser.add_argument("--no-cache", action="store_true", help="Relance toutes les étapes même si leur empreinte est inchangée")
+    parser.add_argument("--export-csv", action="store_true", help="Exporte aussi chaque table Parquet en CSV (consultation)")
+    parser.add_argument("--no-finbert-daemon", action="store_true", help="Chaque étape charge son propre modèle FinBERT au lieu du démon partagé")
     args = parser.parse_args()
 
-    print(f"\n⏯️ Reprise des pipelines à partir de l'étape {args.start_from}: {PIPELINES[args.start_from]['name']}\n")
+    if args.export_csv:
+        os.environ[CSV_EXPORT_ENV] = "1"
+
+    if args.start_from is None:
+        to_run = set(range(len(PIPELINES)))
+    else:
+        print(f"\n⏯️ Reprise des pipelines à partir de l'étape {args.start_from}: {PIPELINES[args.start_from]['name']}\n")
+        deps = build_dag(PIPELINES)
+        to_run = set()
+        for i in range(args.start_from, len(PIPELINES)):
+            # Une étape en aval d'une étape relancée est forcément relancée
+            if is_stale(PIPELINES[i]) or deps[i] & to_run:
+                to_run.add(i)
+            else:
+                print(f"✔️ Entrées inchangées, étape conservée : {PIPELINES[i]['name']}")
+
+    run_dir = os.path.join(TELEMETRY_DIR, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(run_dir, exist_ok=True)
+
+    # 🔥 Démon FinBERT : modèle chargé une fois pour toutes les étapes qui classent du texte
+    daemon = None
+    if not args.no_finbert_daemon and any(PIPELINES[i].get("finbert") for i in to_run):
+        daemon, url = start_daemon(log_path=os.path.join(run_dir, "finbert_daemon.log"))
+        if url:
+            os.environ[DAEMON_ENV] = url
+
+    started = time.monotonic()
+    try:
+        status, timings, deps = run_dag(PIPELINES, to_run, workers=max(1, args.workers), use_cache=not args.no_cache, run_dir=run_dir)
+    finally:
+        stop_daemon(daemon)
+    print_timing_report(PIPELINES, status, timings, deps, time.monotonic() - started)
+    print_telemetry_report(PIPELINES, run_dir)
+    prune_telemetry_runs()
 
-    for i in range(args.start_from, len(PIPELINES)):
-        if not run_pipeline_with_progress(PIPELINES[i]):
-            print(f"❌ Pipeline stoppé à l'étape {i}: {PIPELINES[i]['name']}")
-            break
+    if any(v == "failed" for v in status.values()):
+        sys.exit(1)
@@ -0,0 +1,56 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.indicators import latest_indicators, INDICATOR_COLUMNS
+from benchmarks.bench_indicators import ta_latest
+
+# 📐 Parité du moteur vectorisé avec `ta` (ticker par ticker, fillna=False)
+
+
+@pytest.fixture
+def close():
+    rng = np.random.default_rng(42)
+    dates = pd.bdate_range(end="2025-06-30", periods=120)
+    frame = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.02, (120, 6)), axis=0)),
+                         index=dates, columns=[f"T{i}" for i in range(6)])
+    # NaN de tête : cotations récentes / calendriers différents
+    frame.iloc[:30, 1] = np.nan
+    frame.iloc[:65, 2] = np.nan
+    # Série plate (RSI sans baisse, bandes de Bollinger nulles)
+    frame["FLAT"] = 50.0
+    # Historiques plus courts que les fenêtres (préchauffage → NaN)
+    for n in (5, 11, 14, 20, 26, 49):
+        frame[f"SHORT{n}"] = np.nan
+        frame.iloc[-n:, frame.columns.get_loc(f"SHORT{n}")] = 100 + rng.normal(0, 1, n).cumsum()
+    return frame
+
+
+def test_latest_indicators_matches_ta(close):
+    result = latest_indicators(close).set_index("Ticker")
+    expected = ta_latest(close).set_index("Ticker")
+    assert list(result.index) == list(close.columns)
+    for column in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(
+            result[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+            rtol=1e-8, atol=1e-8, equal_nan=True, err_msg=column
+        )
+
+
+def test_short_histories_are_nan(close):
+    result = latest_indicators(close).set_index("Ticker")
+    assert result.loc["SHORT5", ["RSI_14", "MACD", "Momentum_10", "BB_Percent"]].isna().all()
+    assert np.isnan(result.loc["SHORT11", "RSI_14"])
+    assert not np.isnan(result.loc["SHORT11", "Momentum_10"])
+    assert np.isnan(result.loc["SHORT20", "MACD"])
+    assert not np.isnan(result.loc["SHORT26", "MACD"])
+
+
+def test_empty_matrix():
+    result = latest_indicators(pd.DataFrame(index=pd.bdate_range(end="2025-06-30", periods=5)))
+    assert result.empty
+    assert list(result.columns) == ["Ticker"] + INDICATOR_COLUMNS
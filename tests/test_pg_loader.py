@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BASE_DIR)
+sqlalchemy = pytest.importorskip("sqlalchemy")
+pytest.importorskip("psycopg2")
+from pipelines.common.pg_loader import load_frame
+
+# 🐘 Chargement COPY sur un vrai Postgres : TEST_DATABASE_URL si défini (base jetable,
+# les tables de test sont supprimées puis recréées), sinon serveur local pgserver
+
+
+@pytest.fixture(scope="module")
+def engine():
+    url = os.getenv("TEST_DATABASE_URL")
+    server = None
+    if not url:
+        pgserver = pytest.importorskip("pgserver")
+        try:
+            server = pgserver.get_server(tempfile.mkdtemp(prefix="pg_loader_"), cleanup_mode="delete")
+        except Exception as e:
+            pytest.skip(f"Postgres local indisponible : {e}")
+        url = server.get_uri()
+    # copy_expert : pilote psycopg2 (défaut de SQLAlchemy selon la version)
+    engine = sqlalchemy.create_engine(sqlalchemy.engine.make_url(url).set(drivername="postgresql+psycopg2"))
+    yield engine
+    engine.dispose()
+    if server is not None:
+        server.cleanup()
+
+
+def _frame(day, values, tickers=("AAPL", "MSFT")):
+    return pd.DataFrame({
+        "Ticker": list(tickers),
+        "ExtractionDate": day,
+        "Return_6M": values
+    })
+
+
+def _read(engine, table):
+    with engine.connect() as connection:
+        return pd.read_sql(
+            f'SELECT * FROM "{table}" ORDER BY "Ticker", "ExtractionDate"', connection
+        ) if sqlalchemy.inspect(connection).has_table(table) else None
+
+
+def _tables(engine):
+    with engine.connect() as connection:
+        return set(sqlalchemy.inspect(connection).get_table_names())
+
+
+def _drop(engine, *tables):
+    with engine.begin() as connection:
+        for table in tables:
+            connection.exec_driver_sql(f'DROP TABLE IF EXISTS "{table}"')
+
+
+def test_swap_replaces_table_atomically(engine):
+    table = "swap_target"
+    _drop(engine, table, f"{table}__staging")
+    load_frame(engine, table, _frame("2025-06-01", [1.0, 2.0]), schema="df_final_merged", mode="swap")
+    replacement = pd.concat([_frame("2025-06-02", [float(i), float(i)], (f"T{i}a", f"T{i}b")) for i in range(500)])
+
+    # Lecteur en transaction ouverte : le chargement attend son verrou pour remplacer la table
+    reader = engine.raw_connection()
+    cursor = reader.cursor()
+    cursor.execute(f'SELECT count(*) FROM "{table}"')
+    assert cursor.fetchone()[0] == 2
+
+    loaded = {}
+    loader = threading.Thread(target=lambda: loaded.update(
+        rows=load_frame(engine, table, replacement, schema="df_final_merged", mode="swap")))
+    loader.start()
+    try:
+        deadline = time.monotonic() + 10
+        with engine.connect() as monitor:
+            while not monitor.exec_driver_sql("SELECT count(*) FROM pg_locks WHERE NOT granted").scalar():
+                assert time.monotonic() < deadline, "le chargement n'a jamais attendu le verrou du lecteur"
+                time.sleep(0.05)
+        # Staging chargée mais non validée : le lecteur voit toujours l'ancienne table
+        cursor.execute(f'SELECT count(*), min("ExtractionDate") FROM "{table}"')
+        assert cursor.fetchone() == (2, "2025-06-01")
+    finally:
+        reader.commit()
+        reader.close()
+        loader.join(timeout=30)
+
+    assert loaded["rows"] == 1000
+    result = _read(engine, table)
+    assert len(result) == 1000 and set(result["ExtractionDate"]) == {"2025-06-02"}
+    assert f"{table}__staging" not in _tables(engine)
+
+    # Clé primaire renommée avec la table : un second swap avec clé passe aussi
+    load_frame(engine, table, _frame("2025-06-03", [3.0, 4.0]), key=["Ticker", "ExtractionDate"], mode="swap")
+    load_frame(engine, table, _frame("2025-06-04", [5.0, 6.0]), key=["Ticker", "ExtractionDate"], mode="swap")
+    assert list(_read(engine, table)["ExtractionDate"]) == ["2025-06-04", "2025-06-04"]
+
+
+def test_upsert_keeps_history_and_updates_same_day(engine):
+    table = "upsert_target"
+    key = ["Ticker", "ExtractionDate"]
+    _drop(engine, table)
+    load_frame(engine, table, _frame("2025-06-01", [1.0, 2.0]), key=key, schema="df_final_merged")
+    load_frame(engine, table, _frame("2025-06-02", [3.0, 4.0]), key=key, schema="df_final_merged")
+    # Relance du même jour : AAPL corrigé, NVDA ajouté
+    load_frame(engine, table, _frame("2025-06-02", [30.0, 5.0], ("AAPL", "NVDA")), key=key, schema="df_final_merged")
+
+    result = _read(engine, table).set_index(key)["Return_6M"]
+    assert result.to_dict() == {
+        ("AAPL", "2025-06-01"): 1.0,
+        ("AAPL", "2025-06-02"): 30.0,
+        ("MSFT", "2025-06-01"): 2.0,
+        ("MSFT", "2025-06-02"): 4.0,
+        ("NVDA", "2025-06-02"): 5.0
+    }
+
+
+@pytest.mark.parametrize("mode", ["swap", "upsert"])
+def test_failed_load_leaves_target_untouched(engine, mode):
+    table = f"failed_{mode}_target"
+    key = ["Ticker", "ExtractionDate"]
+    _drop(engine, table, f"{table}__staging")
+    load_frame(engine, table, _frame("2025-06-01", [1.0, 2.0]), key=key, schema="df_final_merged", mode=mode)
+    before = _read(engine, table)
+
+    # Valeur non numérique dans une colonne DOUBLE PRECISION : le COPY échoue en cours de chargement
+    broken = _frame("2025-06-01", [10.0, "n/a"])
+    with pytest.raises(Exception):
+        load_frame(engine, table, broken, key=key, schema="df_final_merged", mode=mode)
+
+    pd.testing.assert_frame_equal(_read(engine, table), before)
+    assert f"{table}__staging" not in _tables(engine)
@@ -1,86 +1,165 @@
 import os
+import sys
 import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from pathlib import Path
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+from pipelines.common.pg_loader import load_frame, load_documents
+from pipelines.common.insights_store import InsightsStore, INSIGHTS_DB, EXPORT_DIR
+
 load_dotenv()
 
-# Fichiers à uploader
+# Fichiers à uploader : les tables à clé sont mises à jour par upsert (historique conservé),
+# les autres remplacées d'un bloc (staging + renommage, voir pipelines/common/pg_loader.py)
 TARGETS = [
-    "data/df_final_merged.csv",
-    "data/fear_greed.json",
-    "data/vix.json",
-    "data/news.json",
-    "data/sector_heatmap.json",
-    "data/sector_performance.json",
-    "data/sector_volatility.json",
-    "data/headline_summary.json",
-    "data/news_summaries_full.json",
-    "output/df_sentiment_full.csv"
+    {"path": "data/df_final_merged.parquet", "schema": "df_final_merged", "key": ["Ticker", "ExtractionDate"]},
+    {"path": "data/fear_greed.json"},
+    {"path": "data/vix.json"},
+    {"path": "data/news.json"},
+    {"path": "data/sector_heatmap.json"},
+    {"path": "data/sector_performance.json"},
+    {"path": "data/sector_volatility.json"},
+    {"path": "data/headline_summary.json"},
+    {"path": "data/news_summaries_full.json"},
+    {"path": "data/df_sentiment_full.parquet", "schema": "df_sentiment_full", "key": ["ticker", "extraction_date"]}
 ]
 
-# Connexion à PostgreSQL avec SQLAlchemy
-def connect_to_db():
+# Fiches sociétés (JSONB, une ligne par ticker et date d'extraction)
+INSIGHTS_TABLE = "insights"
+
+# Tables chargées en parallèle (une connexion du pool chacune)
+UPLOAD_WORKERS = 6
+
+# Connexion à PostgreSQL avec SQLAlchemy (pool dimensionné sur le nombre de workers)
+def connect_to_db(pool_size=UPLOAD_WORKERS):
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
         raise ValueError("DATABASE_URL manquant dans le fichier .env")
     print("🔗 Connexion via SQLAlchemy")
-    engine = create_engine(db_url)
+    engine = create_engine(db_url, pool_size=pool_size, max_overflow=0, pool_pre_ping=True)
     return engine
 
-# Upload CSV
-def upload_csv(path, engine):
+# Lecture CSV
+def read_csv(path):
+    return pd.read_csv(path)
+
+# Lecture Parquet (tables intermédiaires typées)
+def read_parquet(path):
+    return pd.read_parquet(path)
+
+# Lecture JSON (stocké comme table clé/valeur)
+def read_json(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        # Convertir les valeurs dict en chaînes JSON si nécessaire
+        rows = [{"key": k, "value": json.dumps(v) if isinstance(v, dict) else v} for k, v in data.items()]
+        return pd.DataFrame(rows)
+    elif isinstance(data, list):
+        return pd.json_normalize(data)
+    raise ValueError("Format JSON non reconnu")
+
+READERS = {".csv": read_csv, ".parquet": read_parquet, ".json": read_json}
+
+# Upload d'une cible : lecture puis COPY (upsert sur la clé ou remplacement atomique)
+# → {"table", "rows", "read", "load", "status", "detail"} ; les erreurs sont rapportées, pas levées
+def upload_target(target, engine, swap=False):
+    path = target["path"]
     table_name = Path(path).stem.lower()
+    result = {"table": table_name, "rows": 0, "read": 0.0, "load": 0.0, "status": "ok", "detail": ""}
+    reader = READERS.get(Path(path).suffix)
+    if reader is None:
+        return {**result, "status": "failed", "detail": f"format non supporté : {path}"}
+    if not os.path.exists(path):
+        return {**result, "status": "missing", "detail": f"fichier introuvable : {path}"}
     try:
-        df = pd.read_csv(path)
-        print(f" Upload CSV → {table_name}")
-        df.to_sql(table_name, engine, if_exists='replace', index=False, method='multi')
-        print(f" CSV uploadé : {table_name}")
+        started = time.monotonic()
+        df = reader(path)
+        result["read"] = time.monotonic() - started
+        mode = "swap" if swap or not target.get("key") else "upsert"
+        started = time.monotonic()
+        result["rows"] = load_frame(engine, table_name, df, key=target.get("key"), schema=target.get("schema"), mode=mode)
+        result["load"] = time.monotonic() - started
+        result["detail"] = mode
     except Exception as e:
-        print(f" Erreur CSV {table_name} : {e}")
+        result.update(status="failed", detail=f"{type(e).__name__}: {e}")
+    return result
 
-# Upload JSON (stocké comme table clé/valeur)
-def upload_json(path, engine):
-    table_name = Path(path).stem.lower()
+# Fiches : store SQLite s'il existe, sinon le dossier exporté (un JSON par ticker)
+def iter_insights():
+    if os.path.exists(INSIGHTS_DB):
+        with InsightsStore() as store:
+            yield from store.iter_documents()
+        return
+    for filename in sorted(os.listdir(EXPORT_DIR)):
+        if filename.endswith(".json"):
+            with open(os.path.join(EXPORT_DIR, filename), "r", encoding="utf-8") as f:
+                yield filename[:-len(".json")], json.load(f)
+
+# Upload des fiches en JSONB : seules les fiches modifiées (hash) sont écrites
+def upload_insights(engine):
+    result = {"table": INSIGHTS_TABLE, "rows": 0, "read": 0.0, "load": 0.0, "status": "ok", "detail": ""}
+    if not os.path.exists(INSIGHTS_DB) and not os.path.isdir(EXPORT_DIR):
+        return {**result, "status": "missing", "detail": f"fiches introuvables : {INSIGHTS_DB}, {EXPORT_DIR}"}
     try:
-        with open(path, "r") as f:
-            data = json.load(f)
-
-        if isinstance(data, dict):
-            # Convertir les valeurs dict en chaînes JSON si nécessaire
-            rows = [{"key": k, "value": json.dumps(v) if isinstance(v, dict) else v} for k, v in data.items()]
-            df = pd.DataFrame(rows)
-        elif isinstance(data, list):
-            df = pd.json_normalize(data)
-        else:
-            raise ValueError("Format JSON non reconnu")
-
-        print(f" Upload JSON → {table_name}")
-        df.to_sql(table_name, engine, if_exists='replace', index=False, method='multi')
-        print(f" JSON uploadé : {table_name}")
+        started = time.monotonic()
+        today = time.strftime("%Y-%m-%d")
+        documents = [(ticker, doc.get("extraction_date") or today, doc) for ticker, doc in iter_insights()]
+        result["read"] = time.monotonic() - started
+        started = time.monotonic()
+        written, unchanged = load_documents(engine, INSIGHTS_TABLE, documents)
+        result.update(rows=written, load=time.monotonic() - started, detail=f"{unchanged} fiches inchangées")
     except Exception as e:
-        print(f" Erreur JSON {table_name} : {e}")
+        result.update(status="failed", detail=f"{type(e).__name__}: {e}")
+    return result
 
-# Lancement global
-def upload_all():
-    engine = connect_to_db()
+# 📊 Rapport par table : lignes, lecture, chargement, statut
+def print_report(results, wall_time):
+    print(f"\n  {'table':<24} {'lignes':>8} {'lecture':>8} {'charg.':>8}  statut")
+    for r in results:
+        print(f"  {r['table']:<24} {r['rows']:8d} {r['read']:7.1f}s {r['load']:7.1f}s  {r['status']} {r['detail']}")
+    slowest = max((r["read"] + r["load"] for r in results), default=0.0)
+    print(f"\n  Table la plus longue  : {slowest:6.1f}s")
+    print(f"  Somme des tables      : {sum(r['read'] + r['load'] for r in results):6.1f}s")
+    print(f"  Durée réelle          : {wall_time:6.1f}s")
 
-    for path in TARGETS:
-        if not os.path.exists(path):
-            print(f" Fichier introuvable : {path}")
-            continue
+# Lancement global : lectures et chargements des tables indépendantes en parallèle,
+# une connexion du pool par table → True si aucune table n'a échoué
+def upload_all(swap=False, mode="all", workers=UPLOAD_WORKERS):
+    engine = connect_to_db(pool_size=workers)
+    started = time.monotonic()
 
-        if path.endswith(".csv"):
-            upload_csv(path, engine)
-        elif path.endswith(".json"):
-            upload_json(path, engine)
-        else:
-            print(f" Format non supporté : {path}")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        if mode in ("all", "tables"):
+            futures += [executor.submit(upload_target, target, engine, swap) for target in TARGETS]
+        if mode in ("all", "insights"):
+            futures.append(executor.submit(upload_insights, engine))
+        results = []
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            icon = {"ok": "✅", "missing": "⚠️"}.get(result["status"], "❌")
+            print(f"{icon} {result['table']} : {result['rows']} lignes en {result['read'] + result['load']:.1f}s {result['detail']}")
 
     engine.dispose()
     print("🔒 Connexion fermée.")
+    print_report(sorted(results, key=lambda r: r["table"]), time.monotonic() - started)
+    return not any(r["status"] == "failed" for r in results)
 
 if __name__ == "__main__":
-    upload_all()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--swap", action="store_true", help="Remplace aussi les tables à clé (au lieu de l'upsert incrémental)")
+    parser.add_argument("--mode", choices=["all", "tables", "insights"], default="all", help="tables = TARGETS, insights = fiches sociétés en JSONB")
+    parser.add_argument("--workers", type=int, default=UPLOAD_WORKERS, help="Tables chargées en parallèle (= taille du pool de connexions)")
+    args = parser.parse_args()
+    if not upload_all(swap=args.swap, mode=args.mode, workers=max(1, args.workers)):
+        sys.exit(1)